@@ -2,17 +2,33 @@
 Web Application for Exam Teacher Scheduler
 """
 
-from flask import Flask, render_template, request, jsonify, send_file
+import startup
+from flask import Flask, Response, render_template, request, jsonify, send_file
 from flask_cors import CORS
-from models import Teacher, Exam
-from scheduler import ExamScheduler
-from utils import init_data_dir, load_teachers, load_exams, export_schedule, save_teachers, save_exams, load_config, save_config
+startup.mark('导入 Flask')
+from models import Teacher, Exam, Schedule
+from scheduler import ExamScheduler, ScheduleCancelled
+from jobs import JobManager, JobCancelled
+from result_cache import ResultCache, cache_key
+from snapshot import ScheduleSnapshot, empty_snapshot
+from tracing import parse_level
+from xlsx_export import write_horizontal
+from utils import (
+    init_data_dir, load_teachers, load_exams, export_schedule, save_teachers, save_exams, load_config, save_config,
+    iter_teacher_import, iter_exam_import, export_teachers_xlsx, export_exams_xlsx, sync_teachers, sync_exams,
+    sync_config, input_fingerprint
+)
+import storage
 import config
 import os
 import sys
-import pandas as pd
 from datetime import datetime
+import json
+import functools
+import gzip
+import queue
 import threading
+startup.mark('导入排班模块')
 
 # 处理 PyInstaller 打包后的路径问题
 if getattr(sys, 'frozen', False):
@@ -28,26 +44,316 @@ CORS(app)
 app.config['SECRET_KEY'] = 'exam-teacher-scheduler-secret-key-2024'
 app.config['JSON_AS_ASCII'] = False
 
+# 当前调度器，只由写操作（排班、增量修复）在持有 scheduler_lock 时使用和修改
 scheduler_instance = None
-scheduler_lock = threading.Lock()
+# 保护 scheduler_instance / schedule_run_id / 快照发布的读改写（可重入：修复时会再次获取）
+scheduler_lock = threading.RLock()
+# 已发布的只读快照，读操作直接取引用，不加锁；None 表示尚未加载。
+# 快照版本号即数据库中共享的状态版本号，多个 worker 进程据此保持一致
+published_snapshot = None
+# 当前排班结果在数据库中的批次号
+schedule_run_id = None
+# 排班结果缓存，键为输入数据、种子和算法的哈希
+result_cache = ResultCache(config.RESULT_CACHE_SIZE, config.RESULT_CACHE_DIR, config.RESULT_CACHE_DISK_SIZE)
+# 后台排班任务
+job_manager = JobManager(max_workers=config.JOB_WORKERS)
+
+
+class StaleSchedule(Exception):
+    """The inputs or the published schedule changed while a scheduling run was computing"""
+
+    def __init__(self):
+        super().__init__('Data or schedule changed while scheduling; the result was discarded, please run again')
+
+
+def sync_state():
+    """
+    Bring this process in line with the shared scheduling state in the database (caller holds scheduler_lock).
+    Any process that publishes or resets bumps the shared version; a changed version reloads the current run.
+    """
+    global schedule_run_id
+    version, run_id = storage.get_state()
+    if published_snapshot is not None and published_snapshot.version == version:
+        return
+
+    teachers = load_teachers()
+    exams = load_exams()
+    config = load_config()
+    scheduler = None
+    run = None
+    if teachers and exams:
+        fingerprint = input_fingerprint(teachers, exams, config)
+        run = storage.get_schedule_run(run_id) if run_id is not None else None
+        if (run is None or run['fingerprint'] != fingerprint) and not storage.schedule_cleared():
+            # 没有当前排班或数据已变化：输入与某次保存的排班相同时直接恢复（明确重置过的除外）
+            run = storage.find_schedule_run(fingerprint)
+            if run is not None:
+                version = storage.advance_state(run['run_id'])
+        if run is None:
+            scheduler = ExamScheduler(teachers, exams, config)
+        else:
+            # 只恢复已保存的结果，不会重新求解，不需要并行进程
+            scheduler = ExamScheduler(teachers, exams, config, seed=run['seed'], engine=run['engine'], workers=1)
+            scheduler.restore(*storage.load_schedule_run(run['run_id']), run['unavailable_teachers'])
+    schedule_run_id = run['run_id'] if run is not None else None
+    install(scheduler, version)
 
 
 def get_scheduler():
-    """Get or create scheduler instance"""
-    global scheduler_instance
-    if scheduler_instance is None:
-        teachers = load_teachers()
-        exams = load_exams()
-        config = load_config()
-        if teachers and exams:
-            scheduler_instance = ExamScheduler(teachers, exams, config)
-    return scheduler_instance
-
-
-def reset_scheduler():
-    """Reset scheduler instance"""
-    global scheduler_instance
-    scheduler_instance = None
+    """Get the current scheduler (for writers), restoring the saved schedule when the inputs are unchanged"""
+    with scheduler_lock:
+        sync_state()
+        return scheduler_instance
+
+
+def get_snapshot():
+    """Current published schedule snapshot; readers use it without taking the lock"""
+    snapshot = published_snapshot
+    if snapshot is None or snapshot.version != storage.get_state()[0]:
+        with scheduler_lock:
+            sync_state()
+            snapshot = published_snapshot
+    return snapshot
+
+
+def install(scheduler, version):
+    """Make the scheduler current in this process and swap in a frozen snapshot of its result"""
+    global scheduler_instance, published_snapshot
+    if scheduler is None:
+        snapshot = empty_snapshot(version)
+    else:
+        snapshot = ScheduleSnapshot.from_scheduler(scheduler, version, serialize_schedule)
+    scheduler_instance = scheduler
+    # 整体替换引用即完成发布，读者要么看到旧快照，要么看到新快照
+    published_snapshot = snapshot
+    return snapshot
+
+
+def publish(scheduler):
+    """Publish the scheduler's result as the current schedule for all processes (caller holds scheduler_lock)"""
+    return install(scheduler, storage.advance_state(schedule_run_id))
+
+
+def reset_scheduler(cleared=False):
+    """
+    Reset scheduler instance.
+    cleared marks an explicit reset: saved runs are then not restored by input fingerprint until the next publish.
+    Data edits leave it False, so reverting an edit can still bring back the matching saved run.
+    """
+    global scheduler_instance, schedule_run_id, published_snapshot
+    with scheduler_lock:
+        scheduler_instance = None
+        schedule_run_id = None
+        published_snapshot = None
+        storage.advance_state(None, cleared=cleared)
+
+
+def persist_schedule(scheduler, fingerprint, new_run=True):
+    """Save the scheduler's result to the database, as a new run or over the current run"""
+    global schedule_run_id
+    sources = scheduler.get_source_exam_ids()
+    if new_run or schedule_run_id is None:
+        schedule_run_id = storage.save_schedule_run(scheduler.final_schedules, sources, engine=scheduler.engine,
+                                                    seed=scheduler.seed, fingerprint=fingerprint,
+                                                    unavailable_teachers=scheduler.unavailable_teachers)
+    else:
+        storage.replace_schedule_run(schedule_run_id, scheduler.final_schedules, sources, fingerprint,
+                                     scheduler.unavailable_teachers)
+
+
+def restore_cached(scheduler, entry):
+    """Restore a cached result into a fresh scheduler"""
+    schedules = [
+        Schedule(
+            exam=Exam(exam_id=item['exam_id'], exam_name=item['exam_name'], subject=item['subject'],
+                      date=item['date'], time_slot=item['time_slot'], room=item['room'],
+                      required_teachers=required),
+            teachers=[Teacher(t['id'], t['name'], '', '', '') for t in item['teachers']]
+        )
+        for item, required in zip(entry['data'], entry['required'])
+    ]
+    scheduler.restore(schedules, entry['sources'])
+
+
+def serialize_schedule(s):
+    """Convert a Schedule into the JSON shape used by the API"""
+    return {
+        'exam_id': s.exam.exam_id,
+        'exam_name': s.exam.exam_name,
+        'subject': s.exam.subject,
+        'date': s.exam.date,
+        'time_slot': s.exam.time_slot,
+        'room': s.exam.room,
+        'teachers': [{'id': t.teacher_id, 'name': t.name} for t in s.teachers],
+        'teacher_count': len(s.teachers)
+    }
+
+
+# 列表接口支持的字段（fields 参数）
+SCHEDULE_FIELDS = ('exam_id', 'exam_name', 'subject', 'date', 'time_slot', 'room', 'teachers', 'teacher_count')
+TEACHER_FIELDS = ('id', 'name', 'title', 'phone', 'department', 'exam_count')
+
+
+def listing_args(allowed_fields):
+    """
+    Read pagination and sparse-fieldset arguments from the query string.
+    offset/limit page through the list; cursor (the next_cursor of a previous page) continues from there.
+    Without limit or cursor everything is returned.
+    Returns (offset, limit, fields, cursor_version); raises ValueError on bad arguments.
+    """
+    offset, limit, cursor_version = 0, None, None
+    cursor = request.args.get('cursor')
+    if cursor:
+        try:
+            cursor_version, offset = (int(part) for part in cursor.split(':'))
+        except ValueError:
+            raise ValueError('Invalid cursor')
+        limit = config.API_MAX_PAGE_SIZE
+    elif request.args.get('offset') is not None:
+        try:
+            offset = int(request.args['offset'])
+        except ValueError:
+            raise ValueError('offset must be an integer')
+    if request.args.get('limit') is not None:
+        try:
+            limit = int(request.args['limit'])
+        except ValueError:
+            raise ValueError('limit must be an integer')
+    if offset < 0 or (limit is not None and limit <= 0):
+        raise ValueError('offset must be >= 0 and limit must be > 0')
+    if limit is not None:
+        limit = min(limit, config.API_MAX_PAGE_SIZE)
+
+    fields = None
+    if request.args.get('fields'):
+        fields = [name.strip() for name in request.args['fields'].split(',') if name.strip()]
+        unknown = [name for name in fields if name not in allowed_fields]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}; available: {', '.join(allowed_fields)}")
+    return offset, limit, fields, cursor_version
+
+
+def listing_body(items, version, args):
+    """
+    Slice one page out of items and keep only the requested fields.
+    A cursor issued for another state version is rejected (ValueError): the list it pointed into is gone.
+    """
+    offset, limit, fields, cursor_version = args
+    if cursor_version is not None and cursor_version != version:
+        raise ValueError('Cursor is stale: the data has changed, request the first page again')
+    total = len(items)
+    page = items[offset:] if limit is None else items[offset:offset + limit]
+    if fields is not None:
+        page = [{name: item[name] for name in fields} for item in page]
+    body = {'success': True, 'data': list(page), 'count': len(page), 'total': total}
+    if limit is not None:
+        end = offset + limit
+        body.update({'offset': offset, 'limit': limit,
+                     'next_cursor': f'{version}:{end}' if end < total else None})
+    return body
+
+
+def schedule_listing(snapshot, args):
+    """Filtered, paginated view of a published schedule (filters: date, teacher_id, subject, department)"""
+    positions = snapshot.select(**{name: request.args.get(name)
+                                   for name in ('date', 'teacher_id', 'subject', 'department')})
+    schedule_list = snapshot.schedule_list
+    if len(positions) == len(schedule_list):
+        items = schedule_list
+    else:
+        items = [schedule_list[i] for i in positions]
+    body = listing_body(items, snapshot.version, args)
+    # 监考老师不足的时间段（老师数量或每日/连续限制不够时），不受过滤和分页影响
+    body['shortfall'] = list(snapshot.statistics.get('shortfall', ()))
+    return body
+
+
+def conditional(view):
+    """
+    Conditional GET for read-heavy endpoints.
+    The ETag is the shared state version, bumped on every publish and data change. A repeat poll whose
+    If-None-Match still matches gets 304 without building or sending the body.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        # 先导入手工修改过的 xlsx（数据变化会推进版本号），再按最新版本号比较
+        sync_teachers()
+        sync_exams()
+        sync_config()
+        version = get_snapshot().version
+        etag = f'v{version}'
+        # 压缩后的表示带 -gz 后缀（见 compress_response），两者都算未变化
+        if request.if_none_match.contains_weak(etag) or request.if_none_match.contains_weak(f'{etag}-gz'):
+            response = app.response_class(status=304)
+            response.set_etag(etag)
+        else:
+            response = app.make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+            # ETag 取视图返回后的版本号；视图执行期间版本号有变化时无法确定响应对应哪个版本，
+            # 不设置 ETag，下次请求会拿到完整响应
+            if get_snapshot().version == version:
+                response.set_etag(etag)
+        # 浏览器可以缓存，但每次使用前都要带 If-None-Match 重新验证
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+    return wrapper
+
+
+@app.after_request
+def compress_response(response):
+    """
+    Gzip JSON responses above config.GZIP_MIN_SIZE when the client accepts it.
+    Every JSON response (and every 304, which stands in for one) carries Vary: Accept-Encoding, compressed or not,
+    so a shared cache never hands the identity body to a gzip client or the reverse.
+    """
+    if response.status_code == 304:
+        response.vary.add('Accept-Encoding')
+        return response
+    if (response.mimetype != 'application/json' or response.direct_passthrough
+            or 'Content-Encoding' in response.headers):
+        return response
+    response.vary.add('Accept-Encoding')
+    if 'gzip' not in request.headers.get('Accept-Encoding', '').lower():
+        return response
+    data = response.get_data()
+    if len(data) < config.GZIP_MIN_SIZE:
+        return response
+    response.set_data(gzip.compress(data, compresslevel=config.GZIP_LEVEL))
+    response.headers['Content-Encoding'] = 'gzip'
+    etag, weak = response.get_etag()
+    if etag is not None:
+        response.set_etag(f'{etag}-gz', weak)
+    return response
+
+
+def repair_requested():
+    """Whether a data edit asked to repair the current schedule instead of dropping it"""
+    return request.args.get('repair', '').lower() in ('1', 'true', 'yes')
+
+
+def repair_schedule(teacher_id=None, exam_id=None):
+    """
+    Repair the current schedule after a single teacher or exam change.
+    Returns the changed schedules, or None when there is no schedule to repair.
+    """
+    with scheduler_lock:
+        scheduler = get_scheduler()
+        if scheduler is None or not scheduler.final_schedules:
+            return None
+        if teacher_id is not None:
+            changed = scheduler.remove_teacher(str(teacher_id))
+        else:
+            exam = storage.get_exam(str(exam_id))
+            if exam is None:
+                scheduler.drop_exam(str(exam_id))
+                changed = []
+            else:
+                changed = scheduler.repair_exam(exam)
+        # 修复后的排班与修改后的数据对应，按当前数据更新指纹
+        persist_schedule(scheduler, input_fingerprint(load_teachers(), load_exams(), load_config()), new_run=False)
+        publish(scheduler)
+        return changed
 
 
 @app.route('/')
@@ -67,7 +373,7 @@ def init_data():
     """Initialize data"""
     try:
         init_data_dir()
-        reset_scheduler()
+        reset_scheduler(cleared=True)
         return jsonify({'success': True, 'message': 'Data initialized successfully'})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -99,23 +405,27 @@ def api_update_config():
 
 
 @app.route('/api/teachers')
+@conditional
 def api_teachers():
-    """Get all teachers"""
+    """Get teachers (filters: department, teacher_id), optionally paginated and restricted to some fields"""
     try:
+        snapshot = get_snapshot()
+        try:
+            args = listing_args(TEACHER_FIELDS)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        department = request.args.get('department')
+        teacher_id = request.args.get('teacher_id')
         teachers = load_teachers()
-        
-        # 从 final_schedules 计算每个老师的监考次数
-        scheduler = get_scheduler()
-        teacher_exam_count = {}
-        if scheduler and scheduler.final_schedules:
-            for schedule in scheduler.final_schedules:
-                for teacher in schedule.teachers:
-                    if teacher.teacher_id not in teacher_exam_count:
-                        teacher_exam_count[teacher.teacher_id] = 0
-                    teacher_exam_count[teacher.teacher_id] += 1
-        
+
+        # 每个老师的监考次数取自已发布的排班快照
+        teacher_exam_count = snapshot.teacher_counts
+
         teacher_list = []
         for t in teachers:
+            if (department is not None and t.department != department) or \
+                    (teacher_id is not None and t.teacher_id != teacher_id):
+                continue
             exam_count = teacher_exam_count.get(t.teacher_id, 0)
             teacher_list.append({
                 'id': t.teacher_id,
@@ -125,7 +435,10 @@ def api_teachers():
                 'department': t.department,
                 'exam_count': exam_count
             })
-        return jsonify({'success': True, 'data': teacher_list, 'count': len(teacher_list)})
+        try:
+            return jsonify(listing_body(teacher_list, snapshot.version, args))
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
@@ -144,32 +457,15 @@ def api_import_teachers():
         if not file.filename.endswith('.xlsx'):
             return jsonify({'success': False, 'error': 'Only .xlsx files are supported'}), 400
 
-        df = pd.read_excel(file)
+        sync_teachers()
 
-        required_columns = ['工号', '姓名', '职称', '联系方式', '所属部门']
-        missing_columns = [col for col in required_columns if col not in df.columns]
-        if missing_columns:
-            return jsonify({'success': False, 'error': f'Missing columns: {missing_columns}'}), 400
+        # 流式读取：先校验表头，每批读到后立即写入数据库；遇到第一处数据错误时回滚已写入的批次并返回，
+        # 不解析剩余内容
+        try:
+            added_count = storage.import_teachers(iter_teacher_import(file.stream))
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
 
-        teachers = load_teachers()
-        existing_ids = {t.teacher_id for t in teachers}
-        added_count = 0
-
-        for _, row in df.iterrows():
-            teacher_id = str(row['工号'])
-            if teacher_id not in existing_ids:
-                teacher = Teacher(
-                    teacher_id=teacher_id,
-                    name=str(row['姓名']),
-                    title=str(row['职称']),
-                    phone=str(row['联系方式']),
-                    department=str(row['所属部门']),
-                    exam_count=0
-                )
-                teachers.append(teacher)
-                added_count += 1
-
-        save_teachers(teachers)
         reset_scheduler()
 
         return jsonify({
@@ -191,9 +487,8 @@ def api_add_teacher():
         if missing:
             return jsonify({'success': False, 'error': f'Missing fields: {missing}'}), 400
 
-        teachers = load_teachers()
-        existing_ids = {t.teacher_id for t in teachers}
-        if data['id'] in existing_ids:
+        sync_teachers()
+        if storage.teacher_exists(str(data['id'])):
             return jsonify({'success': False, 'error': 'Teacher ID already exists'}), 400
 
         teacher = Teacher(
@@ -204,8 +499,7 @@ def api_add_teacher():
             department=data['department'],
             exam_count=0
         )
-        teachers.append(teacher)
-        save_teachers(teachers)
+        storage.add_teachers([teacher])
         reset_scheduler()
 
         return jsonify({'success': True, 'message': 'Teacher added successfully'})
@@ -217,10 +511,10 @@ def api_add_teacher():
 def api_delete_teacher(teacher_id):
     """Delete a teacher"""
     try:
-        teachers = load_teachers()
-        teachers = [t for t in teachers if t.teacher_id != teacher_id]
-        save_teachers(teachers)
-        reset_scheduler()
+        sync_teachers()
+        storage.delete_teacher(teacher_id)
+        if not repair_requested() or repair_schedule(teacher_id=teacher_id) is None:
+            reset_scheduler()
         return jsonify({'success': True, 'message': 'Teacher deleted successfully'})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -261,38 +555,15 @@ def api_import_exams():
         if not file.filename.endswith('.xlsx'):
             return jsonify({'success': False, 'error': 'Only .xlsx files are supported'}), 400
 
-        df = pd.read_excel(file)
+        sync_exams()
 
-        required_columns = ['考试编号', '考试名称', '科目', '日期', '时间段']
-        missing_columns = [col for col in required_columns if col not in df.columns]
-        if missing_columns:
-            return jsonify({'success': False, 'error': f'Missing columns: {missing_columns}'}), 400
+        # 流式读取：先校验表头，每批读到后立即写入数据库；遇到第一处数据错误时回滚已写入的批次并返回，
+        # 不解析剩余内容
+        try:
+            added_count = storage.import_exams(iter_exam_import(file.stream))
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
 
-        exams = load_exams()
-        existing_ids = {e.exam_id for e in exams}
-        added_count = 0
-
-        for _, row in df.iterrows():
-            exam_id = str(row['考试编号'])
-            if exam_id not in existing_ids:
-                rooms_count_value = row.get('考场数', 6)
-                if rooms_count_value is None or str(rooms_count_value) != str(rooms_count_value):
-                    rooms_count_value = 6
-
-                exam = Exam(
-                    exam_id=exam_id,
-                    exam_name=str(row['考试名称']),
-                    subject=str(row['科目']),
-                    date=str(row['日期']),
-                    time_slot=str(row['时间段']),
-                    room=str(row.get('考场', '')),
-                    required_teachers=int(row.get('需要监考人数', 2) or 2),
-                    rooms_count=int(rooms_count_value)
-                )
-                exams.append(exam)
-                added_count += 1
-
-        save_exams(exams)
         reset_scheduler()
 
         return jsonify({
@@ -314,9 +585,8 @@ def api_add_exam():
         if missing:
             return jsonify({'success': False, 'error': f'Missing fields: {missing}'}), 400
 
-        exams = load_exams()
-        existing_ids = {e.exam_id for e in exams}
-        if data['id'] in existing_ids:
+        sync_exams()
+        if storage.exam_exists(str(data['id'])):
             return jsonify({'success': False, 'error': 'Exam ID already exists'}), 400
 
         exam = Exam(
@@ -329,8 +599,7 @@ def api_add_exam():
             required_teachers=int(data.get('required_teachers', 2)),
             rooms_count=int(data.get('rooms_count', 6))
         )
-        exams.append(exam)
-        save_exams(exams)
+        storage.add_exams([exam])
         reset_scheduler()
 
         return jsonify({'success': True, 'message': 'Exam added successfully'})
@@ -342,10 +611,10 @@ def api_add_exam():
 def api_delete_exam(exam_id):
     """Delete an exam"""
     try:
-        exams = load_exams()
-        exams = [e for e in exams if e.exam_id != exam_id]
-        save_exams(exams)
-        reset_scheduler()
+        sync_exams()
+        storage.delete_exam(exam_id)
+        if not repair_requested() or repair_schedule(exam_id=exam_id) is None:
+            reset_scheduler()
         return jsonify({'success': True, 'message': 'Exam deleted successfully'})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -356,21 +625,9 @@ def api_update_teacher(teacher_id):
     """Update a teacher"""
     try:
         data = request.json
-        teachers = load_teachers()
-        
-        for teacher in teachers:
-            if teacher.teacher_id == teacher_id:
-                if 'name' in data:
-                    teacher.name = data['name']
-                if 'title' in data:
-                    teacher.title = data['title']
-                if 'phone' in data:
-                    teacher.phone = data['phone']
-                if 'department' in data:
-                    teacher.department = data['department']
-                break
-        
-        save_teachers(teachers)
+        sync_teachers()
+        fields = {'name': 'name', 'title': 'title', 'phone': 'phone', 'department': 'department'}
+        storage.update_teacher(teacher_id, {field: data[key] for key, field in fields.items() if key in data})
         reset_scheduler()
         return jsonify({'success': True, 'message': 'Teacher updated successfully'})
     except Exception as e:
@@ -382,28 +639,16 @@ def api_update_exam(exam_id):
     """Update an exam"""
     try:
         data = request.json
-        exams = load_exams()
-        
-        for exam in exams:
-            if exam.exam_id == exam_id:
-                if 'name' in data:
-                    exam.exam_name = data['name']
-                if 'subject' in data:
-                    exam.subject = data['subject']
-                if 'date' in data:
-                    exam.date = data['date']
-                if 'time_slot' in data:
-                    exam.time_slot = data['time_slot']
-                if 'room' in data:
-                    exam.room = data['room']
-                if 'required_teachers' in data:
-                    exam.required_teachers = int(data['required_teachers'])
-                if 'rooms_count' in data:
-                    exam.rooms_count = int(data.get('rooms_count', 6))
-                break
-        
-        save_exams(exams)
-        reset_scheduler()
+        sync_exams()
+        fields = {'name': 'exam_name', 'subject': 'subject', 'date': 'date', 'time_slot': 'time_slot', 'room': 'room'}
+        changes = {field: data[key] for key, field in fields.items() if key in data}
+        if 'required_teachers' in data:
+            changes['required_teachers'] = int(data['required_teachers'])
+        if 'rooms_count' in data:
+            changes['rooms_count'] = int(data.get('rooms_count', 6))
+        storage.update_exam(exam_id, changes)
+        if not repair_requested() or repair_schedule(exam_id=exam_id) is None:
+            reset_scheduler()
         return jsonify({'success': True, 'message': 'Exam updated successfully'})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -413,19 +658,7 @@ def api_update_exam(exam_id):
 def api_export_teachers():
     """Export teachers to Excel"""
     try:
-        teachers = load_teachers()
-        data = []
-        for t in teachers:
-            data.append({
-                '工号': t.teacher_id,
-                '姓名': t.name,
-                '职称': t.title,
-                '联系方式': t.phone,
-                '所属部门': t.department,
-                '监考次数': t.exam_count
-            })
-        df = pd.DataFrame(data)
-        df.to_excel(config.TEACHERS_FILE, index=False)
+        export_teachers_xlsx(load_teachers())
         return send_file(
             config.TEACHERS_FILE,
             as_attachment=True,
@@ -440,20 +673,7 @@ def api_export_teachers():
 def api_export_exams():
     """Export exams to Excel"""
     try:
-        exams = load_exams()
-        data = []
-        for e in exams:
-            data.append({
-                '考试编号': e.exam_id,
-                '考试名称': e.exam_name,
-                '科目': e.subject,
-                '日期': e.date,
-                '时间段': e.time_slot,
-                '考场': e.room,
-                '需要监考人数': e.required_teachers
-            })
-        df = pd.DataFrame(data)
-        df.to_excel(config.EXAMS_FILE, index=False)
+        export_exams_xlsx(load_exams())
         return send_file(
             config.EXAMS_FILE,
             as_attachment=True,
@@ -468,9 +688,8 @@ def api_export_exams():
 def api_clear_teachers():
     """Clear all teachers"""
     try:
-        import config
-        df = pd.DataFrame()
-        df.to_excel(config.TEACHERS_FILE, index=False)
+        sync_teachers()
+        save_teachers([])
         reset_scheduler()
         return jsonify({'success': True, 'message': 'All teachers cleared'})
     except Exception as e:
@@ -481,103 +700,361 @@ def api_clear_teachers():
 def api_clear_exams():
     """Clear all exams"""
     try:
-        import config
-        df = pd.DataFrame()
-        df.to_excel(config.EXAMS_FILE, index=False)
+        sync_exams()
+        save_exams([])
         reset_scheduler()
         return jsonify({'success': True, 'message': 'All exams cleared'})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+def prepare_schedule(data):
+    """
+    Validate a scheduling request and build the scheduler for it.
+    Returns (scheduler, fingerprint, use_cache, version); raises ValueError for bad requests.
+    version is the shared state version the inputs were read at; run_schedule only publishes if it is unchanged.
+    """
+    seed = data.get('seed')
+    if seed is not None:
+        try:
+            seed = int(seed)
+        except (TypeError, ValueError):
+            raise ValueError('seed must be an integer')
+    trace_level = parse_level(data.get('trace'))
+
+    # 先导入有变化的 xlsx 并与共享状态对齐（都可能推进版本号），再记下版本号并读取数据：
+    # 之后的任何修改都会使版本号不同，结果不会基于过时的数据发布
+    sync_teachers()
+    sync_exams()
+    sync_config()
+    version = get_snapshot().version
+    teachers = load_teachers()
+    exams = load_exams()
+    config = load_config()
+    if not teachers or not exams:
+        raise ValueError('No data available')
+
+    fingerprint = input_fingerprint(teachers, exams, config)
+    scheduler = ExamScheduler(teachers, exams, config, seed=seed, trace_level=trace_level,
+                              engine=data.get('engine'))
+    # 需要跟踪记录或显式要求重新计算时不使用缓存
+    use_cache = trace_level is None and data.get('cache', True) is not False
+    return scheduler, fingerprint, use_cache, version
+
+
+def run_schedule(scheduler, fingerprint, use_cache, version, progress=None, cancel=None):
+    """
+    Run the scheduler (or restore a cached result) and publish it as the current schedule.
+    Returns (snapshot, cache_status).
+    Raises StaleSchedule, without publishing, when the shared state moved past version during the run
+    (data edited, schedule reset, repaired or published by another run).
+    """
+    global schedule_run_id
+    key = cache_key(fingerprint, scheduler.seed, scheduler.engine)
+    entry = result_cache.get(key) if use_cache else None
+
+    # 计算在锁外进行，每次运行使用各自的 ExamScheduler，互不影响
+    if entry is not None:
+        restore_cached(scheduler, entry)
+        if progress is not None:
+            progress({'done': len(entry['data']), 'total': len(entry['data'])})
+    else:
+        scheduler.schedule(progress=progress, cancel=cancel)
+
+    with scheduler_lock:
+        if storage.get_state()[0] != version:
+            raise StaleSchedule()
+        previous_run_id = schedule_run_id
+        # 数据库中已有同样输入的批次时沿用，不重复保存（修复过、排除了老师的批次与缓存结果不同，不能沿用）
+        run = storage.find_schedule_run(fingerprint) if entry is not None else None
+        if (run is not None and run['seed'] == scheduler.seed and run['engine'] == scheduler.engine
+                and not run['unavailable_teachers']):
+            schedule_run_id = run['run_id']
+        else:
+            persist_schedule(scheduler, fingerprint)
+        # 其他进程可能在上面的检查之后修改了状态：版本号的比较和推进是原子的，失败时不发布（已保存的批次只留在历史中）
+        new_version = storage.advance_state(schedule_run_id, expected_version=version)
+        if new_version is None:
+            schedule_run_id = previous_run_id
+            raise StaleSchedule()
+        snapshot = install(scheduler, new_version)
+
+    if entry is None:
+        result_cache.put(key, {
+            'data': list(snapshot.schedule_list),
+            'sources': scheduler.get_source_exam_ids(),
+            'required': [s.exam.required_teachers for s in snapshot.schedules]
+        })
+    return snapshot, 'hit' if entry is not None else ('miss' if use_cache else 'bypass')
+
+
 @app.route('/api/schedule', methods=['POST'])
 def api_schedule():
-    """Execute scheduling"""
+    """Execute scheduling; with {"async": true} run it as a background job and return the job id"""
     try:
-        global scheduler_instance
-        teachers = load_teachers()
-        exams = load_exams()
-        config = load_config()
-        
-        if not teachers or not exams:
-            return jsonify({'success': False, 'error': 'No data available'}), 400
-        
-        scheduler_instance = ExamScheduler(teachers, exams, config)
-        
-        schedules = scheduler_instance.schedule()
-        
-        schedule_list = []
-        for s in schedules:
-            teachers = [{'id': t.teacher_id, 'name': t.name} for t in s.teachers]
-            schedule_list.append({
-                'exam_id': s.exam.exam_id,
-                'exam_name': s.exam.exam_name,
-                'subject': s.exam.subject,
-                'date': s.exam.date,
-                'time_slot': s.exam.time_slot,
-                'room': s.exam.room,
-                'teachers': teachers,
-                'teacher_count': len(s.teachers)
-            })
-        
-        return jsonify({
-            'success': True,
-            'data': schedule_list,
-            'count': len(schedule_list),
-            'message': f'Successfully scheduled {len(schedule_list)} exams'
-        })
+        data = request.get_json(silent=True) or {}
+        try:
+            scheduler, fingerprint, use_cache, version = prepare_schedule(data)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+
+        if data.get('async'):
+            def task(job):
+                try:
+                    snapshot, cache_status = run_schedule(
+                        scheduler, fingerprint, use_cache, version,
+                        progress=lambda event: job.update(event['done'], event['total']),
+                        cancel=job.cancel_event
+                    )
+                except ScheduleCancelled:
+                    raise JobCancelled()
+                return {'count': len(snapshot.schedule_list), 'cache': cache_status}
+
+            job = job_manager.submit('schedule', task)
+            return jsonify({'success': True, 'job_id': job.job_id, 'status': job.status}), 202
+
+        # 返回结果同样支持过滤、分页和字段选择（参数有误时不排班）
+        try:
+            args = listing_args(SCHEDULE_FIELDS)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        try:
+            snapshot, cache_status = run_schedule(scheduler, fingerprint, use_cache, version)
+        except StaleSchedule as e:
+            return jsonify({'success': False, 'error': str(e)}), 409
+        body = schedule_listing(snapshot, args)
+        body['message'] = f'Successfully scheduled {len(snapshot.schedule_list)} exams'
+        response = jsonify(body)
+        response.headers['X-Schedule-Cache'] = cache_status
+        return response
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+def sse_message(event, payload):
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+
+@app.route('/api/schedule/stream')
+def api_schedule_stream():
+    """
+    Run scheduling and stream the result as Server-Sent Events:
+    start (job id), one slot event per time slot with its assignments and balance metrics,
+    then done / cancelled / error.
+    """
+    args = request.args
+    data = {
+        'seed': args.get('seed'),
+        'engine': args.get('engine'),
+        'cache': args.get('cache', '1').lower() not in ('0', 'false', 'no')
+    }
+    try:
+        scheduler, fingerprint, use_cache, version = prepare_schedule(data)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    events = queue.Queue()
+
+    def on_slot(event):
+        if event.get('schedules') is None:
+            return
+        events.put(('slot', {
+            'date': event['date'],
+            'time_slot': event['time_slot'],
+            'done': event['done'],
+            'total': event['total'],
+            'data': [serialize_schedule(s) for s in event['schedules']],
+            'balance': {
+                'max': event['max_load'],
+                'min': event['min_load'],
+                'gap': event['max_load'] - event['min_load']
+            }
+        }))
+
+    def task(job):
+        try:
+            snapshot, cache_status = run_schedule(scheduler, fingerprint, use_cache, version,
+                                                  progress=on_slot, cancel=job.cancel_event)
+        except ScheduleCancelled:
+            events.put(('cancelled', {'job_id': job.job_id}))
+            raise JobCancelled()
+        except Exception as e:
+            events.put(('error', {'error': str(e)}))
+            raise
+        schedule_list = snapshot.schedule_list
+        if cache_status == 'hit':
+            # 命中缓存时没有逐时间段的进度，按时间段分组一次性推送
+            slots = {}
+            for item in schedule_list:
+                slots.setdefault((item['date'], item['time_slot']), []).append(item)
+            for done, ((date, time_slot), items) in enumerate(slots.items(), start=1):
+                events.put(('slot', {'date': date, 'time_slot': time_slot, 'done': done,
+                                     'total': len(slots), 'data': items}))
+        events.put(('done', {'count': len(schedule_list), 'cache': cache_status}))
+        return {'count': len(schedule_list), 'cache': cache_status}
+
+    job = job_manager.submit('schedule', task)
+
+    def generate():
+        finished = False
+        try:
+            yield sse_message('start', {'job_id': job.job_id})
+            while True:
+                try:
+                    event, payload = events.get(timeout=1)
+                except queue.Empty:
+                    # 排队中被取消的任务不会产生事件
+                    if job.status == 'cancelled':
+                        finished = True
+                        yield sse_message('cancelled', {'job_id': job.job_id})
+                        return
+                    yield ": keepalive\n\n"
+                    continue
+                yield sse_message(event, payload)
+                if event in ('done', 'cancelled', 'error'):
+                    finished = True
+                    return
+        finally:
+            # 客户端断开时取消仍在运行的排班
+            if not finished:
+                job_manager.cancel(job.job_id)
+
+    return Response(generate(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@app.route('/api/jobs/<job_id>')
+def api_job_status(job_id):
+    """Get the status, progress and ETA of a background job"""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    return jsonify({'success': True, 'data': job.to_dict()})
+
+
+@app.route('/api/jobs/<job_id>/cancel', methods=['POST'])
+def api_cancel_job(job_id):
+    """Cancel a background job; a running job stops at the next time slot"""
+    job = job_manager.cancel(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    return jsonify({'success': True, 'data': job.to_dict()})
+
+
 @app.route('/api/schedule')
+@conditional
 def api_get_schedule():
-    """Get current schedule"""
+    """Get current schedule, optionally filtered, paginated and restricted to some fields"""
     try:
-        scheduler = get_scheduler()
-        if scheduler is None or not scheduler.final_schedules:
-            return jsonify({'success': True, 'data': [], 'count': 0, 'message': 'No schedule yet'})
-
-        schedule_list = []
-        for s in scheduler.final_schedules:
-            teachers = [{'id': t.teacher_id, 'name': t.name} for t in s.teachers]
-            schedule_list.append({
-                'exam_id': s.exam.exam_id,
-                'exam_name': s.exam.exam_name,
-                'subject': s.exam.subject,
-                'date': s.exam.date,
-                'time_slot': s.exam.time_slot,
-                'room': s.exam.room,
-                'teachers': teachers,
-                'teacher_count': len(s.teachers)
-            })
+        snapshot = get_snapshot()
+        try:
+            body = schedule_listing(snapshot, listing_args(SCHEDULE_FIELDS))
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        if snapshot.empty:
+            body['message'] = 'No schedule yet'
+        return jsonify(body)
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 
+@app.route('/api/schedule/query')
+def api_query_schedule():
+    """
+    Query saved schedules by date, time slot, subject or teacher.
+    Defaults to the current published run (empty when there is none); pass run_id for an older run.
+    """
+    try:
+        run_id = request.args.get('run_id')
+        if run_id is not None:
+            try:
+                run_id = int(run_id)
+            except ValueError:
+                return jsonify({'success': False, 'error': 'run_id must be an integer'}), 400
+        else:
+            # 手工修改过的 xlsx 先导入，数据变化会清空当前批次
+            sync_teachers()
+            sync_exams()
+        schedules = storage.query_schedules(
+            run_id=run_id,
+            date=request.args.get('date'),
+            time_slot=request.args.get('time_slot'),
+            subject=request.args.get('subject'),
+            teacher_id=request.args.get('teacher_id')
+        )
+        schedule_list = [serialize_schedule(s) for s in schedules]
+        return jsonify({'success': True, 'data': schedule_list, 'count': len(schedule_list)})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@app.route('/api/schedule/runs')
+def api_schedule_runs():
+    """List saved scheduling runs, newest first"""
+    try:
+        runs = storage.list_schedule_runs()
+        return jsonify({'success': True, 'data': runs, 'count': len(runs)})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@app.route('/api/schedule/repair', methods=['POST'])
+def api_repair_schedule():
+    """Repair the current schedule for one unavailable teacher or one changed exam"""
+    try:
+        data = request.get_json(silent=True) or {}
+        teacher_id = data.get('teacher_id')
+        exam_id = data.get('exam_id')
+        if (teacher_id is None) == (exam_id is None):
+            return jsonify({'success': False, 'error': 'Provide exactly one of teacher_id or exam_id'}), 400
+
+        changed = repair_schedule(teacher_id=teacher_id, exam_id=exam_id)
+        if changed is None:
+            return jsonify({'success': False, 'error': 'No schedule to repair'}), 400
+
+        schedule_list = [serialize_schedule(s) for s in changed]
         return jsonify({
             'success': True,
             'data': schedule_list,
-            'count': len(schedule_list)
+            'count': len(schedule_list),
+            'message': f'Repaired {len(schedule_list)} schedules'
         })
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+@app.route('/api/schedule/trace')
+def api_schedule_trace():
+    """Get trace records collected during the last scheduling run"""
+    try:
+        snapshot = published_snapshot
+        trace = snapshot.trace if snapshot is not None else []
+        return jsonify({'success': True, 'data': trace, 'count': len(trace)})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
 @app.route('/api/statistics')
+@conditional
 def api_statistics():
     """Get statistics"""
     try:
-        scheduler = get_scheduler()
-        if scheduler is None or not scheduler.final_schedules:
+        snapshot = get_snapshot()
+        if snapshot.empty:
             return jsonify({
                 'success': True,
                 'total_exams': 0,
                 'scheduled_exams': 0,
                 'unscheduled_exams': 0,
+                'understaffed_exams': 0,
+                'shortfall': [],
                 'teacher_stats': [],
                 'date_stats': {}
             })
 
 
-        stats = scheduler.get_statistics()
+        stats = dict(snapshot.statistics)
         return jsonify({'success': True, 'stats': stats})
     except Exception as e:
         import traceback
@@ -589,11 +1066,11 @@ def api_statistics():
 def api_export_statistics():
     """Export statistics to Excel with charts (as images like page display)"""
     try:
-        scheduler = get_scheduler()
-        if scheduler is None or not scheduler.final_schedules:
+        snapshot = get_snapshot()
+        if snapshot.empty:
             return jsonify({'success': False, 'error': 'No statistics to export'}), 400
 
-        stats = scheduler.get_statistics()
+        stats = snapshot.statistics
 
         import matplotlib.pyplot as plt
         import matplotlib
@@ -734,13 +1211,13 @@ def api_export_statistics():
 def api_export():
     """Export schedule to Excel (default format: horizontal)"""
     try:
-        scheduler = get_scheduler()
-        if scheduler is None or not scheduler.final_schedules:
+        snapshot = get_snapshot()
+        if snapshot.empty:
             return jsonify({'success': False, 'error': 'No schedule to export'}), 400
 
         # 默认使用横向考场格式导出
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        return export_excel_horizontal(scheduler, timestamp)
+        return export_excel_horizontal(snapshot, timestamp)
     except Exception as e:
         import traceback
         print(f"导出错误: {traceback.format_exc()}")
@@ -785,8 +1262,8 @@ def api_schedule_excel_formats():
 def api_schedule_excel(format):
     """Export schedule in specific Excel format"""
     try:
-        scheduler = get_scheduler()
-        if scheduler is None or not scheduler.final_schedules:
+        snapshot = get_snapshot()
+        if snapshot.empty:
             return jsonify({'success': False, 'error': 'No schedule to export'}), 400
 
         os.makedirs(config.DATA_DIR, exist_ok=True)
@@ -795,7 +1272,7 @@ def api_schedule_excel(format):
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         
         if format == 'horizontal':
-            return export_excel_horizontal(scheduler, timestamp)
+            return export_excel_horizontal(snapshot, timestamp)
         else:
             return jsonify({'success': False, 'error': f'Format {format} not implemented yet'}), 500
             
@@ -805,87 +1282,11 @@ def api_schedule_excel(format):
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
-def export_excel_horizontal(scheduler, timestamp):
+def export_excel_horizontal(snapshot, timestamp):
     """横向考场格式 - 科目横向排列，每个考场一列"""
-    from openpyxl import Workbook
-    from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-    from openpyxl.utils import get_column_letter
-    from collections import defaultdict
-    
     filename = os.path.join(config.DATA_DIR, f'schedule_horizontal_{timestamp}.xlsx')
-    wb = Workbook()
-    ws = wb.active
-    ws.title = '排班表'
-    
-    # 样式
-    title_fill = PatternFill(start_color='4472C4', end_color='4472C4', fill_type='solid')
-    header_fill = PatternFill(start_color='92C5DE', end_color='92C5DE', fill_type='solid')
-    border = Border(left=Side(style='thin', color='CCCCCC'), right=Side(style='thin', color='CCCCCC'), 
-                     top=Side(style='thin', color='CCCCCC'), bottom=Side(style='thin', color='CCCCCC'))
-    
-    # 标题
-    ws.merge_cells('A1:I1')
-    ws['A1'] = '监考排班表'
-    ws['A1'].font = Font(size=16, bold=True, color='FFFFFF')
-    ws['A1'].fill = title_fill
-    ws['A1'].alignment = Alignment(horizontal='center', vertical='center')
-    
-    # 表头
-    headers = ['日期', '时间', '科目', '考场一', '考场二', '考场三', '考场四', '考场五', '考场六']
-    for col, header in enumerate(headers, 1):
-        cell = ws.cell(row=3, column=col, value=header)
-        cell.fill = header_fill
-        cell.font = Font(color='FFFFFF', bold=True, size=11)
-        cell.alignment = Alignment(horizontal='center', vertical='center')
-        cell.border = border
-    
-    # 按日期、时间、科目分组
-    grouped = defaultdict(list)
-    for schedule in scheduler.final_schedules:
-        key = (schedule.exam.date, schedule.exam.time_slot, schedule.exam.subject)
-        grouped[key].append(schedule)
-    
-    # 填充数据
-    row = 4
-    for (date, time_slot, subject), schedules in sorted(grouped.items()):
-        # 填充日期、时间、科目列
-        ws.cell(row=row, column=1, value=date).alignment = Alignment(horizontal='center', vertical='center')
-        ws.cell(row=row, column=2, value=time_slot).alignment = Alignment(horizontal='center', vertical='center')
-        ws.cell(row=row, column=3, value=subject).alignment = Alignment(horizontal='center', vertical='center')
-        
-        # 提取考场并填充
-        rooms = {}
-        for schedule in schedules:
-            room_name = schedule.exam.room
-            # 提取考场编号
-            room_num = room_name.replace(schedule.exam.subject, '').replace('考场', '')
-            if not room_num:
-                room_num = '1'
-            elif room_num[-1].isdigit():
-                room_num = room_num[-1]
-            room_key = int(room_num) if room_num.isdigit() else min(6, max(1, len(schedule.exam.room)))
-            teacher_names = '、'.join(t.name for t in sorted(schedule.teachers, key=lambda x: x.teacher_id))
-            rooms[room_key] = teacher_names
-        
-        # 填充考场列 (1-6)
-        for num in range(1, 7):
-            cell = ws.cell(row=row, column=3 + num)
-            cell.value = rooms.get(num, '')
-            cell.alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
-            cell.border = border
-        
-        row += 1
-    
-    # 设置列宽
-    ws.column_dimensions['A'].width = 12
-    ws.column_dimensions['B'].width = 14
-    ws.column_dimensions['C'].width = 10
-    for i in range(4, 10):
-        ws.column_dimensions[get_column_letter(i)].width = 20
-    
-    # 保存
-    wb.save(filename)
-    
+    write_horizontal(filename, snapshot.schedules)
+
     return send_file(filename, as_attachment=True,
                     download_name=f'排班表_横向考场_{timestamp}.xlsx',
                     mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
@@ -895,29 +1296,58 @@ def export_excel_horizontal(scheduler, timestamp):
 def api_reset():
     """Reset data and schedule"""
     try:
-        reset_scheduler()
+        reset_scheduler(cleared=True)
         return jsonify({'success': True, 'message': 'Reset successful'})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+def parse_args(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description='监考老师排班系统 Web 服务')
+    parser.add_argument('--serve', action='store_true',
+                        help='以生产模式运行（waitress 多线程 WSGI 服务器，不启用调试）')
+    parser.add_argument('--host', default=config.SERVER_HOST, help='监听地址')
+    parser.add_argument('--port', type=int, default=config.SERVER_PORT, help='监听端口')
+    parser.add_argument('--threads', type=int, default=config.SERVE_THREADS, help='--serve 模式的工作线程数')
+    parser.add_argument('--no-browser', action='store_true', help='启动后不自动打开浏览器')
+    return parser.parse_args(argv)
+
+
 if __name__ == '__main__':
+    # 打包后的exe使用并行排班时，子进程需要 freeze_support
+    import multiprocessing
+    multiprocessing.freeze_support()
+
+    args = parse_args()
     init_data_dir()
+    startup.mark('初始化数据')
 
     # 打包后使用debug=False，避免显示调试信息
-    debug_mode = not getattr(sys, 'frozen', False)
+    debug_mode = not getattr(sys, 'frozen', False) and not args.serve
 
-    # 自动打开浏览器
-    import threading
     import webbrowser
-    import time
 
-    def open_browser():
-        # 等待2秒让服务器启动
-        time.sleep(2)
-        webbrowser.open('http://localhost:5000')
+    def open_browser_when_ready():
+        # 端口可以连接后再打开浏览器，并打印启动各阶段耗时
+        if not startup.wait_until_ready(args.host, args.port):
+            return
+        startup.mark('服务就绪')
+        print(startup.report())
+        if not args.no_browser:
+            webbrowser.open(f'http://localhost:{args.port}')
 
-    # 在后台线程中打开浏览器，不阻塞服务器启动
-    threading.Thread(target=open_browser, daemon=True).start()
+    # 在后台线程中等待，不阻塞服务器启动；调试模式的自动重载子进程（WERKZEUG_RUN_MAIN）不重复打开
+    if os.environ.get('WERKZEUG_RUN_MAIN') != 'true':
+        threading.Thread(target=open_browser_when_ready, daemon=True).start()
 
-    app.run(debug=debug_mode, host='0.0.0.0', port=5000)
+    if args.serve:
+        try:
+            from waitress import serve
+        except ImportError:
+            print("生产模式需要 waitress，请先安装: pip install waitress")
+            sys.exit(1)
+        print(f"生产模式: http://{args.host}:{args.port}（{args.threads} 个工作线程）")
+        serve(app, host=args.host, port=args.port, threads=args.threads)
+    else:
+        app.run(debug=debug_mode, host=args.host, port=args.port)
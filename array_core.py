@@ -0,0 +1,109 @@
+"""
+数组化的排班状态
+
+老师和时间段都用整数下标表示：
+- loads: int32 负载向量，老师已监考次数
+- busy: bool 位图，老师 × 时间段 是否已安排监考
+- daily: int32 矩阵，老师 × 日期 的监考次数
+候选筛选和按负载选人都是向量运算，只有在输出结果时才构造数据类对象。
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+import bisect
+import numpy as np
+
+
+class ArrayCore:
+    """老师负载向量 + 老师×时间段占用位图"""
+
+    def __init__(self, teacher_ids: Sequence[str], slots: Sequence[Tuple[str, str]]):
+        # 老师工号 → 下标（工号重复时以最后一个为准，与 teacher_schedules 一致）
+        self.teacher_index: Dict[str, int] = {tid: i for i, tid in enumerate(teacher_ids)}
+        # (日期, 时间段) → 下标，slots 需按时间先后排列
+        self.slot_index: Dict[Tuple[str, str], int] = {key: j for j, key in enumerate(slots)}
+        self.slots: List[Tuple[str, str]] = list(slots)
+
+        dates: Dict[str, int] = {}
+        for date, _ in self.slots:
+            dates.setdefault(date, len(dates))
+        self.dates: List[str] = list(dates)
+        self.slot_day = np.array([dates[date] for date, _ in self.slots], dtype=np.int32)
+
+        n = len(teacher_ids)
+        self.loads = np.zeros(n, dtype=np.int32)
+        self.busy = np.zeros((n, len(self.slots)), dtype=bool)
+        self.daily = np.zeros((n, len(self.dates)), dtype=np.int32)
+        # 已不可用（被删除）的老师，不再参与候选和平衡检查
+        self.excluded = np.zeros(n, dtype=bool)
+        # 工号重复的行视为同一位老师，只有 teacher_index 中的那一行参与排班
+        canonical = np.array([self.teacher_index[tid] for tid in teacher_ids], dtype=np.intp)
+        self.excluded[canonical != np.arange(n)] = True
+
+    @property
+    def n_teachers(self) -> int:
+        return len(self.loads)
+
+    def candidates(self, slot: int, max_daily: Optional[int] = None,
+                   max_consecutive: Optional[int] = None) -> np.ndarray:
+        """返回能在该时间段监考的老师下标：无冲突、未达每日上限、不超过连续场次上限"""
+        mask = ~self.busy[:, slot] & ~self.excluded
+        day = self.slot_day[slot]
+        if max_daily is not None:
+            mask &= self.daily[:, day] < max_daily
+        if max_consecutive is not None:
+            run = np.ones(self.n_teachers, dtype=np.int32)
+            for step in (-1, 1):
+                alive = np.ones(self.n_teachers, dtype=bool)
+                col = slot + step
+                # 最多向两侧各看 max_consecutive 列即可判断是否超限
+                while 0 <= col < len(self.slots) and self.slot_day[col] == day and abs(col - slot) <= max_consecutive:
+                    alive &= self.busy[:, col]
+                    if not alive.any():
+                        break
+                    run += alive
+                    col += step
+            mask &= run <= max_consecutive
+        return np.flatnonzero(mask)
+
+    def order_by_load(self, candidates: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        """按 (监考次数, 随机数) 升序排列候选老师，公平原则：优先选次数少的"""
+        tiebreak = rng.random(len(candidates))
+        return candidates[np.lexsort((tiebreak, self.loads[candidates]))]
+
+    def assign(self, teachers: np.ndarray, slot: int):
+        """记录一批老师在该时间段监考"""
+        self.busy[teachers, slot] = True
+        self.loads[teachers] += 1
+        self.daily[teachers, self.slot_day[slot]] += 1
+
+    def release(self, teachers: np.ndarray, slot: int):
+        """撤销一批老师在该时间段的监考"""
+        self.busy[teachers, slot] = False
+        self.loads[teachers] -= 1
+        self.daily[teachers, self.slot_day[slot]] -= 1
+
+    def exclude(self, teacher: int):
+        """标记老师不可用"""
+        self.excluded[teacher] = True
+
+    def add_slot(self, date: str, time_slot: str) -> int:
+        """按时间顺序插入一个新的时间段（已存在则直接返回下标）"""
+        key = (date, time_slot)
+        if key in self.slot_index:
+            return self.slot_index[key]
+        pos = bisect.bisect(self.slots, key)
+        self.slots.insert(pos, key)
+        self.slot_index = {k: j for j, k in enumerate(self.slots)}
+        self.busy = np.insert(self.busy, pos, False, axis=1)
+        if date not in self.dates:
+            self.dates.append(date)
+            self.daily = np.hstack([self.daily, np.zeros((self.n_teachers, 1), dtype=np.int32)])
+        self.slot_day = np.insert(self.slot_day, pos, self.dates.index(date))
+        return pos
+
+    def load_gap(self) -> Tuple[int, int]:
+        """返回可用老师中的 (最大监考次数, 最小监考次数)"""
+        loads = self.loads[~self.excluded]
+        if not len(loads):
+            return 0, 0
+        return int(loads.max()), int(loads.min())
@@ -41,7 +41,7 @@ def build():
 
     # 步骤2: 安装依赖
     print_step(2, total_steps, "安装打包依赖")
-    packages = ['pyinstaller', 'flask', 'flask-cors', 'pandas', 'openpyxl', 'matplotlib']
+    packages = ['pyinstaller', 'flask', 'flask-cors', 'pandas', 'numpy', 'openpyxl', 'xlsxwriter', 'matplotlib']
     for pkg in packages:
         cmd = [sys.executable, '-m', 'pip', 'install', pkg, '-i', 'https://pypi.tuna.tsinghua.edu.cn/simple']
         result = subprocess.run(cmd, capture_output=True)
@@ -71,6 +71,7 @@ def build():
         '--hidden-import=flask',
         '--hidden-import=openpyxl',
         '--hidden-import=openpyxl.drawing.image',
+        '--hidden-import=xlsxwriter',
         '--hidden-import=matplotlib',
         '--hidden-import=pandas',
         '--distpath', 'dist_release',
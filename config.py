@@ -19,11 +19,45 @@ TEACHERS_FILE = os.path.join(DATA_DIR, "teachers.xlsx")
 EXAMS_FILE = os.path.join(DATA_DIR, "exams.xlsx")
 SCHEDULE_FILE = os.path.join(DATA_DIR, "schedule.xlsx")
 CONFIG_FILE = os.path.join(DATA_DIR, "config.xlsx")
+# 主存储（SQLite），上面的 xlsx 文件用于导入/导出
+DB_FILE = os.path.join(DATA_DIR, "scheduler.db")
 
 # 默认排班配置
 DEFAULT_MAX_EXAMS_PER_DAY = 3
 DEFAULT_MAX_CONSECUTIVE_EXAMS = 2
 DEFAULT_TIME_SLOTS = ["08:30-10:30", "10:45-12:45", "14:00-16:00", "16:15-18:15"]
 
+# 排班算法：greedy 按时间顺序贪心分配，flow 用最小费用流求全局均衡分配
+ENGINES = ("greedy", "flow")
+DEFAULT_ENGINE = "greedy"
+
+# flow 算法按天并行求解（配置项“并行进程数”大于1）时，监考名额总数（每场人数 × 考场数之和）
+# 达到该值才启用进程池；更小的规模下串行求解更快
+PARALLEL_MIN_SEATS = 20000
+
+# 排班结果缓存：内存中最多保留的结果数；磁盘缓存目录，设为 None 时只用内存缓存
+RESULT_CACHE_SIZE = 8
+RESULT_CACHE_DIR = os.path.join(DATA_DIR, "cache")
+# 磁盘缓存最多保留的结果文件数，超过时删除最久未使用的
+RESULT_CACHE_DISK_SIZE = 64
+
+# 数据库中最多保留的排班批次数，超过时删除最旧的批次（当前发布的批次总是保留）；设为 None 时全部保留
+SCHEDULE_RUNS_KEEP = 50
+
+# 后台任务线程数（异步排班）
+JOB_WORKERS = 2
+
+# 列表接口分页时每页最多返回的条数（limit 超过时按此值截断）
+API_MAX_PAGE_SIZE = 1000
+
+# JSON 响应超过该字节数且客户端支持时用 gzip 压缩；压缩级别 1-9
+GZIP_MIN_SIZE = 1024
+GZIP_LEVEL = 6
+
+# Web 服务监听地址和端口；--serve 生产模式（waitress）的默认工作线程数
+SERVER_HOST = "0.0.0.0"
+SERVER_PORT = 5000
+SERVE_THREADS = 16
+
 # Excel 导出配置
 EXPORT_ENCODING = "utf-8-sig"
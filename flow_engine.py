@@ -0,0 +1,285 @@
+"""
+最小最大负载排班引擎（最小费用流）
+
+把排班建模为 源点 → 老师 → 时间段 → 汇点 的网络：
+- 老师 → 时间段 容量为1（同一时间段只能监考一个考场）
+- 时间段 → 汇点 容量为该时间段需要的老师总数
+- 源点 → 老师 的费用为凸函数（第k次监考费用 2k-1，即总费用为监考次数的平方和）
+
+先用贪心得到初始分配，再沿增广路径补足人数不足的时间段，最后在残量网络上反复寻找负费用环并消去：
+若存在路径 老师u → 时间段 → 老师v（u 让出该时间段给 v，中间老师负载不变），
+且 u 的负载比 v 至少多 2，则沿路径转移一次监考即可降低总费用。
+没有每日/连续限制时，找不到这样的路径即说明负载分配全局最均衡。
+
+每日监考次数和连续监考场次限制作为老师接收时间段的附加条件，
+路径上的老师按转移前的状态检查（只会更保守），因此结果始终满足限制。
+
+有这两项限制时网络不再是纯粹的流网络，贪心初始解不一定是最大流（例如当天前面的时间段用满了老师的上限，
+后面的时间段就分不到人）。增广阶段从人数不足的时间段出发，寻找链式调整：老师 y 接手该时间段，
+为此让出同一天的另一个时间段，再由别的老师接手……直到某位老师可以直接接手。
+路径上每位老师最多让出一个时间段，末端的接收者按其在本路径上调整后的状态检查，所以整条路径执行后仍满足限制。
+找不到这样的路径时停止。这是局部搜索：在限制下不保证达到全局最多的监考人数，
+消去负费用环后也不保证全局最均衡。
+"""
+
+from collections import deque
+from typing import Dict, List, Optional, Sequence, Tuple
+import heapq
+import random
+
+
+def solve_balanced_assignment(slot_available: Sequence[Sequence[int]],
+                              slot_demand: Sequence[int],
+                              n_teachers: int,
+                              rng: random.Random,
+                              loads: Optional[List[int]] = None,
+                              slot_day: Optional[Sequence[int]] = None,
+                              max_daily: Optional[int] = None,
+                              max_consecutive: Optional[int] = None,
+                              slot_minimum: Optional[Sequence[int]] = None) -> List[List[int]]:
+    """
+    求解均衡分配
+
+    slot_available: 每个时间段可用的老师下标（时间段按时间先后排列）
+    slot_demand: 每个时间段需要的老师数
+    loads: 老师已有的监考次数（会被原地更新），默认全为0
+    slot_day: 每个时间段所在日期的序号，相邻且同一天的时间段视为连续
+    max_daily / max_consecutive: 每天最多监考次数 / 连续监考最多场次，None 表示不限制
+    slot_minimum: 每个时间段优先保证的人数（如每个考场一位）。老师不够时先让各时间段都达到它，
+                  再补足 slot_demand，避免前面的时间段用满老师的上限、后面的时间段一个人都分不到
+    返回每个时间段分配到的老师下标列表
+    """
+    state = _FlowState(slot_available, n_teachers, loads, slot_day, max_daily, max_consecutive)
+    stages = [slot_demand]
+    if slot_minimum is not None:
+        stages.insert(0, [min(m, d) for m, d in zip(slot_minimum, slot_demand)])
+
+    for demand in stages:
+        # 1. 贪心：每个时间段选负载最小的老师
+        for s, available in enumerate(slot_available):
+            candidates = [t for t in available if t not in state.assigned[s] and state.can_take(t, s)]
+            k = min(demand[s] - len(state.assigned[s]), len(candidates))
+            chosen = heapq.nsmallest(k, candidates, key=lambda t: (state.loads[t], rng.random()))
+            for t in chosen:
+                state.take(t, s)
+
+        # 2. 沿增广路径补足人数不足的时间段（监考人数只增不减）
+        state.augment(demand)
+
+    # 3. 消去负费用环，直到不存在可改进路径（各时间段人数不变）
+    state.improve()
+    return state.result()
+
+
+def rebalance_assignment(slot_available: Sequence[Sequence[int]],
+                         assigned: Sequence[Sequence[int]],
+                         n_teachers: int,
+                         slot_day: Optional[Sequence[int]] = None,
+                         max_daily: Optional[int] = None,
+                         max_consecutive: Optional[int] = None) -> List[List[int]]:
+    """在已有的可行分配上消去负费用环（用于合并分块求解的结果），参数含义同 solve_balanced_assignment"""
+    state = _FlowState(slot_available, n_teachers, None, slot_day, max_daily, max_consecutive)
+    for s, teachers in enumerate(assigned):
+        for t in teachers:
+            state.take(t, s)
+    state.improve()
+    return state.result()
+
+
+def augment_assignment(slot_available: Sequence[Sequence[int]],
+                       assigned: Sequence[Sequence[int]],
+                       slot_demand: Sequence[int],
+                       n_teachers: int,
+                       slot_day: Optional[Sequence[int]] = None,
+                       max_daily: Optional[int] = None,
+                       max_consecutive: Optional[int] = None,
+                       slot_minimum: Optional[Sequence[int]] = None) -> List[List[int]]:
+    """
+    在已有的可行分配上沿增广路径补足人数不足的时间段（先补到 slot_minimum，再补到 slot_demand），
+    不做负载均衡（用于贪心引擎），参数含义同 solve_balanced_assignment
+    """
+    state = _FlowState(slot_available, n_teachers, None, slot_day, max_daily, max_consecutive)
+    for s, teachers in enumerate(assigned):
+        for t in teachers:
+            state.take(t, s)
+    if slot_minimum is not None:
+        state.augment([min(m, d) for m, d in zip(slot_minimum, slot_demand)])
+    state.augment(slot_demand)
+    return state.result()
+
+
+def solve_partition(task: Tuple) -> List[List[int]]:
+    """
+    进程池任务：独立求解一个分块（如一天）内的时间段，参数依次同 solve_balanced_assignment（不含 loads），
+    rng 以种子传入
+    """
+    slot_available, slot_demand, n_teachers, seed, slot_day, max_daily, max_consecutive, slot_minimum = task
+    return solve_balanced_assignment(slot_available, slot_demand, n_teachers, random.Random(seed),
+                                     slot_day=slot_day, max_daily=max_daily, max_consecutive=max_consecutive,
+                                     slot_minimum=slot_minimum)
+
+
+class _FlowState:
+    """残量网络状态：每个时间段的已分配老师、每个老师的时间段、负载和每日次数"""
+
+    def __init__(self, slot_available: Sequence[Sequence[int]], n_teachers: int,
+                 loads: Optional[List[int]], slot_day: Optional[Sequence[int]],
+                 max_daily: Optional[int], max_consecutive: Optional[int]):
+        self.slot_available = slot_available
+        self.loads = loads if loads is not None else [0] * n_teachers
+        self.slot_day = slot_day if slot_day is not None else list(range(len(slot_available)))
+        self.max_daily = max_daily
+        self.max_consecutive = max_consecutive
+        # 每个时间段已分配的老师（dict 保持插入顺序，结果可复现）
+        self.assigned: List[Dict[int, None]] = [{} for _ in slot_available]
+        self.teacher_slots: List[Dict[int, None]] = [{} for _ in range(n_teachers)]
+        self.daily: List[Dict[int, int]] = [{} for _ in range(n_teachers)]
+
+    def can_take(self, t: int, s: int, released: Optional[int] = None, added: Optional[int] = None) -> bool:
+        """老师 t 能否接收时间段 s；released / added 为同时让出 / 已接收的时间段（按调整后的状态检查）"""
+        slot_day = self.slot_day
+        day = slot_day[s]
+        if self.max_daily is not None:
+            daily = self.daily[t].get(day, 0)
+            if released is not None and slot_day[released] == day:
+                daily -= 1
+            if added is not None and slot_day[added] == day:
+                daily += 1
+            if daily >= self.max_daily:
+                return False
+        if self.max_consecutive is not None:
+            held = self.teacher_slots[t]
+            count = 1
+            i = s - 1
+            while i >= 0 and slot_day[i] == day and (i == added or i in held and i != released):
+                count += 1
+                i -= 1
+            i = s + 1
+            while i < len(slot_day) and slot_day[i] == day and (i == added or i in held and i != released):
+                count += 1
+                i += 1
+            if count > self.max_consecutive:
+                return False
+        return True
+
+    def take(self, t: int, s: int):
+        self.assigned[s][t] = None
+        self.teacher_slots[t][s] = None
+        day = self.slot_day[s]
+        self.daily[t][day] = self.daily[t].get(day, 0) + 1
+        self.loads[t] += 1
+
+    def give(self, t: int, s: int):
+        del self.assigned[s][t]
+        del self.teacher_slots[t][s]
+        self.daily[t][self.slot_day[s]] -= 1
+        self.loads[t] -= 1
+
+    def augment(self, slot_demand: Sequence[int]):
+        """沿增广路径为人数不足的时间段补人，直到各时间段都找不到增广路径"""
+        for s, demand in enumerate(slot_demand):
+            while len(self.assigned[s]) < demand:
+                path = self._find_augmenting_path(s)
+                if path is None:
+                    break
+                taker, slot = path[0]
+                self.take(taker, slot)
+                for t, gives, takes in path[1:]:
+                    self.give(t, gives)
+                    self.take(t, takes)
+
+    def improve(self):
+        """消去负费用环，直到不存在可改进路径"""
+        while True:
+            path = self._find_improving_path()
+            if path is None:
+                break
+            for giver, s, taker in path:
+                self.give(giver, s)
+                self.take(taker, s)
+
+    def result(self) -> List[List[int]]:
+        return [list(a) for a in self.assigned]
+
+    def _find_improving_path(self) -> Optional[List[Tuple[int, int, int]]]:
+        """从高负载老师出发广度优先搜索，找到负载至少低2的老师则返回路径 [(让出者, 时间段, 接收者), ...]"""
+        loads = self.loads
+        busy = [t for t in range(len(loads)) if self.teacher_slots[t]]
+        if not busy:
+            return None
+        max_load = max(loads[t] for t in busy)
+        min_load = min(loads)
+
+        for level in range(max_load, min_load + 1, -1):
+            parent: Dict[int, Optional[Tuple[int, int]]] = {t: None for t in busy if loads[t] >= level}
+            queue = deque(parent)
+            visited_slots = set()
+            while queue:
+                x = queue.popleft()
+                for s in self.teacher_slots[x]:
+                    if s in visited_slots:
+                        continue
+                    visited_slots.add(s)
+                    for y in self.slot_available[s]:
+                        if y in parent or y in self.assigned[s]:
+                            continue
+                        if not self.can_take(y, s):
+                            continue
+                        parent[y] = (x, s)
+                        if loads[y] <= level - 2:
+                            return _trace_path(parent, y)
+                        queue.append(y)
+        return None
+
+    def _find_augmenting_path(self, start: int) -> Optional[List[Tuple]]:
+        """
+        从缺人的时间段出发广度优先搜索：老师能直接接收则结束，否则看让出同一天的哪个时间段后能接收，
+        再为让出的时间段找人。返回 [(接收者, 时间段), (老师, 让出的时间段, 接收的时间段), ...]，
+        按执行顺序排列（先补最后让出的时间段）
+
+        让出过时间段的老师不再让出别的时间段，但可以作为路径末端的接收者（按其在本路径上调整后的状态检查）
+        """
+        # 时间段 → (让出它的老师, 该老师接收的时间段)
+        parent: Dict[int, Optional[Tuple[int, int]]] = {start: None}
+        used = set()
+        queue = deque([start])
+        while queue:
+            q = queue.popleft()
+            # 本路径上已做的调整：老师 → (让出的时间段, 接收的时间段)
+            moves = {}
+            r = q
+            while parent[r] is not None:
+                t, takes = parent[r]
+                moves[t] = (r, takes)
+                r = takes
+            for y in self.slot_available[q]:
+                if y in self.assigned[q]:
+                    continue
+                if self.can_take(y, q, *moves.get(y, (None, None))):
+                    path: List[Tuple] = [(y, q)]
+                    while parent[q] is not None:
+                        t, takes = parent[q]
+                        path.append((t, q, takes))
+                        q = takes
+                    return path
+                if y in used:
+                    continue
+                for released in self.teacher_slots[y]:
+                    if released in parent or self.slot_day[released] != self.slot_day[q]:
+                        continue
+                    if self.can_take(y, q, released):
+                        parent[released] = (y, q)
+                        used.add(y)
+                        queue.append(released)
+        return None
+
+
+def _trace_path(parent: Dict[int, Optional[Tuple[int, int]]], target: int) -> List[Tuple[int, int, int]]:
+    path = []
+    y = target
+    while parent[y] is not None:
+        x, s = parent[y]
+        path.append((x, s, y))
+        y = x
+    path.reverse()
+    return path
@@ -0,0 +1,139 @@
+"""
+后台任务
+
+排班等耗时操作提交到线程池执行，立即返回任务编号；
+通过任务编号查询状态、已完成的时间段百分比和预计剩余时间，或请求取消。
+"""
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+# 任务状态
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+
+class Job:
+    """一个后台任务的状态，进度由任务函数通过 update() 汇报"""
+
+    def __init__(self, job_id: str, kind: str):
+        self.job_id = job_id
+        self.kind = kind
+        self.status = QUEUED
+        self.done = 0
+        self.total = 0
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.result: Any = None
+        self.error: Optional[str] = None
+        # 任务函数在检查点查看该事件，已设置时尽快停止
+        self.cancel_event = threading.Event()
+
+    def update(self, done: int, total: int):
+        self.done = done
+        self.total = total
+
+    @property
+    def percent(self) -> float:
+        if self.status == DONE:
+            return 100.0
+        return round(100.0 * self.done / self.total, 1) if self.total else 0.0
+
+    @property
+    def eta(self) -> Optional[float]:
+        """按已完成部分的平均速度估算剩余秒数，尚无进度时返回 None"""
+        if self.status != RUNNING or not self.done or not self.total:
+            return None
+        elapsed = time.time() - self.started_at
+        return round(elapsed / self.done * (self.total - self.done), 2)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'job_id': self.job_id,
+            'kind': self.kind,
+            'status': self.status,
+            'done': self.done,
+            'total': self.total,
+            'percent': self.percent,
+            'eta_seconds': self.eta,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'result': self.result,
+            'error': self.error
+        }
+
+
+class JobCancelled(Exception):
+    """任务被取消"""
+
+
+class JobManager:
+    """线程池 + 任务表，只保留最近 history 个任务"""
+
+    def __init__(self, max_workers: int = 2, history: int = 100):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._futures = {}
+        self._history = history
+        self._lock = threading.Lock()
+
+    def submit(self, kind: str, func: Callable[[Job], Any]) -> Job:
+        """提交任务，func 接收 Job 对象，返回值作为任务结果；抛出 JobCancelled 表示已取消"""
+        job = Job(uuid.uuid4().hex, kind)
+        with self._lock:
+            self._jobs[job.job_id] = job
+            self._prune()
+            self._futures[job.job_id] = self._executor.submit(self._run, job, func)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """请求取消：排队中的任务直接取消，运行中的任务在下一个检查点停止"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            job.cancel_event.set()
+            future = self._futures.get(job_id)
+            if job.status == QUEUED and future is not None and future.cancel():
+                job.status = CANCELLED
+                job.finished_at = time.time()
+        return job
+
+    def _run(self, job: Job, func: Callable[[Job], Any]):
+        if job.cancel_event.is_set():
+            job.status = CANCELLED
+            job.finished_at = time.time()
+            return
+        job.status = RUNNING
+        job.started_at = time.time()
+        try:
+            job.result = func(job)
+            job.status = DONE
+        except JobCancelled:
+            job.status = CANCELLED
+        except Exception as e:
+            job.error = str(e)
+            job.status = FAILED
+        finally:
+            job.finished_at = time.time()
+            with self._lock:
+                self._futures.pop(job.job_id, None)
+
+    def _prune(self):
+        """超过保留数量时丢弃最早的已结束任务"""
+        finished = [job_id for job_id, job in self._jobs.items() if job.status in (DONE, FAILED, CANCELLED)]
+        for job_id in finished[:max(0, len(self._jobs) - self._history)]:
+            del self._jobs[job_id]
@@ -1,10 +1,12 @@
 # 主程序
 # =====
 
+import logging
+
 from models import Teacher, Exam
 from scheduler import ExamScheduler
 from utils import (
-    init_data_dir, load_teachers, load_exams,
+    init_data_dir, load_teachers, load_exams, load_config,
     export_schedule, export_schedule_by_date,
     print_schedule, print_statistics
 )
@@ -12,6 +14,9 @@ from utils import (
 
 def main():
     """主函数"""
+    # 命令行版本在控制台显示每个时间段的排班概况
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
     print("=" * 80)
     print("监考老师排班系统")
     print("=" * 80)
@@ -30,7 +35,7 @@ def main():
         return
 
     # 创建排班器
-    scheduler = ExamScheduler(teachers, exams)
+    scheduler = ExamScheduler(teachers, exams, load_config())
 
     while True:
         print("\n" + "=" * 80)
@@ -67,7 +72,7 @@ def main():
             reload_data()
             teachers = load_teachers()
             exams = load_exams()
-            scheduler = ExamScheduler(teachers, exams)
+            scheduler = ExamScheduler(teachers, exams, load_config())
         elif choice == '0':
             print("\n感谢使用，再见！")
             break
@@ -2,8 +2,8 @@
 数据模型
 """
 
-from dataclasses import dataclass
-from typing import List, Optional
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
 from datetime import datetime
 
 
@@ -63,33 +63,56 @@ class TeacherSchedule:
     """老师排班表"""
     teacher: Teacher
     schedules: List[Schedule]
+    # 占用索引：(日期, 时间段) 集合及每日监考次数，随 add_schedule 增量维护
+    _slot_keys: Set[Tuple[str, str]] = field(default_factory=set, init=False, repr=False)
+    _daily_counts: Dict[str, int] = field(default_factory=dict, init=False, repr=False)
+
+    def __post_init__(self):
+        for schedule in self.schedules:
+            self._index(schedule)
+
+    def _index(self, schedule: Schedule):
+        self._slot_keys.add((schedule.exam.date, schedule.exam.time_slot))
+        self._daily_counts[schedule.exam.date] = self._daily_counts.get(schedule.exam.date, 0) + 1
+
+    def add_schedule(self, schedule: Schedule):
+        """添加排班并更新占用索引"""
+        self.schedules.append(schedule)
+        self._index(schedule)
 
     def has_conflict(self, exam: Exam) -> bool:
         """检查时间冲突"""
-        for schedule in self.schedules:
-            if (schedule.exam.date == exam.date and
-                schedule.exam.time_slot == exam.time_slot):
-                return True
-        return False
+        return (exam.date, exam.time_slot) in self._slot_keys
 
     def has_conflict_by_time(self, date: str, time_slot: str) -> bool:
         """检查指定时间是否有冲突"""
-        for schedule in self.schedules:
-            if schedule.exam.date == date and schedule.exam.time_slot == time_slot:
-                return True
-        return False
+        return (date, time_slot) in self._slot_keys
 
     def get_daily_exam_count(self, date: str) -> int:
         """获取当天监考次数"""
-        return len([s for s in self.schedules if s.exam.date == date])
-
-    def get_consecutive_count(self, exam: Exam) -> int:
-        """获取连续监考次数"""
-        sorted_schedules = sorted(self.schedules, key=lambda x: x.exam.date)
-        count = 0
-        for schedule in sorted_schedules:
-            if schedule.exam.date == exam.date:
-                count += 1
-            else:
-                count = 0
+        return self._daily_counts.get(date, 0)
+
+    def get_consecutive_count(self, exam: Exam, day_slots: Optional[List[str]] = None) -> int:
+        """获取安排该考试后所在的连续监考场次数"""
+        return self.get_consecutive_count_by_time(exam.date, exam.time_slot, day_slots)
+
+    def get_consecutive_count_by_time(self, date: str, time_slot: str,
+                                      day_slots: Optional[List[str]] = None) -> int:
+        """
+        获取在指定时间监考后所在的连续监考场次数
+
+        day_slots 为当天按时间排序的全部时间段；未提供时按老师当天已有的时间段计算
+        """
+        if day_slots is None or time_slot not in day_slots:
+            day_slots = sorted({ts for d, ts in self._slot_keys if d == date} | {time_slot})
+        pos = day_slots.index(time_slot)
+        count = 1
+        i = pos - 1
+        while i >= 0 and (date, day_slots[i]) in self._slot_keys:
+            count += 1
+            i -= 1
+        i = pos + 1
+        while i < len(day_slots) and (date, day_slots[i]) in self._slot_keys:
+            count += 1
+            i += 1
         return count
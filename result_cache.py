@@ -0,0 +1,106 @@
+"""
+排班结果缓存
+
+以 (老师, 考试, 配置, 随机种子, 排班算法) 的哈希为键，输入相同直接返回上次的结果。
+内存层按最近最少使用（LRU）淘汰；指定目录时再加一层磁盘缓存（每个键一个 pickle 文件），
+内存中被淘汰或服务重启后仍可命中。磁盘层同样有数量上限，按文件修改时间（命中时刷新）淘汰。
+"""
+
+import hashlib
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from typing import Any, Optional
+
+# 缓存格式版本：排班算法或缓存内容的结构变化时加一，旧版本写入的结果不会再被命中（也不会被反序列化）
+CACHE_VERSION = 2
+
+
+def cache_key(fingerprint: str, seed: Optional[int], engine: Optional[str]) -> str:
+    """输入指纹（见 utils.input_fingerprint）加上种子、算法和缓存格式版本得到缓存键"""
+    return hashlib.sha256(f"v{CACHE_VERSION}|{fingerprint}|{seed}|{engine}".encode('utf-8')).hexdigest()
+
+
+class ResultCache:
+    """内存 LRU + 可选磁盘层的结果缓存，线程安全"""
+
+    def __init__(self, capacity: int = 8, disk_dir: Optional[str] = None, disk_capacity: int = 64):
+        self.capacity = capacity
+        self.disk_dir = disk_dir
+        self.disk_capacity = disk_capacity
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+        value = self._read_disk(key)
+        if value is not None:
+            self._remember(key, value)
+        return value
+
+    def put(self, key: str, value: Any):
+        self._remember(key, value)
+        self._write_disk(key, value)
+
+    def clear(self):
+        """清空内存层（磁盘层按内容寻址，不会过期，保留）"""
+        with self._lock:
+            self._entries.clear()
+
+    def _remember(self, key: str, value: Any):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.pkl")
+
+    def _read_disk(self, key: str) -> Optional[Any]:
+        if not self.disk_dir:
+            return None
+        try:
+            with open(self._path(key), 'rb') as f:
+                value = pickle.load(f)
+            # 刷新修改时间，磁盘层据此按最近使用淘汰
+            os.utime(self._path(key))
+            return value
+        except FileNotFoundError:
+            return None
+        except (OSError, pickle.UnpicklingError, EOFError):
+            # 文件损坏时当作未命中
+            return None
+
+    def _write_disk(self, key: str, value: Any):
+        if not self.disk_dir:
+            return
+        os.makedirs(self.disk_dir, exist_ok=True)
+        # 先写临时文件再替换，避免并发读取到写了一半的文件
+        tmp_path = f"{self._path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self._path(key))
+        self._prune_disk()
+
+    def _prune_disk(self):
+        """磁盘层超过上限时删除最久未使用的文件"""
+        entries = []
+        with os.scandir(self.disk_dir) as it:
+            for entry in it:
+                if entry.name.endswith('.pkl'):
+                    try:
+                        entries.append((entry.stat().st_mtime, entry.path))
+                    except FileNotFoundError:
+                        pass
+        entries.sort()
+        for _, path in entries[:max(0, len(entries) - self.disk_capacity)]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                # 其他进程已删除
+                pass
@@ -0,0 +1,215 @@
+"""
+增量维护的排班统计
+
+排班、恢复和增量修复在增删排班或老师时同步更新这里的聚合数据，
+get_statistics() 只需按当前状态组装结果，不再重新去重考试、遍历全部排班：
+- 每个老师的监考次数和监考列表（按日期、时间段排列）
+- 每天的排班数和监考老师
+- 监考次数直方图（次数 → 老师数），由此得到最大/最小次数、标准差和基尼系数
+- 每个时间段需要和已安排的监考人数、人数不足的考场数，用于报告监考老师不足
+"""
+
+import bisect
+import itertools
+import math
+from typing import Any, Dict, List, Sequence, Tuple
+from models import Exam, Schedule, Teacher
+
+
+class ScheduleStats:
+    """一次排班结果的统计聚合，只统计仍可用（未被排除）的老师"""
+
+    def __init__(self, teachers: Sequence[Teacher], exams: Sequence[Exam]):
+        # 总考试数：去重后各考试的考场数之和；(日期, 时间段) → 需要的监考人数。考试变化时由调度器调用 set_exams 更新
+        self.total_exams = 0
+        self._required: Dict[Tuple[str, str], int] = {}
+        self.set_exams(exams)
+        self.scheduled = 0
+        # (日期, 时间段) → 已安排的监考人数
+        self._assigned: Dict[Tuple[str, str], int] = {}
+        # 排班对象 id → 已安排人数；已安排但人数不足的考场数
+        self._staff: Dict[int, int] = {}
+        self.understaffed = 0
+        # 工号 → 老师，保持老师原顺序（工号重复时以最后一个为准，与 teacher_schedules 一致）
+        self._teachers: Dict[str, Teacher] = {t.teacher_id: t for t in teachers}
+        self._loads: Dict[str, int] = dict.fromkeys(self._teachers, 0)
+        # 工号 → [(日期, 时间段, 序号, 排班对象 id, 监考信息)]，按日期、时间段有序
+        self._exams: Dict[str, List[Tuple[str, str, int, int, Dict[str, str]]]] = {tid: [] for tid in self._teachers}
+        # 日期 → 排班数 / 姓名 → 当天监考场次（姓名相同的老师合并）
+        self._date_counts: Dict[str, int] = {}
+        self._date_names: Dict[str, Dict[str, int]] = {}
+        # 监考次数 → 老师数；次数之和与平方和
+        self._histogram: Dict[int, int] = {0: len(self._teachers)} if self._teachers else {}
+        self._sum = 0
+        self._sum_sq = 0
+        self._seq = itertools.count()
+
+    # ============ 更新 ============
+
+    def set_exams(self, exams: Sequence[Exam]):
+        """设置（去重后的）全部考试"""
+        self.total_exams = sum(exam.rooms_count for exam in exams)
+        self._required = {}
+        for exam in exams:
+            key = (exam.date, exam.time_slot)
+            self._required[key] = self._required.get(key, 0) + exam.rooms_count * exam.required_teachers
+
+    def add_schedule(self, schedule: Schedule):
+        """新增一条排班（连同其中的老师）"""
+        date = schedule.exam.date
+        self.scheduled += 1
+        self._staff[id(schedule)] = 0
+        if schedule.exam.required_teachers > 0:
+            self.understaffed += 1
+        self._date_counts[date] = self._date_counts.get(date, 0) + 1
+        for teacher in schedule.teachers:
+            self.add_teacher(schedule, teacher)
+
+    def remove_schedule(self, schedule: Schedule):
+        """移除一条排班（连同其中的老师）"""
+        for teacher in schedule.teachers:
+            self.remove_teacher(schedule, teacher)
+        date = schedule.exam.date
+        self.scheduled -= 1
+        if self._staff.pop(id(schedule)) < schedule.exam.required_teachers:
+            self.understaffed -= 1
+        self._date_counts[date] -= 1
+        if not self._date_counts[date]:
+            del self._date_counts[date]
+
+    def add_teacher(self, schedule: Schedule, teacher: Teacher):
+        """已有排班中加入一位老师"""
+        exam = schedule.exam
+        tid = teacher.teacher_id
+        if tid in self._loads:
+            bisect.insort(self._exams[tid], (exam.date, exam.time_slot, next(self._seq), id(schedule), {
+                'exam_name': exam.exam_name,
+                'subject': exam.subject,
+                'date': exam.date,
+                'time_slot': exam.time_slot,
+                'room': exam.room
+            }))
+            self._move(tid, 1)
+        self._staffing(schedule, 1)
+        names = self._date_names.setdefault(exam.date, {})
+        names[teacher.name] = names.get(teacher.name, 0) + 1
+
+    def remove_teacher(self, schedule: Schedule, teacher: Teacher):
+        """已有排班中去掉一位老师"""
+        exam = schedule.exam
+        tid = teacher.teacher_id
+        if tid in self._loads:
+            entries = self._exams[tid]
+            for i, entry in enumerate(entries):
+                if entry[3] == id(schedule):
+                    del entries[i]
+                    self._move(tid, -1)
+                    break
+        self._staffing(schedule, -1)
+        names = self._date_names[exam.date]
+        names[teacher.name] -= 1
+        if not names[teacher.name]:
+            del names[teacher.name]
+            if not names:
+                del self._date_names[exam.date]
+
+    def exclude(self, teacher_id: str):
+        """老师不可用：不再出现在老师统计和公平性指标中（调用前应已移除其全部监考）"""
+        if teacher_id not in self._loads:
+            return
+        load = self._loads.pop(teacher_id)
+        self._count(load, -1)
+        self._sum -= load
+        self._sum_sq -= load * load
+        del self._teachers[teacher_id]
+        del self._exams[teacher_id]
+
+    def _staffing(self, schedule: Schedule, delta: int):
+        """排班的监考人数变化 delta，同步时间段人数和人数不足的考场数"""
+        key = (schedule.exam.date, schedule.exam.time_slot)
+        self._assigned[key] = self._assigned.get(key, 0) + delta
+        required = schedule.exam.required_teachers
+        count = self._staff[id(schedule)]
+        self._staff[id(schedule)] = count + delta
+        self.understaffed += (count + delta < required) - (count < required)
+
+    def _move(self, teacher_id: str, delta: int):
+        load = self._loads[teacher_id]
+        self._count(load, -1)
+        self._count(load + delta, 1)
+        self._loads[teacher_id] = load + delta
+        self._sum += delta
+        self._sum_sq += (load + delta) ** 2 - load * load
+
+    def _count(self, load: int, delta: int):
+        count = self._histogram.get(load, 0) + delta
+        if count:
+            self._histogram[load] = count
+        else:
+            del self._histogram[load]
+
+    # ============ 查询 ============
+
+    def shortfall(self) -> List[Dict[str, Any]]:
+        """监考老师不足的时间段：[{'date', 'time_slot', 'required', 'assigned'}]，按时间排列"""
+        return [{'date': date, 'time_slot': time_slot, 'required': required,
+                 'assigned': self._assigned.get((date, time_slot), 0)}
+                for (date, time_slot), required in sorted(self._required.items())
+                if self._assigned.get((date, time_slot), 0) < required]
+
+    def fairness(self) -> Dict[str, float]:
+        """监考次数的分布：最大/最小/差值、平均值、标准差和基尼系数（0 表示完全均衡）"""
+        n = len(self._loads)
+        if not n:
+            return {'max': 0, 'min': 0, 'gap': 0, 'mean': 0.0, 'stddev': 0.0, 'gini': 0.0}
+        mean = self._sum / n
+        stddev = math.sqrt(max(self._sum_sq / n - mean * mean, 0.0))
+
+        # 基尼系数 = 2·Σ(i·x_i) / (n·Σx) − (n+1)/n，x 升序、i 从 1 开始；同一次数的老师占据连续名次
+        gini = 0.0
+        if self._sum:
+            rank = 0
+            weighted = 0
+            for load in sorted(self._histogram):
+                count = self._histogram[load]
+                weighted += load * (count * rank + count * (count + 1) // 2)
+                rank += count
+            gini = 2 * weighted / (n * self._sum) - (n + 1) / n
+
+        highest = max(self._histogram)
+        lowest = min(self._histogram)
+        return {
+            'max': highest,
+            'min': lowest,
+            'gap': highest - lowest,
+            'mean': round(mean, 4),
+            'stddev': round(stddev, 4),
+            'gini': round(gini, 4)
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        """组装统计结果：列表和字典每次新建，单条监考信息（exams 中的字典）创建后不再修改，直接共享"""
+        # 按监考次数降序，次数相同保持老师原顺序（sorted 是稳定排序）
+        teacher_ids = sorted(self._teachers, key=lambda tid: -self._loads[tid])
+        teacher_stats = [{
+            'teacher_id': tid,
+            'name': self._teachers[tid].name,
+            'exam_count': self._loads[tid],
+            'exams': [entry[4] for entry in self._exams[tid]]
+        } for tid in teacher_ids]
+
+        date_stats = {
+            date: {'count': self._date_counts[date], 'teachers': sorted(self._date_names.get(date, ()))}
+            for date in sorted(self._date_counts)
+        }
+
+        return {
+            'total_exams': self.total_exams,
+            'scheduled_exams': self.scheduled,
+            'unscheduled_exams': self.total_exams - self.scheduled,
+            'understaffed_exams': self.understaffed,
+            'shortfall': self.shortfall(),
+            'teacher_stats': teacher_stats,
+            'date_stats': date_stats,
+            'fairness': self.fairness()
+        }
@@ -3,33 +3,105 @@
 """
 
 from models import Teacher, Exam, Schedule, TeacherSchedule
-from typing import List, Dict, Set, Tuple, Optional
+from array_core import ArrayCore
+from concurrent.futures import ProcessPoolExecutor
+from flow_engine import augment_assignment, rebalance_assignment, solve_balanced_assignment, solve_partition
+from schedule_stats import ScheduleStats
+from tracing import capture, parse_level
+import config as app_config
+from typing import Any, Callable, List, Dict, Set, Tuple, Optional, Sequence, Union
+import logging
+import os
 import random
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class ScheduleCancelled(Exception):
+    """排班被取消"""
 
 
 class ExamScheduler:
     """考试排班系统"""
 
-    def __init__(self, teachers: List[Teacher], exams: List[Exam], config: Optional[Dict] = None):
+    def __init__(self, teachers: List[Teacher], exams: List[Exam], config: Optional[Dict] = None,
+                 seed: Optional[int] = None, trace_level: Union[int, str, None] = None,
+                 engine: Optional[str] = None, workers: Optional[int] = None):
         self.teachers = teachers
         self.exams = exams
         self.config = config or {}
+        # 随机种子：指定后同样的输入得到完全相同的排班结果
+        self.seed = seed
+        self._rng = random.Random(seed)
+        # 跟踪级别：指定后本次排班的日志会收集到 self.trace 中
+        self.trace_level = parse_level(trace_level)
+        self.trace: List[Dict] = []
+        # 排班算法：greedy（按时间顺序贪心）或 flow（最小费用流全局均衡）
+        self.engine = self._resolve_engine(engine)
+        # 每天最多监考次数 / 连续监考最多场次，未配置或不大于0时不限制
+        self.max_daily = self._read_limit('每个老师每天最多监考次数')
+        self.max_consecutive = self._read_limit('连续监考最多场次')
+        # 并行进程数：大于1时按天分块、每块用最小费用流并行求解，只适用于 flow 算法
+        self.workers = workers if workers is not None else (self._read_limit('并行进程数') or 1)
+        if self.workers > 1 and self.engine != 'flow':
+            raise ValueError(f"并行排班（并行进程数 {self.workers}）只支持 flow 算法，当前算法: {self.engine}")
+        # 数组化排班状态，schedule() 时按本次的老师和时间段创建
+        self._core: Optional[ArrayCore] = None
+        self._np_rng = np.random.default_rng(self._rng.getrandbits(64))
+        # 原始考试编号 → 该考试各考场的排班，用于增量修复
+        self._exam_schedules: Dict[str, List[Schedule]] = {}
+        # 随排班增量维护的统计，schedule() / restore() 时创建
+        self._stats: Optional[ScheduleStats] = None
+        # 增量修复中标记为不可用的老师工号，随批次保存，恢复时重新排除
+        self.unavailable_teachers: List[str] = []
 
         self.teacher_schedules: Dict[str, TeacherSchedule] = {
             t.teacher_id: TeacherSchedule(teacher=t, schedules=[])
             for t in teachers
         }
         self.final_schedules: List[Schedule] = []
+        # 本次排班的进度回调和取消标志，只在 schedule() 执行期间有效
+        self._progress: Optional[Callable[[Dict[str, Any]], None]] = None
+        self._cancel = None
+        # final_schedules 中已随进度汇报过的条数
+        self._reported = 0
+
+    def schedule(self, progress: Optional[Callable[[Dict[str, Any]], None]] = None, cancel=None) -> List[Schedule]:
+        """
+        执行排班
+
+        progress: 每完成一个时间段调用一次，参数为 {'done', 'total', 'date', 'time_slot', 'schedules', 'max_load', 'min_load'}，
+                  schedules 为该时间段新增的排班，max_load/min_load 为此时可用老师的最大/最小监考次数
+        cancel: 带 is_set() 的取消标志（如 threading.Event），在时间段之间检查，已设置时抛出 ScheduleCancelled
+        """
+        self._progress = progress
+        self._cancel = cancel
+        self._reported = 0
+        try:
+            with capture(logger, self.trace_level) as buffer:
+                self._schedule_all()
+        finally:
+            self._progress = None
+            self._cancel = None
+        self.trace = buffer.to_list() if buffer else []
+        return self.final_schedules
 
-    def schedule(self) -> List[Schedule]:
-        """执行排班"""
+    def _schedule_all(self):
+        """按时间顺序为所有考试安排老师"""
         for teacher in self.teachers:
             teacher.exam_count = 0
         
+        # 每次排班重置随机数流，保证同一种子多次调用结果一致
+        self._rng = random.Random(self.seed)
+        self._np_rng = np.random.default_rng(self._rng.getrandbits(64))
         self.final_schedules = []
+        self._exam_schedules = {}
+        self.unavailable_teachers = []
         
         unique_exams = self._deduplicate_exams(self.exams)
-        print(f"去重后考试数: {len(unique_exams)} 场")
+        logger.info("去重后考试数: %d 场", len(unique_exams))
+        self._stats = ScheduleStats(self.teachers, unique_exams)
 
         exams_by_time = {}
         for exam in unique_exams:
@@ -38,32 +110,93 @@ class ExamScheduler:
                 exams_by_time[key] = []
             exams_by_time[key].append(exam)
 
-        # 按时间排序处理
+        # 按时间排序处理；同一天相邻的时间段视为连续监考
         sorted_times = sorted(exams_by_time.keys())
-        
-        for date, time_slot in sorted_times:
-            exams = exams_by_time[(date, time_slot)]
-            print(f"\n时间段 {date} {time_slot}:")
-            self._schedule_exams_at_time(date, time_slot, exams)
-            
-            # 每次分配后检查全局平衡
-            self._check_and_balance()
+        self._core = ArrayCore([t.teacher_id for t in self.teachers], sorted_times)
+        self._check_cancel()
 
-        print(f"\n总共生成排班: {len(self.final_schedules)} 条记录")
-        return self.final_schedules
+        if self._use_process_pool(unique_exams):
+            self._schedule_parallel(exams_by_time, sorted_times)
+        elif self.engine == 'flow':
+            self._schedule_flow(exams_by_time, sorted_times)
+        else:
+            self._schedule_greedy(exams_by_time, sorted_times)
+
+        self._report_shortfall()
+        self._materialize()
+        logger.info("总共生成排班: %d 条记录", len(self.final_schedules))
     
+    def restore(self, schedules: List[Schedule], source_exam_ids: List[str],
+                unavailable_teachers: Sequence[str] = ()) -> List[Schedule]:
+        """
+        恢复已保存的排班结果而不重新计算，恢复后可以正常查询、统计和增量修复
+
+        schedules 中的老师按工号对应到 self.teachers；source_exam_ids 为每条排班的原始考试编号；
+        unavailable_teachers 为该批次修复时标记为不可用的老师，恢复后仍不参与后续修复
+        """
+        unique_exams = self._deduplicate_exams(self.exams)
+        slots = {(e.date, e.time_slot) for e in unique_exams}
+        slots.update((s.exam.date, s.exam.time_slot) for s in schedules)
+        self._core = ArrayCore([t.teacher_id for t in self.teachers], sorted(slots))
+        self._stats = ScheduleStats(self.teachers, unique_exams)
+        self.final_schedules = []
+        self._exam_schedules = {}
+
+        for schedule, source_id in zip(schedules, source_exam_ids):
+            try:
+                indices = [self._core.teacher_index[t.teacher_id] for t in schedule.teachers]
+            except KeyError as e:
+                raise ValueError(f"排班中的老师不存在: {e.args[0]}")
+            slot = self._core.slot_index[(schedule.exam.date, schedule.exam.time_slot)]
+            self._core.assign(np.array(indices, dtype=np.intp), slot)
+            restored = Schedule(exam=schedule.exam, teachers=[self.teachers[i] for i in indices])
+            self.final_schedules.append(restored)
+            self._exam_schedules.setdefault(source_id, []).append(restored)
+            self._stats.add_schedule(restored)
+
+        self.unavailable_teachers = []
+        for teacher_id in unavailable_teachers:
+            t = self._core.teacher_index.get(teacher_id)
+            if t is not None and not self._core.excluded[t]:
+                self._core.exclude(t)
+                self._stats.exclude(teacher_id)
+                self.unavailable_teachers.append(teacher_id)
+
+        self._materialize()
+        logger.info("已恢复排班: %d 条记录", len(self.final_schedules))
+        return self.final_schedules
+
+    def _slot_done(self, done: int, total: int, date: str, time_slot: str):
+        """一个时间段完成：汇报进度并检查是否已取消"""
+        if self._progress is not None:
+            max_load, min_load = self._core.load_gap()
+            self._progress({
+                'done': done,
+                'total': total,
+                'date': date,
+                'time_slot': time_slot,
+                'schedules': self.final_schedules[self._reported:],
+                'max_load': max_load,
+                'min_load': min_load
+            })
+            self._reported = len(self.final_schedules)
+        self._check_cancel()
+
+    def _check_cancel(self):
+        if self._cancel is not None and self._cancel.is_set():
+            logger.info("排班已取消")
+            raise ScheduleCancelled()
+
     def _check_and_balance(self):
         """检查并平衡老师排班次数，确保差距不超过2"""
         if not self.teachers:
             return
             
-        counts = [t.exam_count for t in self.teachers]
-        max_count = max(counts)
-        min_count = min(counts)
+        max_count, min_count = self._core.load_gap()
         
-        # 如果最大差距超过2，打印警告
+        # 如果最大差距超过2，记录警告
         if max_count - min_count > 2:
-            print(f"  [平衡检查] 警告：老师排班次数差距过大（最大{max_count}, 最小{min_count}）")
+            logger.warning("[平衡检查] 老师排班次数差距过大（最大%d, 最小%d）", max_count, min_count)
 
     def _deduplicate_exams(self, exams: List[Exam]) -> List[Exam]:
         seen = set()
@@ -75,12 +208,115 @@ class ExamScheduler:
                 unique.append(exam)
         return unique
 
-    def _schedule_exams_at_time(self, date: str, time_slot: str, exams: List[Exam]):
-        """为同一时间的多个考试安排老师"""
-        subjects = list(set(e.subject for e in exams))
-        print(f"  科目: {subjects} (共 {len(subjects)} 个科目)")
+    def _schedule_greedy(self, exams_by_time: Dict[Tuple[str, str], List[Exam]], sorted_times: List[Tuple[str, str]]):
+        """
+        贪心引擎：分两轮按时间顺序选人，第一轮每个考场先选一位老师，第二轮再补足各考场需要的人数；
+        仍有缺人的时间段时沿增广路径调整（见 flow_engine.augment_assignment）。
+        老师不够时，当天前面的时间段不会用满老师的每日/连续上限而让后面的考试一位老师都分不到
+        """
+        slot_rooms = [self._build_rooms(exams_by_time[key]) for key in sorted_times]
+        slot_demand = [sum(r['required'] for r in rooms) for rooms in slot_rooms]
+        slot_cover = [self._room_cover(rooms) for rooms in slot_rooms]
+
+        chosen: List[List[int]] = [[] for _ in sorted_times]
+        for target in (slot_cover, slot_demand):
+            for slot in range(len(sorted_times)):
+                # 获取在该时间段没有冲突且未超过每日/连续限制的可用老师，
+                # 按 (监考次数, 随机数) 排序（公平原则：优先选次数少的，相同次数的老师中随机排序）
+                candidates = self._core.candidates(slot, self.max_daily, self.max_consecutive)
+                picked = self._core.order_by_load(candidates, self._np_rng)[:max(target[slot] - len(chosen[slot]), 0)]
+                self._core.assign(picked, slot)
+                chosen[slot].extend(picked.tolist())
+
+        pool_teachers = np.flatnonzero(~self._core.excluded).tolist()
+        slot_assigned = augment_assignment(
+            [pool_teachers] * len(sorted_times), chosen, slot_demand, len(self.teachers),
+            slot_day=self._core.slot_day.tolist(), max_daily=self.max_daily, max_consecutive=self.max_consecutive,
+            slot_minimum=slot_cover
+        )
+        for slot, teachers in enumerate(chosen):
+            self._core.release(np.array(teachers, dtype=np.intp), slot)
+
+        self._check_cancel()
+        for slot, ((date, time_slot), rooms, assigned) in enumerate(zip(sorted_times, slot_rooms, slot_assigned)):
+            logger.info("时间段 %s %s:", date, time_slot)
+            if logger.isEnabledFor(logging.DEBUG):
+                subjects = sorted(set(e.subject for e in exams_by_time[(date, time_slot)]))
+                logger.debug("  科目: %s (共 %d 个科目)", subjects, len(subjects))
+                logger.debug("  需要总考场数: %d", len(rooms))
+                logger.debug("  需要总老师数: %d", slot_demand[slot])
+            assigned_count = self._fill_rooms(date, time_slot, slot, rooms, np.array(assigned, dtype=np.intp))
+            logger.info("  该时间段已分配不同老师数: %d", assigned_count)
+
+            # 每次分配后检查全局平衡
+            self._check_and_balance()
+            self._slot_done(slot + 1, len(sorted_times), date, time_slot)
+
+    def _fill_rooms(self, date: str, time_slot: str, slot: int, rooms: List[Dict], ordered: np.ndarray) -> int:
+        """把排好序的老师依次分到各考场，返回已分配的老师数"""
+        needed = sum(r['required'] for r in rooms)
+        # 同一时段一个工号只能出现在一个考场
+        assigned_teachers = set()
+        chosen = []
+        for i in ordered.tolist():
+            teacher_id = self.teachers[i].teacher_id
+            if teacher_id in assigned_teachers:
+                continue
+            assigned_teachers.add(teacher_id)
+            chosen.append(i)
+            if len(chosen) == needed:
+                break
+        self._core.assign(np.array(chosen, dtype=np.intp), slot)
+        pool = [self.teachers[i] for i in chosen]
+
+        # 老师不够时先保证每个考场一位，再依次补足各考场
+        counts = [0] * len(rooms)
+        left = len(pool)
+        for cover in (True, False):
+            for i, room_info in enumerate(rooms):
+                target = min(room_info['required'], 1) if cover else room_info['required']
+                extra = min(target - counts[i], left)
+                counts[i] += extra
+                left -= extra
 
-        # 初始化该时间段需要分配的考场列表
+        unassigned_rooms = 0
+        understaffed_rooms = 0
+        debug = logger.isEnabledFor(logging.DEBUG)
+        pos = 0
+        for room_info, count in zip(rooms, counts):
+            teachers_for_room = pool[pos:pos + count]
+            pos += len(teachers_for_room)
+            if 0 < count < room_info['required']:
+                understaffed_rooms += 1
+            if teachers_for_room:
+                self._assign_room(date, time_slot, room_info, teachers_for_room)
+                if debug:
+                    logger.debug("    %s: %d 位老师 - %s", room_info['room'], len(teachers_for_room),
+                                 [t.name for t in teachers_for_room])
+            else:
+                unassigned_rooms += 1
+                logger.debug("    %s 没有可用老师", room_info['room'])
+
+        if unassigned_rooms:
+            logger.warning("%s %s: %d 个考场没有可用老师", date, time_slot, unassigned_rooms)
+        if understaffed_rooms:
+            logger.warning("%s %s: %d 个考场监考老师不足", date, time_slot, understaffed_rooms)
+        return len(pool)
+
+    @staticmethod
+    def _room_cover(rooms: List[Dict]) -> int:
+        """每个考场一位老师所需的人数（优先保证的人数）"""
+        return sum(1 for r in rooms if r['required'] > 0)
+
+    def _report_shortfall(self):
+        """排班完成后汇总监考老师不足的时间段"""
+        shortfall = self._stats.shortfall()
+        if shortfall:
+            logger.warning("%d 个时间段监考老师不足，共缺 %d 人", len(shortfall),
+                           sum(item['required'] - item['assigned'] for item in shortfall))
+
+    def _build_rooms(self, exams: List[Exam]) -> List[Dict]:
+        """展开同一时间段各考试的考场"""
         rooms_to_assign = []
         for exam in exams:
             subject = exam.subject
@@ -95,120 +331,260 @@ class ExamScheduler:
                     'required': required,
                     'exam_id': exam.exam_id
                 })
-        
-        total_teachers_needed = sum(r['required'] for r in rooms_to_assign)
-        print(f"  需要总考场数: {len(rooms_to_assign)}")
-        print(f"  需要总老师数: {total_teachers_needed}")
-        
-        # 获取在该时间段没有冲突的可用老师
-        teachers_with_counts = []
-        for teacher in self.teachers:
-            teacher_schedule = self.teacher_schedules[teacher.teacher_id]
-            if teacher_schedule.has_conflict_by_time(date, time_slot):
-                continue
-            teachers_with_counts.append(teacher)
+        return rooms_to_assign
 
-        print(f"  可用老师数: {len(teachers_with_counts)}")
-        
-        # 按监考次数分组排序（公平原则：优先选次数少的）
-        # 在相同次数的老师中随机排序，增加公平性
-        teachers_with_counts.sort(key=lambda t: (t.exam_count, random.random()))
-        
-        # 为每个考场分配老师
-        assigned_teachers = set()  # 记录该时段已分配的老师ID
-        for room_info in rooms_to_assign:
-            required = room_info['required']
-            teachers_for_room = []
-
-            # 找(required)个未分配的老师，优先选择exam_count少的
-            # 每次选择后重新排序，确保始终选择当前次数最少的
-            available_teachers = [t for t in teachers_with_counts if t.teacher_id not in assigned_teachers]
-            available_teachers.sort(key=lambda t: (t.exam_count, random.random()))
-            
-            for teacher in available_teachers[:required]:
-                teachers_for_room.append(teacher)
-                assigned_teachers.add(teacher.teacher_id)
-            
-            if teachers_for_room:
-                exam_copy = Exam(
-                    exam_id=f"{room_info['exam_id']}_{room_info['room']}",
-                    exam_name=room_info['exam'].exam_name,
-                    subject=room_info['subject'],
-                    date=date,
-                    time_slot=time_slot,
-                    room=room_info['room'],
-                    required_teachers=room_info['required']
-                )
-                schedule = Schedule(exam=exam_copy, teachers=teachers_for_room)
-                self.final_schedules.append(schedule)
-                for teacher in teachers_for_room:
-                    self.teacher_schedules[teacher.teacher_id].schedules.append(schedule)
-                    teacher.exam_count += 1
-                print(f"    {room_info['room']}: {len(teachers_for_room)} 位老师 - {[t.name for t in teachers_for_room]}")
-            else:
-                print(f"    警告: {room_info['room']} 没有可用老师")
+    def _assign_room(self, date: str, time_slot: str, room_info: Dict, teachers_for_room: List[Teacher]):
+        """记录一个考场的排班结果"""
+        exam_copy = Exam(
+            exam_id=f"{room_info['exam_id']}_{room_info['room']}",
+            exam_name=room_info['exam'].exam_name,
+            subject=room_info['subject'],
+            date=date,
+            time_slot=time_slot,
+            room=room_info['room'],
+            required_teachers=room_info['required']
+        )
+        schedule = Schedule(exam=exam_copy, teachers=teachers_for_room)
+        self.final_schedules.append(schedule)
+        self._exam_schedules.setdefault(room_info['exam_id'], []).append(schedule)
+        self._stats.add_schedule(schedule)
 
-        print(f"  该时间段已分配不同老师数: {len(assigned_teachers)}/{len(teachers_with_counts)}")
-
-    def get_statistics(self) -> Dict:
-        """获取统计信息"""
-        # 计算总考试数：去重后的每个考试的考场数之和
-        unique_exams = self._deduplicate_exams(self.exams)
-        total_exams = sum(exam.rooms_count for exam in unique_exams)
-        total_schedules = len(self.final_schedules)
-
-        teacher_exam_count = {}
-        teacher_exams = {}
+    def _materialize(self):
+        """把数组状态转换为数据类：老师监考次数和按老师的排班表"""
+        for teacher, count in zip(self.teachers, self._core.loads.tolist()):
+            teacher.exam_count = count
+        self.teacher_schedules = {
+            t.teacher_id: TeacherSchedule(teacher=t, schedules=[])
+            for i, t in enumerate(self.teachers)
+            if not self._core.excluded[i]
+        }
         for schedule in self.final_schedules:
             for teacher in schedule.teachers:
-                if teacher.teacher_id not in teacher_exam_count:
-                    teacher_exam_count[teacher.teacher_id] = 0
-                    teacher_exams[teacher.teacher_id] = []
-                teacher_exam_count[teacher.teacher_id] += 1
-                teacher_exams[teacher.teacher_id].append({
-                    'exam_name': schedule.exam.exam_name,
-                    'subject': schedule.exam.subject,
-                    'date': schedule.exam.date,
-                    'time_slot': schedule.exam.time_slot,
-                    'room': schedule.exam.room
-                })
+                self.teacher_schedules[teacher.teacher_id].add_schedule(schedule)
 
-        teacher_stats = []
-        for teacher_id, ts in self.teacher_schedules.items():
-            exam_count = teacher_exam_count.get(teacher_id, 0) or 0
-            exams = teacher_exams.get(teacher_id, [])
-            teacher_stats.append({
-                'teacher_id': teacher_id,
-                'name': ts.teacher.name,
-                'exam_count': exam_count,
-                'exams': exams
-            })
+    def _read_limit(self, key: str) -> Optional[int]:
+        """读取限制类配置项，无效值视为不限制"""
+        try:
+            value = int(float(self.config.get(key)))
+        except (TypeError, ValueError):
+            return None
+        return value if value > 0 else None
 
-        teacher_stats = sorted(teacher_stats, key=lambda x: x['exam_count'], reverse=True)
+    def _use_process_pool(self, exams: List[Exam]) -> bool:
+        """
+        是否用进程池按天并行求解：规模小时进程池的启动和数据传递开销超过节省的求解时间，
+        单核机器上并行没有收益，这两种情况都用串行的最小费用流
+        """
+        if self.workers <= 1 or len(self._core.dates) <= 1:
+            return False
+        seats = sum(exam.required_teachers * exam.rooms_count for exam in exams)
+        cpus = os.cpu_count() or 1
+        if seats < app_config.PARALLEL_MIN_SEATS or cpus <= 1:
+            logger.info("并行排班未启用（%d 个监考名额，%d 个 CPU），使用串行 flow", seats, cpus)
+            return False
+        return True
 
-        date_stats = {}
-        for schedule in self.final_schedules:
-            date = schedule.exam.date
-            if date not in date_stats:
-                date_stats[date] = {'count': 0, 'teachers': set()}
-            date_stats[date]['count'] += 1
-            for teacher in schedule.teachers:
-                date_stats[date]['teachers'].add(teacher.name)
+    def _resolve_engine(self, engine: Optional[str]) -> str:
+        """确定排班算法：参数优先，其次是配置项“排班算法”"""
+        if engine is None:
+            engine = self.config.get('排班算法')
+        if engine is None or str(engine) != str(engine) or not str(engine).strip():
+            engine = app_config.DEFAULT_ENGINE
+        engine = str(engine).strip().lower()
+        if engine not in app_config.ENGINES:
+            raise ValueError(f"未知的排班算法: {engine}，可选: {', '.join(app_config.ENGINES)}")
+        return engine
 
-        for date in date_stats:
-            date_stats[date]['teachers'] = list(date_stats[date]['teachers'])
+    def _schedule_flow(self, exams_by_time: Dict[Tuple[str, str], List[Exam]], sorted_times: List[Tuple[str, str]]):
+        """最小费用流引擎：先求全局均衡的 老师→时间段 分配，再把老师分到各考场"""
+        slot_rooms = [self._build_rooms(exams_by_time[key]) for key in sorted_times]
+        slot_demand = [sum(r['required'] for r in rooms) for rooms in slot_rooms]
+        slot_available = [self._core.candidates(slot).tolist() for slot in range(len(sorted_times))]
 
-        return {
-            'total_exams': total_exams,
-            'scheduled_exams': total_schedules,
-            'unscheduled_exams': total_exams - total_schedules,
-            'teacher_stats': teacher_stats,
-            'date_stats': date_stats
-        }
+        slot_assigned = solve_balanced_assignment(
+            slot_available, slot_demand, len(self.teachers), self._rng,
+            slot_day=self._core.slot_day.tolist(), max_daily=self.max_daily, max_consecutive=self.max_consecutive,
+            slot_minimum=[self._room_cover(rooms) for rooms in slot_rooms]
+        )
+
+        self._check_cancel()
+        for slot, ((date, time_slot), rooms, assigned) in enumerate(zip(sorted_times, slot_rooms, slot_assigned)):
+            logger.info("时间段 %s %s:", date, time_slot)
+            self._fill_rooms(date, time_slot, slot, rooms, np.array(assigned, dtype=np.intp))
+            self._slot_done(slot + 1, len(sorted_times), date, time_slot)
+
+        self._check_and_balance()
+
+    def _schedule_parallel(self, exams_by_time: Dict[Tuple[str, str], List[Exam]], sorted_times: List[Tuple[str, str]]):
+        """
+        并行引擎：按天分块，在进程池中独立求解各天，再合并并做全局平衡
+
+        各天之间只通过老师负载相互影响。分块求解时老师用“角色”下标表示，
+        合并时把当天任务多的角色分给累计负载少的老师，最后在全局残量网络上消去负费用环，
+        保证与串行最小费用流相同的均衡程度。
+        """
+        slot_rooms = [self._build_rooms(exams_by_time[key]) for key in sorted_times]
+        slot_demand = [sum(r['required'] for r in rooms) for rooms in slot_rooms]
+        slot_day = self._core.slot_day.tolist()
+        pool_teachers = np.flatnonzero(~self._core.excluded).tolist()
+        n_roles = len(pool_teachers)
+
+        day_slots: Dict[int, List[int]] = {}
+        for slot, day in enumerate(slot_day):
+            day_slots.setdefault(day, []).append(slot)
+        partitions = list(day_slots.values())
+        tasks = [
+            ([list(range(n_roles))] * len(slots), [slot_demand[i] for i in slots], n_roles,
+             self._rng.getrandbits(64), [0] * len(slots), self.max_daily, self.max_consecutive,
+             [self._room_cover(slot_rooms[i]) for i in slots])
+            for slots in partitions
+        ]
+        workers = min(self.workers, os.cpu_count() or 1)
+        logger.info("并行排班: %d 天, %d 个进程", len(tasks), workers)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(solve_partition, tasks,
+                                        chunksize=max(1, len(tasks) // (workers * 4))))
+
+        # 合并：当天任务多的角色对应累计负载少的老师（同一天内老师可用性相同，角色可任意互换）
+        loads = [0] * len(self.teachers)
+        slot_assigned: List[List[int]] = [[] for _ in sorted_times]
+        for slots, result in zip(partitions, results):
+            role_loads = [0] * n_roles
+            for assigned in result:
+                for role in assigned:
+                    role_loads[role] += 1
+            roles = sorted(range(n_roles), key=lambda r: -role_loads[r])
+            teachers = sorted(pool_teachers, key=lambda t: (loads[t], self._rng.random()))
+            mapping = dict(zip(roles, teachers))
+            for slot, assigned in zip(slots, result):
+                slot_assigned[slot] = [mapping[r] for r in assigned]
+                for t in slot_assigned[slot]:
+                    loads[t] += 1
+
+        slot_available = [pool_teachers] * len(sorted_times)
+        slot_assigned = rebalance_assignment(
+            slot_available, slot_assigned, len(self.teachers),
+            slot_day=slot_day, max_daily=self.max_daily, max_consecutive=self.max_consecutive
+        )
+
+        self._check_cancel()
+        for slot, ((date, time_slot), rooms, assigned) in enumerate(zip(sorted_times, slot_rooms, slot_assigned)):
+            logger.info("时间段 %s %s:", date, time_slot)
+            self._fill_rooms(date, time_slot, slot, rooms, np.array(assigned, dtype=np.intp))
+            self._slot_done(slot + 1, len(sorted_times), date, time_slot)
+
+        self._check_and_balance()
+
+    # ============ 增量修复 ============
+
+    def remove_teacher(self, teacher_id: str) -> List[Schedule]:
+        """老师不可用：只为其原有监考的考场补选老师，其余排班保持不变，返回受影响的排班"""
+        self._require_schedule()
+        t = self._core.teacher_index.get(teacher_id)
+        if t is None or self._core.excluded[t]:
+            return []
+        self._core.exclude(t)
+        self.unavailable_teachers.append(teacher_id)
+        affected = list(self.teacher_schedules[teacher_id].schedules)
+
+        emptied = set()
+        for schedule in affected:
+            slot = self._core.slot_index[(schedule.exam.date, schedule.exam.time_slot)]
+            self._core.release(np.array([t]), slot)
+            for x in schedule.teachers:
+                if x.teacher_id == teacher_id:
+                    self._stats.remove_teacher(schedule, x)
+            schedule.teachers = [x for x in schedule.teachers if x.teacher_id != teacher_id]
+            candidates = self._core.candidates(slot, self.max_daily, self.max_consecutive)
+            replacement = self._core.order_by_load(candidates, self._np_rng)[:1]
+            self._core.assign(replacement, slot)
+            for i in replacement.tolist():
+                schedule.teachers.append(self.teachers[i])
+                self._stats.add_teacher(schedule, self.teachers[i])
+            if not schedule.teachers:
+                emptied.add(id(schedule))
+        self._stats.exclude(teacher_id)
+
+        if emptied:
+            self._discard_schedules(emptied)
+        self._materialize()
+        logger.info("老师 %s 不可用，已修复 %d 个考场", teacher_id, len(affected))
+        return [s for s in affected if id(s) not in emptied]
+
+    def drop_exam(self, exam_id: str) -> int:
+        """删除考试：撤销该考试所有考场的排班，返回撤销的排班数"""
+        self._require_schedule()
+        removed = self._exam_schedules.pop(exam_id, [])
+        for schedule in removed:
+            slot = self._core.slot_index[(schedule.exam.date, schedule.exam.time_slot)]
+            teachers = [self._core.teacher_index[t.teacher_id] for t in schedule.teachers]
+            self._core.release(np.array(teachers, dtype=np.intp), slot)
+        self.exams = [e for e in self.exams if e.exam_id != exam_id]
+        self._stats.set_exams(self._deduplicate_exams(self.exams))
+        if removed:
+            self._discard_schedules({id(s) for s in removed})
+        self._materialize()
+        return len(removed)
+
+    def repair_exam(self, exam: Exam) -> List[Schedule]:
+        """考试新增或变更：只重排该考试的考场，其余排班保持不变，返回该考试的新排班"""
+        self._require_schedule()
+        self.drop_exam(exam.exam_id)
+        self.exams.append(exam)
+        self._stats.set_exams(self._deduplicate_exams(self.exams))
+
+        # 与已有考试重复（同名同科目同时间）时沿用原有排班，和完整排班的去重规则一致
+        if self._deduplicate_exams(self.exams)[-1] is not exam:
+            return []
+
+        slot = self._core.add_slot(exam.date, exam.time_slot)
+        rooms = self._build_rooms([exam])
+        candidates = self._core.candidates(slot, self.max_daily, self.max_consecutive)
+        ordered = self._core.order_by_load(candidates, self._np_rng)
+        self._fill_rooms(exam.date, exam.time_slot, slot, rooms, ordered)
+
+        self.final_schedules.sort(key=lambda s: (s.exam.date, s.exam.time_slot))
+        self._materialize()
+        schedules = self._exam_schedules.get(exam.exam_id, [])
+        logger.info("考试 %s 已重排 %d 个考场", exam.exam_id, len(schedules))
+        return schedules
+
+    def _require_schedule(self):
+        if self._core is None:
+            raise ValueError("尚未排班，无法增量修复")
+
+    def _discard_schedules(self, schedule_ids: Set[int]):
+        """从结果中移除指定排班（按对象身份）"""
+        kept = []
+        for s in self.final_schedules:
+            if id(s) in schedule_ids:
+                self._stats.remove_schedule(s)
+            else:
+                kept.append(s)
+        self.final_schedules = kept
+        for exam_id, schedules in list(self._exam_schedules.items()):
+            kept = [s for s in schedules if id(s) not in schedule_ids]
+            if kept:
+                self._exam_schedules[exam_id] = kept
+            else:
+                del self._exam_schedules[exam_id]
+
+    def get_statistics(self) -> Dict:
+        """获取统计信息（由排班过程中增量维护的聚合数据组装，另含监考次数的公平性指标 fairness）"""
+        if self._stats is None:
+            # 尚未排班
+            unique_exams = self._deduplicate_exams(self.exams)
+            return ScheduleStats([ts.teacher for ts in self.teacher_schedules.values()], unique_exams).to_dict()
+        return self._stats.to_dict()
 
     def get_schedule_by_date(self, date: str) -> List[Schedule]:
         return [s for s in self.final_schedules if s.exam.date == date]
 
+    def get_source_exam_ids(self) -> List[str]:
+        """与 final_schedules 一一对应的原始考试编号（用于持久化）"""
+        sources = {id(s): exam_id for exam_id, schedules in self._exam_schedules.items() for s in schedules}
+        return [sources.get(id(s), s.exam.exam_id) for s in self.final_schedules]
+
     def get_schedule_by_teacher(self, teacher_id: str) -> List[Schedule]:
         if teacher_id in self.teacher_schedules:
             return self.teacher_schedules[teacher_id].schedules
@@ -0,0 +1,86 @@
+"""
+已发布的排班快照
+
+写操作（排班、增量修复）在自己的 ExamScheduler 上完成后，复制出一份只读快照并整体替换发布；
+读操作只拿当前快照的引用，不加锁，也不会看到写了一半的状态。
+快照中的排班、老师、考试都是复制出来的对象，之后对调度器的修改不会影响已发布的快照。
+"""
+
+from dataclasses import dataclass, field, replace
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+from models import Schedule, Teacher
+
+# 可用于过滤排班的字段
+INDEXED_FIELDS = ('date', 'subject', 'teacher_id', 'department')
+
+
+@dataclass(frozen=True)
+class ScheduleSnapshot:
+    """一次发布的排班结果（只读，读者不要修改其中的对象）"""
+    version: int
+    schedules: Tuple[Schedule, ...] = ()
+    # 与 schedules 一一对应的接口格式（serialize_schedule 的结果）
+    schedule_list: Tuple[Dict[str, Any], ...] = ()
+    statistics: Mapping[str, Any] = field(default_factory=lambda: MappingProxyType({}))
+    # 工号 → 监考次数
+    teacher_counts: Mapping[str, int] = field(default_factory=lambda: MappingProxyType({}))
+    trace: Tuple[Dict[str, Any], ...] = ()
+    # 过滤用索引：字段（date / subject / teacher_id / department）→ 值 → 排班下标（升序）
+    index: Mapping[str, Mapping[str, Tuple[int, ...]]] = field(default_factory=lambda: MappingProxyType({}))
+
+    @property
+    def empty(self) -> bool:
+        return not self.schedules
+
+    def select(self, **filters: Optional[str]) -> List[int]:
+        """满足全部过滤条件的排班下标（按原顺序），值为 None 的条件忽略"""
+        selected = None
+        for name, value in filters.items():
+            if value is None:
+                continue
+            positions = self.index.get(name, {}).get(value, ())
+            selected = set(positions) if selected is None else selected.intersection(positions)
+        if selected is None:
+            return list(range(len(self.schedules)))
+        return sorted(selected)
+
+    @classmethod
+    def from_scheduler(cls, scheduler, version: int,
+                       serialize: Callable[[Schedule], Dict[str, Any]]) -> "ScheduleSnapshot":
+        """复制调度器的当前结果；调用方需保证复制期间没有其他线程修改该调度器"""
+        teachers: Dict[int, Teacher] = {}
+        schedules: List[Schedule] = []
+        counts: Dict[str, int] = {}
+        index: Dict[str, Dict[str, List[int]]] = {name: {} for name in INDEXED_FIELDS}
+        for position, s in enumerate(scheduler.final_schedules):
+            copied = []
+            for t in s.teachers:
+                if id(t) not in teachers:
+                    teachers[id(t)] = replace(t)
+                copied.append(teachers[id(t)])
+                counts[t.teacher_id] = counts.get(t.teacher_id, 0) + 1
+            schedules.append(Schedule(exam=replace(s.exam), teachers=copied))
+
+            index['date'].setdefault(s.exam.date, []).append(position)
+            index['subject'].setdefault(s.exam.subject, []).append(position)
+            for name in ('teacher_id', 'department'):
+                # 同一考场可能有多位同部门的老师，下标只记一次
+                for value in dict.fromkeys(getattr(t, name) for t in s.teachers):
+                    index[name].setdefault(value, []).append(position)
+
+        return cls(
+            version=version,
+            schedules=tuple(schedules),
+            schedule_list=tuple(serialize(s) for s in schedules),
+            statistics=MappingProxyType(scheduler.get_statistics()) if schedules else MappingProxyType({}),
+            teacher_counts=MappingProxyType(counts),
+            trace=tuple(scheduler.trace),
+            index=MappingProxyType({name: MappingProxyType({value: tuple(positions)
+                                                            for value, positions in values.items()})
+                                    for name, values in index.items()})
+        )
+
+
+def empty_snapshot(version: int = 0) -> ScheduleSnapshot:
+    return ScheduleSnapshot(version=version)
@@ -0,0 +1,50 @@
+"""
+启动耗时统计
+
+记录启动过程中各阶段完成的时间点，服务可以接受连接后打印各阶段耗时，便于定位冷启动慢的环节。
+计时从本模块被导入时开始（app.py 第一个导入它），不包括解释器本身和打包 exe 解压的时间；
+开发环境下更细的逐模块耗时可用 `python -X importtime app.py` 查看。
+"""
+
+import socket
+import time
+from typing import List, Tuple
+
+_started = time.perf_counter()
+# (阶段名, 完成时间点)
+_marks: List[Tuple[str, float]] = []
+
+
+def mark(phase: str):
+    """记录一个阶段完成"""
+    _marks.append((phase, time.perf_counter()))
+
+
+def breakdown() -> List[Tuple[str, float]]:
+    """各阶段耗时（秒），按完成先后排列"""
+    result = []
+    previous = _started
+    for phase, at in _marks:
+        result.append((phase, at - previous))
+        previous = at
+    return result
+
+
+def report() -> str:
+    parts = [f"{phase} {seconds:.2f}s" for phase, seconds in breakdown()]
+    total = (_marks[-1][1] if _marks else time.perf_counter()) - _started
+    return f"启动耗时: {' | '.join(parts)} | 共 {total:.2f}s"
+
+
+def wait_until_ready(host: str, port: int, timeout: float = 30.0, interval: float = 0.05) -> bool:
+    """等待服务端口可以连接，超时返回 False；监听所有地址时连接本机"""
+    if host in ('', '0.0.0.0', '::'):
+        host = '127.0.0.1'
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection((host, port), timeout=interval * 10):
+                return True
+        except OSError:
+            time.sleep(interval)
+    return False
@@ -0,0 +1,538 @@
+"""
+SQLite 数据存储
+
+监考老师、考试和配置以 data/scheduler.db 为主存储，单条增删改只写一行记录；
+xlsx 文件只作为导入/导出的交换格式：xlsx 在上次导入后被修改（如手工编辑），
+下次加载时会自动重新导入数据库（见 utils.load_teachers 等）。
+
+每次排班的结果作为一个批次（run）保存，按老师、日期、时间段、科目的查询走索引，
+服务重启后不需要重新排班即可查询历史结果。
+"""
+
+import json
+import os
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from models import Teacher, Exam, Schedule
+import config
+
+# 记录按插入顺序（seq）返回，与原来 xlsx 的行顺序一致；工号/考试编号允许重复，不设唯一约束
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS teachers (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    teacher_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    title TEXT NOT NULL,
+    phone TEXT NOT NULL,
+    department TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_teachers_teacher_id ON teachers(teacher_id);
+
+CREATE TABLE IF NOT EXISTS exams (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    exam_id TEXT NOT NULL,
+    exam_name TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    date TEXT NOT NULL,
+    time_slot TEXT NOT NULL,
+    room TEXT NOT NULL,
+    required_teachers INTEGER NOT NULL,
+    rooms_count INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_exams_exam_id ON exams(exam_id);
+CREATE INDEX IF NOT EXISTS idx_exams_date_slot ON exams(date, time_slot);
+CREATE INDEX IF NOT EXISTS idx_exams_subject ON exams(subject);
+
+CREATE TABLE IF NOT EXISTS config (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    key TEXT NOT NULL UNIQUE,
+    value TEXT
+);
+
+CREATE TABLE IF NOT EXISTS schedule_runs (
+    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at TEXT NOT NULL,
+    engine TEXT,
+    seed INTEGER,
+    schedule_count INTEGER NOT NULL,
+    -- 输入数据（老师、考试、配置）的指纹，输入未变化时可直接复用该批次
+    fingerprint TEXT,
+    -- 增量修复时标记为不可用的老师工号（JSON 数组），恢复该批次时重新排除
+    unavailable_teachers TEXT
+);
+
+-- 一行一个考场；source_exam_id 为原始考试编号，exam_id 为 考试编号_考场
+CREATE TABLE IF NOT EXISTS schedules (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id INTEGER NOT NULL REFERENCES schedule_runs(run_id) ON DELETE CASCADE,
+    source_exam_id TEXT NOT NULL,
+    exam_id TEXT NOT NULL,
+    exam_name TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    date TEXT NOT NULL,
+    time_slot TEXT NOT NULL,
+    room TEXT NOT NULL,
+    required_teachers INTEGER NOT NULL
+);
+-- 查询总是限定批次，再按日期、时间段或科目过滤；run_id 开头的复合索引也用于按批次读取和删除
+DROP INDEX IF EXISTS idx_schedules_run;
+DROP INDEX IF EXISTS idx_schedules_date_slot;
+DROP INDEX IF EXISTS idx_schedules_subject;
+CREATE INDEX IF NOT EXISTS idx_schedules_run_date_slot ON schedules(run_id, date, time_slot);
+CREATE INDEX IF NOT EXISTS idx_schedules_run_subject ON schedules(run_id, subject);
+
+CREATE TABLE IF NOT EXISTS schedule_teachers (
+    schedule_seq INTEGER NOT NULL REFERENCES schedules(seq) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    teacher_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    title TEXT NOT NULL,
+    phone TEXT NOT NULL,
+    department TEXT NOT NULL,
+    PRIMARY KEY (schedule_seq, position)
+);
+CREATE INDEX IF NOT EXISTS idx_schedule_teachers_teacher_id ON schedule_teachers(teacher_id);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+TEACHER_FIELDS = ('teacher_id', 'name', 'title', 'phone', 'department')
+EXAM_FIELDS = ('exam_id', 'exam_name', 'subject', 'date', 'time_slot', 'room', 'required_teachers', 'rooms_count')
+_RUN_COLUMNS = "run_id, engine, seed, fingerprint, unavailable_teachers"
+
+# 已建表的数据库文件
+_initialized = set()
+
+
+@contextmanager
+def connect() -> Iterator[sqlite3.Connection]:
+    """打开数据库连接，with 块正常结束时提交，异常时回滚"""
+    path = config.DB_FILE
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30)
+    try:
+        if path not in _initialized:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            _migrate(conn)
+            _initialized.add(path)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+def file_signature(path: str) -> Optional[str]:
+    """文件的 修改时间ns:大小，文件不存在时返回 None"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return f"{stat.st_mtime_ns}:{stat.st_size}"
+
+
+def get_meta(key: str) -> Optional[str]:
+    with connect() as conn:
+        row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else None
+
+
+def set_meta(key: str, value: Optional[str]):
+    with connect() as conn:
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+
+def get_state() -> Tuple[int, Optional[int]]:
+    """
+    共享的排班状态：(状态版本号, 当前排班批次号)
+
+    多个进程（如 gunicorn 的多个 worker）通过它同步当前发布的排班：版本号与本进程的快照不同时重新加载
+    """
+    with connect() as conn:
+        rows = dict(conn.execute("SELECT key, value FROM meta WHERE key IN ('state_version', 'current_run')"))
+    version = int(rows.get('state_version') or 0)
+    run_id = rows.get('current_run')
+    return version, int(run_id) if run_id else None
+
+
+def advance_state(run_id: Optional[int], expected_version: Optional[int] = None,
+                  cleared: bool = False) -> Optional[int]:
+    """
+    设置当前排班批次（None 表示没有有效排班）并把状态版本号加一，返回新版本号
+
+    expected_version 不为 None 时，只在当前版本号仍等于它时更新（比较和更新在同一条语句内完成），
+    否则不做修改并返回 None。
+    cleared 为 True 表示排班被明确重置：之后不再按输入指纹恢复已保存的排班（见 schedule_cleared），
+    直到再次发布排班；数据修改作废排班时保持原标记不变
+    """
+    with connect() as conn:
+        if expected_version is None:
+            conn.execute("INSERT INTO meta (key, value) VALUES ('state_version', '1') "
+                         "ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1")
+        else:
+            updated = conn.execute("UPDATE meta SET value = CAST(value AS INTEGER) + 1 "
+                                   "WHERE key = 'state_version' AND CAST(value AS INTEGER) = ?",
+                                   (expected_version,)).rowcount
+            if not updated and expected_version == 0:
+                updated = conn.execute("INSERT INTO meta (key, value) SELECT 'state_version', '1' "
+                                       "WHERE NOT EXISTS (SELECT 1 FROM meta WHERE key = 'state_version')").rowcount
+            if not updated:
+                return None
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('current_run', ?)",
+                     (None if run_id is None else str(run_id),))
+        if cleared:
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('schedule_cleared', '1')")
+        elif run_id is not None:
+            conn.execute("DELETE FROM meta WHERE key = 'schedule_cleared'")
+        return int(conn.execute("SELECT value FROM meta WHERE key = 'state_version'").fetchone()[0])
+
+
+def schedule_cleared() -> bool:
+    """排班是否已被明确重置且之后没有再发布（此时不按输入指纹恢复已保存的排班）"""
+    return get_meta('schedule_cleared') is not None
+
+
+# ============ 监考老师 ============
+
+def _teacher_row(t: Teacher) -> tuple:
+    return (str(t.teacher_id), str(t.name), str(t.title), str(t.phone), str(t.department))
+
+
+def load_teachers() -> List[Teacher]:
+    with connect() as conn:
+        rows = conn.execute(f"SELECT {', '.join(TEACHER_FIELDS)} FROM teachers ORDER BY seq").fetchall()
+    return [Teacher(*row, exam_count=0) for row in rows]
+
+
+def count_teachers() -> int:
+    with connect() as conn:
+        return conn.execute("SELECT COUNT(*) FROM teachers").fetchone()[0]
+
+
+def replace_teachers(teachers: Iterable[Teacher]):
+    """用给定列表替换全部监考老师"""
+    with connect() as conn:
+        conn.execute("DELETE FROM teachers")
+        _insert(conn, 'teachers', TEACHER_FIELDS, map(_teacher_row, teachers))
+
+
+def add_teachers(teachers: Iterable[Teacher]):
+    with connect() as conn:
+        _insert(conn, 'teachers', TEACHER_FIELDS, map(_teacher_row, teachers))
+
+
+def import_teachers(chunks: Iterable[List[Teacher]]) -> int:
+    """
+    逐批写入导入的老师（跳过工号已存在的），返回新增条数
+
+    全部批次在同一个事务内：每批读到后立即写入，读取中途出错时整体回滚，不留下半份数据
+    """
+    with connect() as conn:
+        existing = {row[0] for row in conn.execute("SELECT DISTINCT teacher_id FROM teachers")}
+        return _insert_chunks(conn, 'teachers', TEACHER_FIELDS,
+                              ([_teacher_row(t) for t in chunk if t.teacher_id not in existing] for chunk in chunks))
+
+
+def teacher_ids() -> set:
+    with connect() as conn:
+        return {row[0] for row in conn.execute("SELECT teacher_id FROM teachers")}
+
+
+def teacher_exists(teacher_id: str) -> bool:
+    with connect() as conn:
+        return conn.execute("SELECT 1 FROM teachers WHERE teacher_id = ? LIMIT 1", (teacher_id,)).fetchone() is not None
+
+
+def update_teacher(teacher_id: str, changes: Dict[str, Any]) -> bool:
+    """修改第一条工号匹配的记录，changes 的键为 Teacher 字段名；没有匹配记录时返回 False"""
+    with connect() as conn:
+        return _update_first(conn, 'teachers', 'teacher_id', teacher_id, TEACHER_FIELDS, changes)
+
+
+def delete_teacher(teacher_id: str) -> int:
+    """删除工号匹配的全部记录，返回删除条数"""
+    with connect() as conn:
+        return conn.execute("DELETE FROM teachers WHERE teacher_id = ?", (teacher_id,)).rowcount
+
+
+# ============ 考试 ============
+
+def _exam_row(e: Exam) -> tuple:
+    return (str(e.exam_id), str(e.exam_name), str(e.subject), str(e.date), str(e.time_slot), str(e.room),
+            int(e.required_teachers), int(e.rooms_count))
+
+
+def load_exams() -> List[Exam]:
+    with connect() as conn:
+        rows = conn.execute(f"SELECT {', '.join(EXAM_FIELDS)} FROM exams ORDER BY seq").fetchall()
+    return [Exam(*row) for row in rows]
+
+
+def get_exam(exam_id: str) -> Optional[Exam]:
+    """第一条考试编号匹配的考试"""
+    with connect() as conn:
+        row = conn.execute(f"SELECT {', '.join(EXAM_FIELDS)} FROM exams WHERE exam_id = ? ORDER BY seq LIMIT 1",
+                           (exam_id,)).fetchone()
+    return Exam(*row) if row else None
+
+
+def replace_exams(exams: Iterable[Exam]):
+    """用给定列表替换全部考试"""
+    with connect() as conn:
+        conn.execute("DELETE FROM exams")
+        _insert(conn, 'exams', EXAM_FIELDS, map(_exam_row, exams))
+
+
+def add_exams(exams: Iterable[Exam]):
+    with connect() as conn:
+        _insert(conn, 'exams', EXAM_FIELDS, map(_exam_row, exams))
+
+
+def import_exams(chunks: Iterable[List[Exam]]) -> int:
+    """逐批写入导入的考试（跳过编号已存在的），返回新增条数；与 import_teachers 一样在同一个事务内"""
+    with connect() as conn:
+        existing = {row[0] for row in conn.execute("SELECT DISTINCT exam_id FROM exams")}
+        return _insert_chunks(conn, 'exams', EXAM_FIELDS,
+                              ([_exam_row(e) for e in chunk if e.exam_id not in existing] for chunk in chunks))
+
+
+def exam_ids() -> set:
+    with connect() as conn:
+        return {row[0] for row in conn.execute("SELECT exam_id FROM exams")}
+
+
+def exam_exists(exam_id: str) -> bool:
+    with connect() as conn:
+        return conn.execute("SELECT 1 FROM exams WHERE exam_id = ? LIMIT 1", (exam_id,)).fetchone() is not None
+
+
+def update_exam(exam_id: str, changes: Dict[str, Any]) -> bool:
+    """修改第一条考试编号匹配的记录，changes 的键为 Exam 字段名；没有匹配记录时返回 False"""
+    with connect() as conn:
+        return _update_first(conn, 'exams', 'exam_id', exam_id, EXAM_FIELDS, changes)
+
+
+def delete_exam(exam_id: str) -> int:
+    """删除考试编号匹配的全部记录，返回删除条数"""
+    with connect() as conn:
+        return conn.execute("DELETE FROM exams WHERE exam_id = ?", (exam_id,)).rowcount
+
+
+# ============ 配置 ============
+
+def _plain(value: Any) -> Any:
+    """把 numpy 标量、NaN 等转换为可 JSON 序列化的普通值"""
+    if hasattr(value, 'item'):
+        value = value.item()
+    if isinstance(value, float) and value != value:
+        return None
+    return value
+
+
+def load_config() -> Dict[str, Any]:
+    with connect() as conn:
+        rows = conn.execute("SELECT key, value FROM config ORDER BY seq").fetchall()
+    return {key: json.loads(value) for key, value in rows}
+
+
+def save_config(config_dict: Dict[str, Any]):
+    """用给定字典替换全部配置（保持键的顺序）"""
+    with connect() as conn:
+        conn.execute("DELETE FROM config")
+        conn.executemany("INSERT INTO config (key, value) VALUES (?, ?)",
+                         [(str(key), json.dumps(_plain(value), ensure_ascii=False))
+                          for key, value in config_dict.items()])
+
+
+# ============ 排班结果 ============
+
+def save_schedule_run(schedules: List[Schedule], source_ids: Optional[List[str]] = None,
+                      engine: Optional[str] = None, seed: Optional[int] = None,
+                      fingerprint: Optional[str] = None, unavailable_teachers: Iterable[str] = ()) -> int:
+    """
+    把一次排班结果保存为新的批次，返回批次号
+
+    source_ids: 每条排班对应的原始考试编号，默认与考场级编号相同
+    fingerprint: 本次排班输入数据的指纹
+    unavailable_teachers: 增量修复中标记为不可用的老师工号
+    """
+    with connect() as conn:
+        run_id = conn.execute(
+            "INSERT INTO schedule_runs (created_at, engine, seed, schedule_count, fingerprint, unavailable_teachers) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (datetime.now().isoformat(timespec='seconds'), engine, seed, len(schedules), fingerprint,
+             json.dumps(list(unavailable_teachers)))
+        ).lastrowid
+        _insert_schedules(conn, run_id, schedules, source_ids)
+        _prune_runs(conn)
+    return run_id
+
+
+def replace_schedule_run(run_id: int, schedules: List[Schedule], source_ids: Optional[List[str]] = None,
+                         fingerprint: Optional[str] = None, unavailable_teachers: Iterable[str] = ()):
+    """用新的结果替换一个批次的排班（增量修复后调用，fingerprint 为修改后输入数据的指纹）"""
+    with connect() as conn:
+        conn.execute("DELETE FROM schedules WHERE run_id = ?", (run_id,))
+        conn.execute("UPDATE schedule_runs SET schedule_count = ?, fingerprint = ?, unavailable_teachers = ? "
+                     "WHERE run_id = ?", (len(schedules), fingerprint, json.dumps(list(unavailable_teachers)), run_id))
+        _insert_schedules(conn, run_id, schedules, source_ids)
+
+
+def list_schedule_runs() -> List[Dict[str, Any]]:
+    """全部排班批次，新的在前"""
+    with connect() as conn:
+        rows = conn.execute("SELECT run_id, created_at, engine, seed, schedule_count "
+                            "FROM schedule_runs ORDER BY run_id DESC").fetchall()
+    return [dict(zip(('run_id', 'created_at', 'engine', 'seed', 'schedule_count'), row)) for row in rows]
+
+
+def find_schedule_run(fingerprint: str) -> Optional[Dict[str, Any]]:
+    """输入指纹相同的最新批次，没有时返回 None"""
+    with connect() as conn:
+        row = conn.execute(f"SELECT {_RUN_COLUMNS} FROM schedule_runs WHERE fingerprint = ? "
+                           "ORDER BY run_id DESC LIMIT 1", (fingerprint,)).fetchone()
+    return _run_info(row)
+
+
+def get_schedule_run(run_id: int) -> Optional[Dict[str, Any]]:
+    with connect() as conn:
+        row = conn.execute(f"SELECT {_RUN_COLUMNS} FROM schedule_runs WHERE run_id = ?", (run_id,)).fetchone()
+    return _run_info(row)
+
+
+def _run_info(row: Optional[tuple]) -> Optional[Dict[str, Any]]:
+    if row is None:
+        return None
+    run_id, engine, seed, fingerprint, unavailable = row
+    return {'run_id': run_id, 'engine': engine, 'seed': seed, 'fingerprint': fingerprint,
+            'unavailable_teachers': json.loads(unavailable) if unavailable else []}
+
+
+def load_schedule_run(run_id: int) -> Tuple[List[Schedule], List[str]]:
+    """读取一个批次的全部排班及对应的原始考试编号"""
+    with connect() as conn:
+        rows = _select_schedules(conn, ["s.run_id = ?"], [run_id])
+    return [schedule for schedule, _ in rows], [source_id for _, source_id in rows]
+
+
+def query_schedules(run_id: Optional[int] = None, date: Optional[str] = None, time_slot: Optional[str] = None,
+                    subject: Optional[str] = None, teacher_id: Optional[str] = None) -> List[Schedule]:
+    """
+    按条件查询一个批次的排班（默认当前发布的批次，没有时返回空列表），条件为 None 时不过滤
+
+    按老师查询时返回该老师参与的考场，每个考场仍包含全部监考老师
+    """
+    conditions = ["s.run_id = ?"]
+    params: List[Any] = []
+    for column, value in (('s.date', date), ('s.time_slot', time_slot), ('s.subject', subject)):
+        if value is not None:
+            conditions.append(f"{column} = ?")
+            params.append(value)
+    if teacher_id is not None:
+        conditions.append("s.seq IN (SELECT schedule_seq FROM schedule_teachers WHERE teacher_id = ?)")
+        params.append(teacher_id)
+
+    with connect() as conn:
+        if run_id is None:
+            # 与 get_state() 相同的当前批次：数据修改或重置后为空，不回退到旧批次
+            row = conn.execute("SELECT value FROM meta WHERE key = 'current_run'").fetchone()
+            if row is None or not row[0]:
+                return []
+            run_id = int(row[0])
+        rows = _select_schedules(conn, conditions, [run_id, *params])
+    return [schedule for schedule, _ in rows]
+
+
+# ============ 内部工具 ============
+
+def _insert(conn: sqlite3.Connection, table: str, fields: tuple, rows: Iterable[tuple]):
+    placeholders = ', '.join('?' * len(fields))
+    conn.executemany(f"INSERT INTO {table} ({', '.join(fields)}) VALUES ({placeholders})", rows)
+
+
+def _insert_chunks(conn: sqlite3.Connection, table: str, fields: tuple, chunks: Iterable[List[tuple]]) -> int:
+    count = 0
+    for rows in chunks:
+        _insert(conn, table, fields, rows)
+        count += len(rows)
+    return count
+
+
+def _insert_schedules(conn: sqlite3.Connection, run_id: int, schedules: List[Schedule],
+                      source_ids: Optional[List[str]]):
+    if source_ids is None:
+        source_ids = [s.exam.exam_id for s in schedules]
+    for schedule, source_id in zip(schedules, source_ids):
+        e = schedule.exam
+        seq = conn.execute(
+            "INSERT INTO schedules (run_id, source_exam_id, exam_id, exam_name, subject, date, time_slot, room, "
+            "required_teachers) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (run_id, source_id, e.exam_id, e.exam_name, e.subject, e.date, e.time_slot, e.room, e.required_teachers)
+        ).lastrowid
+        conn.executemany(
+            "INSERT INTO schedule_teachers (schedule_seq, position, teacher_id, name, title, phone, department) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(seq, i, *_teacher_row(t)) for i, t in enumerate(schedule.teachers)]
+        )
+
+
+def _select_schedules(conn: sqlite3.Connection, conditions: List[str], params: List[Any]) -> List[Tuple[Schedule, str]]:
+    """按条件读取排班，返回 (排班, 原始考试编号) 列表，保持保存时的顺序"""
+    rows = conn.execute(
+        "SELECT s.seq, s.source_exam_id, s.exam_id, s.exam_name, s.subject, s.date, s.time_slot, s.room, "
+        "s.required_teachers, t.teacher_id, t.name, t.title, t.phone, t.department "
+        "FROM schedules s LEFT JOIN schedule_teachers t ON t.schedule_seq = s.seq "
+        f"WHERE {' AND '.join(conditions)} ORDER BY s.seq, t.position",
+        params
+    ).fetchall()
+
+    schedules: Dict[int, Tuple[Schedule, str]] = {}
+    for seq, source_id, *exam_fields, tid, name, title, phone, department in rows:
+        entry = schedules.get(seq)
+        if entry is None:
+            entry = schedules[seq] = (Schedule(exam=Exam(*exam_fields), teachers=[]), source_id)
+        if tid is not None:
+            entry[0].teachers.append(Teacher(tid, name, title, phone, department))
+    return list(schedules.values())
+
+
+def _prune_runs(conn: sqlite3.Connection):
+    """只保留最新的 config.SCHEDULE_RUNS_KEEP 个批次和当前发布的批次，其余连同排班一起删除"""
+    keep = config.SCHEDULE_RUNS_KEEP
+    if not keep or keep <= 0:
+        return
+    conn.execute("DELETE FROM schedule_runs "
+                 "WHERE run_id NOT IN (SELECT run_id FROM schedule_runs ORDER BY run_id DESC LIMIT ?) "
+                 "AND run_id IS NOT (SELECT CAST(value AS INTEGER) FROM meta WHERE key = 'current_run')", (keep,))
+
+
+def _migrate(conn: sqlite3.Connection):
+    """给旧版本创建的数据库补充新增的列，并创建依赖这些列的索引"""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(schedule_runs)")}
+    if 'fingerprint' not in columns:
+        conn.execute("ALTER TABLE schedule_runs ADD COLUMN fingerprint TEXT")
+    if 'unavailable_teachers' not in columns:
+        conn.execute("ALTER TABLE schedule_runs ADD COLUMN unavailable_teachers TEXT")
+    # 恢复排班时按指纹查找最新的批次
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_schedule_runs_fingerprint ON schedule_runs(fingerprint, run_id)")
+
+
+def _update_first(conn: sqlite3.Connection, table: str, key_field: str, key: str,
+                  fields: tuple, changes: Dict[str, Any]) -> bool:
+    unknown = [name for name in changes if name not in fields or name == key_field]
+    if unknown:
+        raise ValueError(f"不能修改的字段: {unknown}")
+    seq = conn.execute(f"SELECT MIN(seq) FROM {table} WHERE {key_field} = ?", (key,)).fetchone()[0]
+    if seq is None:
+        return False
+    if changes:
+        assignments = ', '.join(f"{name} = ?" for name in changes)
+        conn.execute(f"UPDATE {table} SET {assignments} WHERE seq = ?", (*changes.values(), seq))
+    return True
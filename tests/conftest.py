@@ -0,0 +1,56 @@
+"""
+测试公共夹具：每个测试使用独立的临时数据目录和数据库，互不影响
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from models import Exam, Teacher
+
+TIME_SLOTS = ['08:30-10:30', '10:45-12:45', '14:00-16:00', '16:15-18:15']
+
+
+def make_teachers(count: int, prefix: str = 'T'):
+    return [Teacher(f'{prefix}{i:03d}', f'老师{prefix}{i}', '讲师', '13800000000', '数学系') for i in range(count)]
+
+
+def make_exams(count: int, days: int = 3, rooms: int = 2, required: int = 2):
+    return [Exam(f'E{i:03d}', f'考试{i}', f'科目{i}', f'2024-06-{10 + i % days:02d}',
+                 TIME_SLOTS[(i // days) % len(TIME_SLOTS)], '', required, rooms) for i in range(count)]
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """把数据目录、xlsx 文件、数据库和磁盘缓存都指向临时目录"""
+    monkeypatch.setattr(config, 'DATA_DIR', str(tmp_path))
+    for name in ('teachers', 'exams', 'schedule', 'config'):
+        monkeypatch.setattr(config, f'{name.upper()}_FILE', str(tmp_path / f'{name}.xlsx'))
+    monkeypatch.setattr(config, 'DB_FILE', str(tmp_path / 'scheduler.db'))
+    monkeypatch.setattr(config, 'RESULT_CACHE_DIR', str(tmp_path / 'cache'))
+    return tmp_path
+
+
+@pytest.fixture
+def app_module(data_dir, monkeypatch):
+    """重置了全局状态的 app 模块"""
+    import app as app_module
+    from result_cache import ResultCache
+    monkeypatch.setattr(app_module, 'scheduler_instance', None)
+    monkeypatch.setattr(app_module, 'published_snapshot', None)
+    monkeypatch.setattr(app_module, 'schedule_run_id', None)
+    monkeypatch.setattr(app_module, 'result_cache',
+                        ResultCache(config.RESULT_CACHE_SIZE, config.RESULT_CACHE_DIR, config.RESULT_CACHE_DISK_SIZE))
+    return app_module
+
+
+@pytest.fixture
+def client(app_module):
+    """已初始化示例数据的测试客户端"""
+    client = app_module.app.test_client()
+    assert client.get('/api/init').status_code == 200
+    return client
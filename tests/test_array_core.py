@@ -0,0 +1,41 @@
+import numpy as np
+
+from array_core import ArrayCore
+
+SLOTS = [('2024-06-10', '08:30-10:30'), ('2024-06-10', '10:45-12:45'), ('2024-06-10', '14:00-16:00'),
+         ('2024-06-11', '08:30-10:30')]
+
+
+def test_assign_and_release_keep_counts_in_sync():
+    core = ArrayCore(['A', 'B', 'C'], SLOTS)
+    core.assign(np.array([0, 1]), 0)
+    core.assign(np.array([0]), 3)
+    assert core.loads.tolist() == [2, 1, 0]
+    assert core.daily.tolist() == [[1, 1], [1, 0], [0, 0]]
+    assert core.candidates(0).tolist() == [2]
+
+    core.release(np.array([0]), 0)
+    assert core.loads.tolist() == [1, 1, 0]
+    assert core.candidates(0).tolist() == [0, 2]
+
+
+def test_candidates_apply_limits_and_exclusion():
+    core = ArrayCore(['A', 'B', 'C'], SLOTS)
+    core.assign(np.array([0]), 0)
+    core.assign(np.array([1]), 0)
+    core.assign(np.array([1]), 2)
+    # A 已监考 08:30，再排 10:45 会连续两场；B 当天已有两场
+    assert core.candidates(1, max_daily=2, max_consecutive=1).tolist() == [2]
+    core.exclude(2)
+    assert core.candidates(1).tolist() == [0, 1]
+
+
+def test_order_by_load_and_add_slot():
+    core = ArrayCore(['A', 'B', 'C'], SLOTS)
+    core.assign(np.array([0, 1]), 0)
+    ordered = core.order_by_load(np.array([0, 1, 2]), np.random.default_rng(0))
+    assert ordered[0] == 2
+    slot = core.add_slot('2024-06-10', '16:15-18:15')
+    assert slot == 3 and core.slots[slot] == ('2024-06-10', '16:15-18:15')
+    assert core.busy.shape == (3, 5) and core.busy[0, 0]
+    assert core.load_gap() == (1, 0)
@@ -0,0 +1,100 @@
+import itertools
+import random
+from collections import Counter
+
+import pytest
+
+from conftest import make_exams, make_teachers
+from flow_engine import rebalance_assignment, solve_balanced_assignment
+from scheduler import ExamScheduler
+
+
+def square_cost(assigned, n_teachers):
+    loads = [0] * n_teachers
+    for teachers in assigned:
+        for t in teachers:
+            loads[t] += 1
+    return sum(load * load for load in loads)
+
+
+def brute_force_cost(slot_available, slot_demand, n_teachers):
+    choices = [itertools.combinations(available, min(demand, len(available)))
+               for available, demand in zip(slot_available, slot_demand)]
+    return min(square_cost(assigned, n_teachers) for assigned in itertools.product(*choices))
+
+
+def respects_limits(assigned, n_teachers, slot_day, max_daily, max_consecutive):
+    for t in range(n_teachers):
+        held = [s for s, teachers in enumerate(assigned) if t in teachers]
+        daily = Counter(slot_day[s] for s in held)
+        if max_daily is not None and max(daily.values(), default=0) > max_daily:
+            return False
+        run = 0
+        for i, s in enumerate(held):
+            run = run + 1 if i and s == held[i - 1] + 1 and slot_day[s] == slot_day[held[i - 1]] else 1
+            if max_consecutive is not None and run > max_consecutive:
+                return False
+    return True
+
+
+def brute_force_max_seats(slot_available, slot_demand, n_teachers, slot_day, max_daily, max_consecutive):
+    choices = [[c for k in range(min(demand, len(available)) + 1) for c in itertools.combinations(available, k)]
+               for available, demand in zip(slot_available, slot_demand)]
+    return max(sum(map(len, assigned)) for assigned in itertools.product(*choices)
+               if respects_limits(assigned, n_teachers, slot_day, max_daily, max_consecutive))
+
+
+@pytest.mark.parametrize('seed', range(8))
+def test_flow_matches_brute_force_optimum(seed):
+    rng = random.Random(seed)
+    n_teachers = 5
+    slot_available = [sorted(rng.sample(range(n_teachers), rng.randint(2, n_teachers))) for _ in range(4)]
+    slot_demand = [rng.randint(1, 3) for _ in slot_available]
+    assigned = solve_balanced_assignment(slot_available, slot_demand, n_teachers, random.Random(0))
+
+    for available, demand, teachers in zip(slot_available, slot_demand, assigned):
+        assert len(teachers) == min(demand, len(available))
+        assert set(teachers) <= set(available) and len(set(teachers)) == len(teachers)
+    assert square_cost(assigned, n_teachers) == brute_force_cost(slot_available, slot_demand, n_teachers)
+
+
+@pytest.mark.parametrize('seed', range(24))
+def test_flow_fills_as_many_seats_as_possible_when_limits_bind(seed):
+    rng = random.Random(seed)
+    n_teachers = 4
+    slot_day = [0, 0, 0, 1]
+    slot_available = [sorted(rng.sample(range(n_teachers), rng.randint(2, n_teachers))) for _ in slot_day]
+    slot_demand = [rng.randint(1, 3) for _ in slot_day]
+    max_daily, max_consecutive = rng.choice([(2, 1), (1, None), (2, 2), (None, 1)])
+    assigned = solve_balanced_assignment(slot_available, slot_demand, n_teachers, random.Random(0),
+                                         slot_day=slot_day, max_daily=max_daily, max_consecutive=max_consecutive)
+
+    assert respects_limits(assigned, n_teachers, slot_day, max_daily, max_consecutive)
+    assert sum(map(len, assigned)) == brute_force_max_seats(slot_available, slot_demand, n_teachers,
+                                                            slot_day, max_daily, max_consecutive)
+
+
+def test_augmenting_path_lets_a_teacher_hand_over_a_slot():
+    # 贪心先让老师1监考前两个时间段，第三个时间段只剩老师0；老师1把第二个时间段让给老师2后才能补上
+    slot_available = [[1, 2, 3], [1, 2], [0, 1]]
+    assigned = solve_balanced_assignment(slot_available, [3, 1, 2], 4, random.Random(0),
+                                         slot_day=[0, 0, 0], max_daily=2, max_consecutive=2)
+    assert [sorted(teachers) for teachers in assigned] == [[1, 2, 3], [2], [0, 1]]
+
+
+def test_rebalance_reaches_optimum_from_skewed_start():
+    slot_available = [[0, 1, 2, 3]] * 4
+    skewed = [[0, 1]] * 4
+    assigned = rebalance_assignment(slot_available, skewed, 4)
+    assert square_cost(assigned, 4) == brute_force_cost(slot_available, [2] * 4, 4)
+
+
+def test_flow_engine_is_never_less_balanced_than_greedy():
+    exams = make_exams(20, days=4, rooms=4)
+    config = {'每个老师每天最多监考次数': 2, '连续监考最多场次': 1}
+    gaps = {}
+    for engine in ('greedy', 'flow'):
+        scheduler = ExamScheduler(make_teachers(45), exams, config, seed=9, engine=engine)
+        scheduler.schedule()
+        gaps[engine] = scheduler.get_statistics()['fairness']['stddev']
+    assert gaps['flow'] <= gaps['greedy']
@@ -0,0 +1,71 @@
+import gzip
+import json
+import os
+
+import pandas as pd
+
+import config
+
+
+def test_unchanged_poll_gets_304(client):
+    client.post('/api/schedule', json={'seed': 1})
+    for url in ('/api/schedule', '/api/statistics', '/api/teachers'):
+        response = client.get(url)
+        etag = response.headers['ETag']
+        assert response.headers['Cache-Control'] == 'no-cache'
+        again = client.get(url, headers={'If-None-Match': etag})
+        assert again.status_code == 304 and again.data == b''
+        assert again.headers['ETag'] == etag
+
+
+def test_mutation_bumps_version(client):
+    client.post('/api/schedule', json={'seed': 1})
+    etag = client.get('/api/schedule').headers['ETag']
+    client.post('/api/teachers', json={'id': 'NEW', 'name': '新老师', 'title': '', 'phone': '', 'department': ''})
+    response = client.get('/api/schedule', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert response.json['count'] == 0
+
+
+def test_edited_xlsx_is_synced_before_comparing(client):
+    etag = client.get('/api/teachers').headers['ETag']
+    assert client.get('/api/teachers', headers={'If-None-Match': etag}).status_code == 304
+    df = pd.read_excel(config.TEACHERS_FILE).iloc[:3]
+    df.to_excel(config.TEACHERS_FILE, index=False)
+    stat = os.stat(config.TEACHERS_FILE)
+    os.utime(config.TEACHERS_FILE, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+    response = client.get('/api/teachers', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.json['count'] == 3
+    assert response.headers['ETag'] != etag
+
+
+def test_gzip_negotiation(client):
+    client.post('/api/schedule', json={'seed': 1})
+    plain = client.get('/api/schedule')
+    assert 'Content-Encoding' not in plain.headers
+
+    compressed = client.get('/api/schedule', headers={'Accept-Encoding': 'gzip, br'})
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in compressed.headers['Vary']
+    assert compressed.headers['ETag'] == plain.headers['ETag'][:-1] + '-gz"'
+    assert json.loads(gzip.decompress(compressed.data)) == plain.json
+    # 任一表示的 ETag 都可用于重新验证
+    assert client.get('/api/schedule', headers={'If-None-Match': compressed.headers['ETag'],
+                                                 'Accept-Encoding': 'gzip'}).status_code == 304
+
+    small = client.get('/api/health', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in small.headers
+
+
+def test_vary_is_set_on_every_representation(client):
+    client.post('/api/schedule', json={'seed': 1})
+    plain = client.get('/api/schedule')
+    assert 'Content-Encoding' not in plain.headers
+    assert 'Accept-Encoding' in plain.headers['Vary']
+    assert 'Accept-Encoding' in client.get('/api/health', headers={'Accept-Encoding': 'gzip'}).headers['Vary']
+
+    not_modified = client.get('/api/schedule', headers={'If-None-Match': plain.headers['ETag']})
+    assert not_modified.status_code == 304 and 'Accept-Encoding' in not_modified.headers['Vary']
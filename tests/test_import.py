@@ -0,0 +1,70 @@
+import io
+
+import pandas as pd
+import pytest
+
+import storage
+import utils
+from conftest import make_teachers
+
+
+def upload(client, url, df):
+    data = io.BytesIO()
+    df.to_excel(data, index=False)
+    data.seek(0)
+    return client.post(url, data={'file': (data, 'import.xlsx')}, content_type='multipart/form-data')
+
+
+def exam_frame(count, bad_row=None):
+    rooms = [2] * count
+    if bad_row is not None:
+        rooms[bad_row] = 'abc'
+    return pd.DataFrame({
+        '考试编号': [f'X{i}' for i in range(count)], '考试名称': ['导入'] * count, '科目': [f'S{i}' for i in range(count)],
+        '日期': ['2024-07-01'] * count, '时间段': ['08:30-10:30'] * count, '考场数': rooms
+    })
+
+
+def test_import_skips_existing_ids(data_dir):
+    storage.add_teachers(make_teachers(2))
+    chunks = [make_teachers(3), make_teachers(1, prefix='N')]
+    assert storage.import_teachers(iter(chunks)) == 2
+    assert [t.teacher_id for t in storage.load_teachers()] == ['T000', 'T001', 'T002', 'N000']
+
+
+def test_failed_import_rolls_back_written_chunks(data_dir):
+    def chunks():
+        yield make_teachers(5)
+        raise ValueError('Row 7: bad value')
+
+    with pytest.raises(ValueError):
+        storage.import_teachers(chunks())
+    assert storage.count_teachers() == 0
+
+
+def test_exam_import_endpoint_is_all_or_nothing(client):
+    before = len(utils.load_exams())
+    response = upload(client, '/api/exams/import', exam_frame(1500, bad_row=1400))
+    assert response.status_code == 400
+    assert 'Row 1402' in response.json['error']
+    assert len(storage.load_exams()) == before
+
+    response = upload(client, '/api/exams/import', exam_frame(1500))
+    assert response.json['count'] == 1500
+    assert len(storage.load_exams()) == before + 1500
+
+
+def test_stream_reader_checks_header_and_chunks():
+    from utils import iter_exam_import
+    data = io.BytesIO()
+    exam_frame(5).to_excel(data, index=False)
+    data.seek(0)
+    chunks = list(iter_exam_import(data, chunk_size=2))
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+    assert chunks[-1][0].exam_id == 'X4' and chunks[-1][0].rooms_count == 2
+
+    data = io.BytesIO()
+    exam_frame(2).drop(columns=['科目']).to_excel(data, index=False)
+    data.seek(0)
+    with pytest.raises(ValueError, match='科目'):
+        next(iter_exam_import(data))
@@ -0,0 +1,83 @@
+import time
+
+import pytest
+
+import storage
+
+
+def wait_for(client, job_id, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = client.get(f'/api/jobs/{job_id}').json['data']
+        if job['status'] not in ('queued', 'running'):
+            return job
+        time.sleep(0.02)
+    raise AssertionError('job did not finish')
+
+
+def test_async_job_publishes_result(client):
+    response = client.post('/api/schedule', json={'async': True, 'seed': 1})
+    assert response.status_code == 202
+    job = wait_for(client, response.json['job_id'])
+    assert job['status'] == 'done' and job['percent'] == 100.0
+    assert client.get('/api/schedule').json['count'] == job['result']['count']
+
+
+def test_data_change_during_run_is_not_published(client, app_module, monkeypatch):
+    original = app_module.ExamScheduler.schedule
+    edits = []
+
+    def schedule_then_edit(self, *args, **kwargs):
+        result = original(self, *args, **kwargs)
+        # 排班计算期间有人修改了数据
+        edits.append(f'LATE{len(edits)}')
+        client.post('/api/teachers', json={'id': edits[-1], 'name': '新老师', 'title': '', 'phone': '', 'department': ''})
+        return result
+
+    monkeypatch.setattr(app_module.ExamScheduler, 'schedule', schedule_then_edit)
+    response = client.post('/api/schedule', json={'async': True, 'seed': 1, 'cache': False})
+    job = wait_for(client, response.json['job_id'])
+    assert job['status'] == 'failed' and 'changed' in job['error']
+    assert client.get('/api/schedule').json['count'] == 0
+    assert storage.get_state()[1] is None
+
+    response = client.post('/api/schedule', json={'seed': 1, 'cache': False})
+    assert response.status_code == 409
+
+
+def test_concurrent_runs_publish_once(client, app_module):
+    first = app_module.prepare_schedule({'seed': 1})
+    second = app_module.prepare_schedule({'seed': 2})
+    snapshot, _ = app_module.run_schedule(*first)
+    with pytest.raises(app_module.StaleSchedule):
+        app_module.run_schedule(*second)
+    assert app_module.get_snapshot().version == snapshot.version
+    assert storage.get_state()[1] == app_module.schedule_run_id
+
+
+def test_version_compare_and_advance_is_atomic(data_dir):
+    assert storage.advance_state(None, expected_version=0) == 1
+    assert storage.advance_state(None, expected_version=0) is None
+    assert storage.advance_state(3, expected_version=1) == 2
+    assert storage.get_state() == (2, 3)
+
+
+def test_cancel_and_unknown_job(client, app_module, monkeypatch):
+    import threading
+    started = threading.Event()
+    original = app_module.ExamScheduler.schedule
+
+    def slow_schedule(self, progress=None, cancel=None):
+        started.set()
+        cancel.wait(5)
+        return original(self, progress=progress, cancel=cancel)
+
+    monkeypatch.setattr(app_module.ExamScheduler, 'schedule', slow_schedule)
+    job_id = client.post('/api/schedule', json={'async': True, 'cache': False}).json['job_id']
+    assert started.wait(5)
+    assert client.post(f'/api/jobs/{job_id}/cancel').status_code == 200
+    assert wait_for(client, job_id)['status'] == 'cancelled'
+    assert client.get('/api/schedule').json['count'] == 0
+
+    assert client.get('/api/jobs/missing').status_code == 404
+    assert client.post('/api/jobs/missing/cancel').status_code == 404
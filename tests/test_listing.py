@@ -0,0 +1,63 @@
+def test_pagination_and_cursor(client):
+    client.post('/api/schedule', json={'seed': 1})
+    full = client.get('/api/schedule').json
+    assert 'next_cursor' not in full
+
+    page = client.get('/api/schedule?limit=5').json
+    assert page['data'] == full['data'][:5] and page['total'] == full['total']
+    collected = list(page['data'])
+    while page['next_cursor']:
+        page = client.get(f"/api/schedule?cursor={page['next_cursor']}&limit=5").json
+        collected.extend(page['data'])
+    assert collected == full['data']
+    assert client.get('/api/schedule?offset=3&limit=2').json['data'] == full['data'][3:5]
+
+
+def test_stale_cursor_is_rejected(client):
+    client.post('/api/schedule', json={'seed': 1})
+    cursor = client.get('/api/schedule?limit=2').json['next_cursor']
+    client.post('/api/schedule', json={'seed': 2})
+    response = client.get(f'/api/schedule?cursor={cursor}')
+    assert response.status_code == 400 and 'stale' in response.json['error']
+
+
+def test_filters_and_fields(client):
+    client.post('/api/schedule', json={'seed': 1})
+    full = client.get('/api/schedule').json['data']
+    date = full[0]['date']
+    teacher_id = full[0]['teachers'][0]['id']
+
+    body = client.get(f'/api/schedule?date={date}&teacher_id={teacher_id}&fields=exam_id,room').json
+    expected = [{'exam_id': s['exam_id'], 'room': s['room']} for s in full
+                if s['date'] == date and teacher_id in [t['id'] for t in s['teachers']]]
+    assert body['data'] == expected
+
+    teachers = client.get('/api/teachers?fields=id,exam_count&limit=3').json
+    assert teachers['count'] == 3 and set(teachers['data'][0]) == {'id', 'exam_count'}
+
+
+def test_bad_listing_arguments(client):
+    for query in ('limit=0', 'limit=x', 'offset=-1', 'cursor=bad', 'fields=nope'):
+        assert client.get(f'/api/schedule?{query}').status_code == 400, query
+    assert client.get('/api/teachers?fields=secret').status_code == 400
+
+
+def test_limit_is_capped(client, monkeypatch):
+    import config
+    monkeypatch.setattr(config, 'API_MAX_PAGE_SIZE', 3)
+    client.post('/api/schedule', json={'seed': 1})
+    assert client.get('/api/schedule?limit=100').json['count'] == 3
+
+
+def test_shortfall_is_reported_with_the_schedule(client):
+    # 示例数据只有 8 位老师，每个时间段需要 12 人
+    posted = client.post('/api/schedule', json={'seed': 1}).json
+    body = client.get('/api/schedule?limit=1').json
+    assert body['shortfall'] == posted['shortfall'] and body['shortfall']
+    slots = {(s['date'], s['time_slot']) for s in client.get('/api/schedule').json['data']}
+    for item in body['shortfall']:
+        assert 0 < item['assigned'] < item['required']
+        assert (item['date'], item['time_slot']) in slots
+
+    stats = client.get('/api/statistics').json['stats']
+    assert stats['shortfall'] == body['shortfall'] and stats['understaffed_exams'] > 0
@@ -0,0 +1,27 @@
+from conftest import make_teachers
+from models import Exam, Schedule, TeacherSchedule
+
+
+def schedule_at(date, time_slot):
+    return Schedule(exam=Exam('E', '考试', '科目', date, time_slot, '考场1'), teachers=[])
+
+
+def test_occupancy_index_tracks_added_schedules():
+    existing = schedule_at('2024-06-10', '08:30-10:30')
+    table = TeacherSchedule(teacher=make_teachers(1)[0], schedules=[existing])
+    assert table.has_conflict(existing.exam)
+    assert not table.has_conflict_by_time('2024-06-10', '10:45-12:45')
+
+    table.add_schedule(schedule_at('2024-06-10', '10:45-12:45'))
+    assert table.has_conflict_by_time('2024-06-10', '10:45-12:45')
+    assert table.get_daily_exam_count('2024-06-10') == 2
+    assert table.get_daily_exam_count('2024-06-11') == 0
+
+
+def test_consecutive_count_uses_day_slots():
+    table = TeacherSchedule(teacher=make_teachers(1)[0], schedules=[
+        schedule_at('2024-06-10', '08:30-10:30'), schedule_at('2024-06-10', '14:00-16:00')])
+    day_slots = ['08:30-10:30', '10:45-12:45', '14:00-16:00', '16:15-18:15']
+    # 填上中间的时间段后三场连续
+    assert table.get_consecutive_count_by_time('2024-06-10', '10:45-12:45', day_slots) == 3
+    assert table.get_consecutive_count_by_time('2024-06-10', '16:15-18:15', day_slots) == 2
@@ -0,0 +1,72 @@
+import storage
+from conftest import make_exams, make_teachers
+from scheduler import ExamScheduler
+
+
+def teacher_ids(schedules):
+    return {t.teacher_id for s in schedules for t in s.teachers}
+
+
+def test_unavailable_teacher_survives_restore():
+    teachers = make_teachers(10)
+    exams = make_exams(6, days=2, rooms=2)
+    scheduler = ExamScheduler(teachers, exams, seed=2)
+    scheduler.schedule()
+    removed = next(iter(teacher_ids(scheduler.final_schedules)))
+    scheduler.remove_teacher(removed)
+
+    restored = ExamScheduler(make_teachers(10), exams, seed=2)
+    restored.restore(scheduler.final_schedules, scheduler.get_source_exam_ids(), scheduler.unavailable_teachers)
+    assert restored.unavailable_teachers == [removed]
+    assert removed not in {s['teacher_id'] for s in restored.get_statistics()['teacher_stats']}
+
+    # 之后的修复不会再把该老师排进来
+    other = next(iter(teacher_ids(restored.final_schedules)))
+    restored.remove_teacher(other)
+    restored.repair_exam(exams[0])
+    assert removed not in teacher_ids(restored.final_schedules)
+
+
+def test_repair_endpoint_persists_exclusion(client, app_module):
+    assert client.post('/api/schedule', json={'seed': 1}).status_code == 200
+    removed = client.get('/api/schedule').json['data'][0]['teachers'][0]['id']
+    assert client.post('/api/schedule/repair', json={'teacher_id': removed}).json['success']
+
+    run = storage.get_schedule_run(storage.get_state()[1])
+    assert run['unavailable_teachers'] == [removed]
+
+    # 模拟另一个进程：丢弃本进程状态后从数据库恢复，再修复另一位老师
+    app_module.published_snapshot = None
+    app_module.scheduler_instance = None
+    other = next(t['id'] for s in client.get('/api/schedule').json['data'] for t in s['teachers'])
+    assert client.post('/api/schedule/repair', json={'teacher_id': other}).json['success']
+    seated = {t['id'] for s in client.get('/api/schedule').json['data'] for t in s['teachers']}
+    assert removed not in seated and other not in seated
+
+
+def test_repair_exam_only_touches_that_exam():
+    exams = make_exams(6, days=2, rooms=2)
+    scheduler = ExamScheduler(make_teachers(14), exams, seed=3)
+    scheduler.schedule()
+    before = {s.exam.exam_id: [t.teacher_id for t in s.teachers] for s in scheduler.final_schedules}
+
+    changed = exams[0]
+    moved = type(changed)(changed.exam_id, changed.exam_name, changed.subject, '2024-06-20', changed.time_slot,
+                          '', changed.required_teachers, 3)
+    repaired = scheduler.repair_exam(moved)
+    assert len(repaired) == 3 and {s.exam.date for s in repaired} == {'2024-06-20'}
+
+    after = {s.exam.exam_id: [t.teacher_id for t in s.teachers] for s in scheduler.final_schedules}
+    untouched = {key: value for key, value in before.items() if not key.startswith(f'{changed.exam_id}_')}
+    assert {key: after[key] for key in untouched} == untouched
+    assert scheduler.get_statistics()['scheduled_exams'] == len(scheduler.final_schedules)
+
+
+def test_delete_exam_with_repair_keeps_schedule(client):
+    client.post('/api/schedule', json={'seed': 1})
+    schedule = client.get('/api/schedule').json['data']
+    exam_id = schedule[0]['exam_id'].split('_')[0]
+    assert client.delete(f'/api/exams/{exam_id}?repair=1').json['success']
+    remaining = client.get('/api/schedule').json['data']
+    assert remaining and all(not s['exam_id'].startswith(f'{exam_id}_') for s in remaining)
+    assert len(remaining) < len(schedule)
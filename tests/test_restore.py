@@ -0,0 +1,57 @@
+import pytest
+
+import storage
+
+
+def restart(app_module):
+    """模拟服务重启：丢弃进程内的全部排班状态"""
+    app_module.scheduler_instance = None
+    app_module.published_snapshot = None
+    app_module.schedule_run_id = None
+
+
+def test_saved_schedule_is_restored_after_restart(client, app_module):
+    client.post('/api/schedule', json={'seed': 5, 'engine': 'flow'})
+    before = client.get('/api/schedule').json['data']
+    statistics = client.get('/api/statistics').json
+
+    restart(app_module)
+    assert client.get('/api/schedule').json['data'] == before
+    assert client.get('/api/statistics').json == statistics
+    assert app_module.scheduler_instance.engine == 'flow' and app_module.scheduler_instance.seed == 5
+
+
+def test_changed_inputs_are_not_restored_until_reverted(client, app_module):
+    client.post('/api/schedule', json={'seed': 5})
+    before = client.get('/api/schedule').json['data']
+    teacher = {'id': 'TMP', 'name': '临时', 'title': '', 'phone': '', 'department': ''}
+    client.post('/api/teachers', json=teacher)
+
+    restart(app_module)
+    assert client.get('/api/schedule').json['count'] == 0
+
+    # 数据改回原样后，按输入指纹找回保存的排班
+    client.delete('/api/teachers/TMP')
+    restart(app_module)
+    assert client.get('/api/schedule').json['data'] == before
+    assert storage.get_state()[1] is not None
+
+
+@pytest.mark.parametrize('clear', [lambda c: c.post('/api/reset'), lambda c: c.get('/api/init')],
+                         ids=['reset', 'init'])
+def test_reset_stays_empty(client, app_module, clear):
+    client.post('/api/schedule', json={'seed': 5})
+    assert client.get('/api/schedule').json['count'] > 0
+
+    assert clear(client).status_code == 200
+    body = client.get('/api/schedule').json
+    assert body['count'] == 0 and body['message'] == 'No schedule yet'
+    assert client.get('/api/schedule/query').json['count'] == 0
+    # 重启后也不按输入指纹恢复
+    restart(app_module)
+    assert client.get('/api/schedule').json['count'] == 0
+
+    # 重新排班后恢复正常
+    client.post('/api/schedule', json={'seed': 5})
+    restart(app_module)
+    assert client.get('/api/schedule').json['count'] > 0
@@ -0,0 +1,41 @@
+import os
+import time
+
+from result_cache import ResultCache, cache_key
+
+
+def test_memory_lru_and_disk_tier(tmp_path):
+    cache = ResultCache(capacity=2, disk_dir=str(tmp_path), disk_capacity=10)
+    for name in 'abc':
+        cache.put(name, {'value': name})
+    assert list(cache._entries) == ['b', 'c']
+    # 内存中已淘汰的结果从磁盘读回
+    assert cache.get('a') == {'value': 'a'}
+    assert ResultCache(capacity=2, disk_dir=str(tmp_path)).get('b') == {'value': 'b'}
+    assert cache.get('missing') is None
+
+
+def test_disk_tier_is_bounded(tmp_path):
+    cache = ResultCache(capacity=1, disk_dir=str(tmp_path), disk_capacity=3)
+    started = time.time()
+    for i in range(5):
+        cache.put(f'k{i}', i)
+        # 依次递增的修改时间（都早于下一次写入），按最久未使用淘汰
+        os.utime(tmp_path / f'k{i}.pkl', (started - 100 + i, started - 100 + i))
+    assert sorted(os.listdir(tmp_path)) == ['k2.pkl', 'k3.pkl', 'k4.pkl']
+
+
+def test_key_covers_inputs_and_version():
+    key = cache_key('fp', 1, 'greedy')
+    assert key == cache_key('fp', 1, 'greedy')
+    assert len({key, cache_key('fp', 2, 'greedy'), cache_key('fp', 1, 'flow'), cache_key('other', 1, 'greedy')}) == 4
+
+
+def test_schedule_endpoint_reports_cache_status(client):
+    first = client.post('/api/schedule', json={'seed': 3})
+    assert first.headers['X-Schedule-Cache'] == 'miss'
+    second = client.post('/api/schedule', json={'seed': 3})
+    assert second.headers['X-Schedule-Cache'] == 'hit'
+    assert second.json['data'] == first.json['data']
+    assert client.post('/api/schedule', json={'seed': 3, 'cache': False}).headers['X-Schedule-Cache'] == 'bypass'
+    assert client.post('/api/schedule', json={'seed': 4}).headers['X-Schedule-Cache'] == 'miss'
@@ -0,0 +1,63 @@
+import math
+from collections import Counter
+
+import pytest
+
+from conftest import make_exams, make_teachers
+from scheduler import ExamScheduler
+
+
+def recomputed(scheduler, available):
+    """从排班结果直接重新统计，作为增量统计的对照"""
+    counts = Counter(t.teacher_id for s in scheduler.final_schedules for t in s.teachers)
+    loads = [counts.get(tid, 0) for tid in available]
+    mean = sum(loads) / len(loads)
+    dates = Counter(s.exam.date for s in scheduler.final_schedules)
+    return {
+        'scheduled_exams': len(scheduler.final_schedules),
+        'loads': {tid: counts.get(tid, 0) for tid in available},
+        'date_counts': dict(dates),
+        'max': max(loads), 'min': min(loads),
+        'stddev': round(math.sqrt(sum((x - mean) ** 2 for x in loads) / len(loads)), 4),
+    }
+
+
+def incremental(scheduler):
+    stats = scheduler.get_statistics()
+    return {
+        'scheduled_exams': stats['scheduled_exams'],
+        'loads': {t['teacher_id']: t['exam_count'] for t in stats['teacher_stats']},
+        'date_counts': {date: item['count'] for date, item in stats['date_stats'].items()},
+        'max': stats['fairness']['max'], 'min': stats['fairness']['min'],
+        'stddev': stats['fairness']['stddev'],
+    }
+
+
+@pytest.mark.parametrize('engine', ['greedy', 'flow'])
+def test_incremental_statistics_match_recomputation(engine):
+    teachers = make_teachers(16)
+    exams = make_exams(9, days=3, rooms=2)
+    scheduler = ExamScheduler(teachers, exams, seed=6, engine=engine)
+    scheduler.schedule()
+    available = [t.teacher_id for t in teachers]
+    assert incremental(scheduler) == recomputed(scheduler, available)
+    assert scheduler.get_statistics()['total_exams'] == 18
+
+    removed = scheduler.final_schedules[0].teachers[0].teacher_id
+    scheduler.remove_teacher(removed)
+    available.remove(removed)
+    assert incremental(scheduler) == recomputed(scheduler, available)
+
+    scheduler.drop_exam(exams[1].exam_id)
+    moved = type(exams[2])(exams[2].exam_id, exams[2].exam_name, exams[2].subject, '2024-06-30',
+                           exams[2].time_slot, '', 2, 1)
+    scheduler.repair_exam(moved)
+    assert incremental(scheduler) == recomputed(scheduler, available)
+    assert scheduler.get_statistics()['total_exams'] == 18 - 2 - 2 + 1
+
+
+def test_gini_is_zero_when_balanced():
+    scheduler = ExamScheduler(make_teachers(12), make_exams(6, days=3, rooms=1), seed=1)
+    scheduler.schedule()
+    fairness = scheduler.get_statistics()['fairness']
+    assert fairness['gap'] == 0 and fairness['gini'] == 0.0 and fairness['mean'] == 1.0
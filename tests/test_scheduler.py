@@ -0,0 +1,181 @@
+from collections import Counter
+
+import pytest
+
+from conftest import make_exams, make_teachers
+from scheduler import ExamScheduler
+
+
+def slot_teacher_ids(scheduler):
+    seated = {}
+    for schedule in scheduler.final_schedules:
+        key = (schedule.exam.date, schedule.exam.time_slot)
+        seated.setdefault(key, []).extend(t.teacher_id for t in schedule.teachers)
+    return seated
+
+
+@pytest.mark.parametrize('engine', ['greedy', 'flow'])
+def test_duplicate_teacher_id_is_seated_once_per_slot(engine):
+    teachers = make_teachers(12)
+    # 同一工号在数据中出现多行
+    teachers += [type(t)(t.teacher_id, t.name, t.title, t.phone, t.department) for t in teachers[:6]]
+    scheduler = ExamScheduler(teachers, make_exams(9, days=3, rooms=3), seed=3, engine=engine)
+    scheduler.schedule()
+    assert scheduler.final_schedules
+    for key, ids in slot_teacher_ids(scheduler).items():
+        assert max(Counter(ids).values()) == 1, key
+
+
+def test_repair_keeps_duplicate_ids_apart():
+    teachers = make_teachers(8)
+    teachers += [type(t)(t.teacher_id, t.name, t.title, t.phone, t.department) for t in teachers]
+    exams = make_exams(3, days=1, rooms=2)
+    scheduler = ExamScheduler(teachers, exams, seed=5)
+    scheduler.schedule()
+    scheduler.remove_teacher(teachers[0].teacher_id)
+    for key, ids in slot_teacher_ids(scheduler).items():
+        assert max(Counter(ids).values()) == 1, key
+        assert teachers[0].teacher_id not in ids
+
+
+def test_parallel_requires_flow_engine():
+    with pytest.raises(ValueError):
+        ExamScheduler(make_teachers(10), make_exams(6), engine='greedy', workers=2)
+
+
+def test_small_parallel_request_runs_serial_flow(monkeypatch):
+    import scheduler as scheduler_module
+    teachers = make_teachers(30)
+    exams = make_exams(12, days=4, rooms=3)
+    serial = ExamScheduler(teachers, exams, seed=7, engine='flow')
+    serial.schedule()
+    monkeypatch.setattr(scheduler_module, 'ProcessPoolExecutor', None)
+    parallel = ExamScheduler(make_teachers(30), exams, seed=7, engine='flow', workers=4)
+    parallel.schedule()
+    assert slot_teacher_ids(parallel) == slot_teacher_ids(serial)
+
+
+def test_parallel_flow_is_as_balanced_as_serial(monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+    import config
+    import scheduler as scheduler_module
+    monkeypatch.setattr(config, 'PARALLEL_MIN_SEATS', 0)
+    monkeypatch.setattr(scheduler_module.os, 'cpu_count', lambda: 4)
+    monkeypatch.setattr(scheduler_module, 'ProcessPoolExecutor', ThreadPoolExecutor)
+    exams = make_exams(16, days=4, rooms=3)
+    serial = ExamScheduler(make_teachers(25), exams, seed=4, engine='flow')
+    serial.schedule()
+    parallel = ExamScheduler(make_teachers(25), exams, seed=4, engine='flow', workers=2)
+    parallel.schedule()
+    assert parallel.get_statistics()['fairness']['gap'] == serial.get_statistics()['fairness']['gap']
+    for key, ids in slot_teacher_ids(parallel).items():
+        assert len(ids) == len(set(ids)), key
+
+
+def loads(scheduler):
+    return [t.exam_count for t in scheduler.teachers]
+
+
+def test_greedy_picks_least_loaded_teachers():
+    scheduler = ExamScheduler(make_teachers(20), make_exams(12, days=3, rooms=3), seed=11)
+    scheduler.schedule()
+    counts = loads(scheduler)
+    assert sum(counts) == 12 * 3 * 2
+    assert max(counts) - min(counts) <= 1
+
+
+def assignment(scheduler):
+    return [(s.exam.exam_id, [t.teacher_id for t in s.teachers]) for s in scheduler.final_schedules]
+
+
+@pytest.mark.parametrize('engine', ['greedy', 'flow'])
+def test_same_seed_gives_same_schedule(engine):
+    exams = make_exams(12, days=3, rooms=3)
+    runs = []
+    for _ in range(2):
+        scheduler = ExamScheduler(make_teachers(25), exams, seed=42, engine=engine)
+        scheduler.schedule()
+        runs.append(assignment(scheduler))
+    assert runs[0] == runs[1]
+
+    # 同一个调度器再次排班也得到相同结果
+    scheduler = ExamScheduler(make_teachers(25), exams, seed=42, engine=engine)
+    scheduler.schedule()
+    scheduler.schedule()
+    assert assignment(scheduler) == runs[0]
+
+
+def test_different_seeds_differ():
+    exams = make_exams(12, days=3, rooms=3)
+    results = set()
+    for seed in range(3):
+        scheduler = ExamScheduler(make_teachers(25), exams, seed=seed)
+        scheduler.schedule()
+        results.add(repr(assignment(scheduler)))
+    assert len(results) > 1
+
+
+@pytest.mark.parametrize('engine', ['greedy', 'flow'])
+def test_daily_and_consecutive_limits_hold(engine):
+    config = {'每个老师每天最多监考次数': 2, '连续监考最多场次': 1}
+    scheduler = ExamScheduler(make_teachers(30), make_exams(16, days=2, rooms=3), config, seed=8, engine=engine)
+    scheduler.schedule()
+    slots = ['08:30-10:30', '10:45-12:45', '14:00-16:00', '16:15-18:15']
+    for table in scheduler.teacher_schedules.values():
+        by_date = {}
+        for schedule in table.schedules:
+            by_date.setdefault(schedule.exam.date, []).append(slots.index(schedule.exam.time_slot))
+        for positions in by_date.values():
+            assert len(positions) <= 2
+            positions.sort()
+            assert all(b - a > 1 for a, b in zip(positions, positions[1:]))
+
+
+def test_limits_leave_rooms_unfilled_rather_than_break():
+    config = {'每个老师每天最多监考次数': 1}
+    scheduler = ExamScheduler(make_teachers(4), make_exams(4, days=1, rooms=1), config, seed=1)
+    scheduler.schedule()
+    assert sum(len(s.teachers) for s in scheduler.final_schedules) == 4
+    assert max(loads(scheduler)) == 1
+
+
+def tight_exams():
+    """前一天的监考让老师负载不同；第二天三个相邻时间段，最后一个时间段要用到全部老师"""
+    make = type(make_exams(1)[0])
+    return [make('E1', '期中', '语文', '2024-06-10', '08:30-10:30', '', 2, 1),
+            make('E2', '期中', '数学', '2024-06-11', '08:30-10:30', '', 2, 1),
+            make('E3', '期中', '英语', '2024-06-11', '10:45-12:45', '', 2, 1),
+            make('E4', '期中', '物理', '2024-06-11', '14:00-16:00', '', 2, 2)]
+
+
+@pytest.mark.parametrize('engine', ['greedy', 'flow'])
+@pytest.mark.parametrize('seed', range(10))
+def test_tight_but_feasible_limits_fill_every_room(engine, seed):
+    config = {'每个老师每天最多监考次数': 3, '连续监考最多场次': 2}
+    scheduler = ExamScheduler(make_teachers(4), tight_exams(), config, seed=seed, engine=engine)
+    scheduler.schedule()
+    assert len(scheduler.final_schedules) == 5
+    assert all(len(s.teachers) == 2 for s in scheduler.final_schedules)
+    stats = scheduler.get_statistics()
+    assert stats['unscheduled_exams'] == 0 and stats['understaffed_exams'] == 0 and stats['shortfall'] == []
+
+
+@pytest.mark.parametrize('engine', ['greedy', 'flow'])
+def test_too_few_teachers_spread_over_the_day(engine):
+    # 与示例数据相同的规模：8 位老师，同一天三个相邻时间段各需要 12 人
+    config = {'每个老师每天最多监考次数': 3, '连续监考最多场次': 2}
+    exams = make_exams(3, days=1, rooms=6)
+    scheduler = ExamScheduler(make_teachers(8), exams, config, seed=1, engine=engine)
+    scheduler.schedule()
+
+    seated = slot_teacher_ids(scheduler)
+    assert len(seated) == 3 and all(len(ids) >= 4 for ids in seated.values())
+    # 每位老师最多监考两个时间段，16 人次全部用上，每个考场至多一位老师
+    assert sum(len(ids) for ids in seated.values()) == 16
+    assert all(len(s.teachers) == 1 for s in scheduler.final_schedules)
+
+    stats = scheduler.get_statistics()
+    assert stats['unscheduled_exams'] == 18 - 16
+    assert stats['understaffed_exams'] == 16
+    assert [(item['required'], item['assigned']) for item in stats['shortfall']] == \
+        [(12, len(seated[key])) for key in sorted(seated)]
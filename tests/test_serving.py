@@ -0,0 +1,44 @@
+import json
+import os
+import subprocess
+import sys
+
+import config
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 在另一个进程（相当于另一个 worker）中使用同一个数据目录排班
+WORKER = """
+import json, sys
+sys.path.insert(0, {root!r})
+import config
+config.DATA_DIR = {data_dir!r}
+for name in ('teachers', 'exams', 'schedule', 'config'):
+    setattr(config, name.upper() + '_FILE', {data_dir!r} + '/' + name + '.xlsx')
+config.DB_FILE = {data_dir!r} + '/scheduler.db'
+config.RESULT_CACHE_DIR = {data_dir!r} + '/cache'
+from wsgi import application
+response = application.test_client().post('/api/schedule', json={{'seed': 9}})
+print(json.dumps(response.get_json()['data']))
+"""
+
+
+def test_workers_share_the_published_schedule(client, data_dir):
+    client.post('/api/schedule', json={'seed': 1})
+    etag = client.get('/api/schedule').headers['ETag']
+
+    script = WORKER.format(root=ROOT, data_dir=str(data_dir))
+    output = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True)
+    published = json.loads(output.stdout.strip().splitlines()[-1])
+
+    response = client.get('/api/schedule', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.json['data'] == published
+
+
+def test_parse_args_defaults(app_module):
+    args = app_module.parse_args([])
+    assert (args.serve, args.host, args.port, args.threads) == \
+        (False, config.SERVER_HOST, config.SERVER_PORT, config.SERVE_THREADS)
+    args = app_module.parse_args(['--serve', '--port', '8080', '--threads', '4', '--no-browser'])
+    assert args.serve and args.port == 8080 and args.threads == 4 and args.no_browser
@@ -0,0 +1,75 @@
+import dataclasses
+
+import pytest
+
+from conftest import make_exams, make_teachers
+from scheduler import ExamScheduler
+from snapshot import ScheduleSnapshot, empty_snapshot
+
+
+def serialize(schedule):
+    return {'exam_id': schedule.exam.exam_id, 'teachers': [t.teacher_id for t in schedule.teachers]}
+
+
+@pytest.fixture
+def scheduled():
+    scheduler = ExamScheduler(make_teachers(12), make_exams(6, rooms=2), seed=1)
+    scheduler.schedule()
+    return scheduler
+
+
+def test_snapshot_is_isolated_from_later_repairs(scheduled):
+    snapshot = ScheduleSnapshot.from_scheduler(scheduled, 7, serialize)
+    listed = [dict(item) for item in snapshot.schedule_list]
+    removed = snapshot.schedule_list[0]['teachers'][0]
+    scheduled.remove_teacher(removed)
+
+    assert [dict(item) for item in snapshot.schedule_list] == listed
+    assert removed in [t.teacher_id for t in snapshot.schedules[0].teachers]
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        snapshot.version = 8
+    with pytest.raises(TypeError):
+        snapshot.teacher_counts[removed] = 0
+
+
+def test_select_uses_the_indexes(scheduled):
+    snapshot = ScheduleSnapshot.from_scheduler(scheduled, 1, serialize)
+    date = snapshot.schedules[0].exam.date
+    teacher_id = snapshot.schedules[0].teachers[0].teacher_id
+    expected = [i for i, s in enumerate(snapshot.schedules)
+                if s.exam.date == date and teacher_id in [t.teacher_id for t in s.teachers]]
+    assert snapshot.select(date=date, teacher_id=teacher_id) == expected
+    assert snapshot.select(date=None) == list(range(len(snapshot.schedules)))
+    assert snapshot.select(subject='不存在') == []
+
+
+def test_empty_snapshot():
+    snapshot = empty_snapshot(3)
+    assert snapshot.empty and snapshot.version == 3 and snapshot.select(date='x') == []
+
+
+def test_readers_see_whole_snapshots_while_writers_publish(client, app_module):
+    import threading
+    client.post('/api/schedule', json={'seed': 1})
+    errors = []
+    stop = threading.Event()
+
+    def read():
+        reader = app_module.app.test_client()
+        while not stop.is_set():
+            snapshot = app_module.get_snapshot()
+            if len(snapshot.schedule_list) != len(snapshot.schedules):
+                errors.append(snapshot.version)
+            body = reader.get('/api/schedule').json
+            if body['count'] != len(body['data']):
+                errors.append(body)
+
+    thread = threading.Thread(target=read)
+    thread.start()
+    try:
+        for seed in range(2, 8):
+            client.post('/api/schedule', json={'seed': seed})
+    finally:
+        stop.set()
+        thread.join()
+    assert not errors
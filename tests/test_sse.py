@@ -0,0 +1,37 @@
+import json
+
+
+def parse_events(body):
+    events = []
+    for block in body.split('\n\n'):
+        lines = [line for line in block.split('\n') if line and not line.startswith(':')]
+        if not lines:
+            continue
+        fields = dict(line.split(': ', 1) for line in lines)
+        events.append((fields['event'], json.loads(fields['data'])))
+    return events
+
+
+def test_stream_sends_start_slots_and_done(client):
+    response = client.get('/api/schedule/stream?seed=1&cache=0')
+    assert response.mimetype == 'text/event-stream'
+    events = parse_events(response.get_data(as_text=True))
+    names = [name for name, _ in events]
+    assert names[0] == 'start' and names[-1] == 'done'
+
+    slots = [payload for name, payload in events if name == 'slot']
+    assert slots and slots[-1]['done'] == slots[-1]['total'] == len(slots)
+    assert all(slot['balance']['gap'] == slot['balance']['max'] - slot['balance']['min'] for slot in slots)
+    streamed = [item for slot in slots for item in slot['data']]
+    assert len(streamed) == events[-1][1]['count'] == client.get('/api/schedule').json['count']
+
+
+def test_stream_replays_cached_result_by_slot(client):
+    client.post('/api/schedule', json={'seed': 1})
+    events = parse_events(client.get('/api/schedule/stream?seed=1').get_data(as_text=True))
+    assert events[-1] == ('done', {'count': client.get('/api/schedule').json['count'], 'cache': 'hit'})
+    assert sum(len(payload['data']) for name, payload in events if name == 'slot') == events[-1][1]['count']
+
+
+def test_stream_rejects_bad_arguments(client):
+    assert client.get('/api/schedule/stream?engine=bogus').status_code == 400
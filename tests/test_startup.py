@@ -0,0 +1,33 @@
+import os
+import socket
+import subprocess
+import sys
+
+import startup
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_app_import_does_not_load_pandas():
+    code = "import sys; import app; print('pandas' in sys.modules, 'openpyxl' in sys.modules)"
+    output = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert output.stdout.split()[-2:] == ['False', 'False']
+
+
+def test_breakdown_and_report(monkeypatch):
+    monkeypatch.setattr(startup, '_marks', [])
+    monkeypatch.setattr(startup, '_started', 10.0)
+    startup._marks.extend([('导入', 10.5), ('初始化', 11.25)])
+    assert startup.breakdown() == [('导入', 0.5), ('初始化', 0.75)]
+    assert startup.report() == '启动耗时: 导入 0.50s | 初始化 0.75s | 共 1.25s'
+
+
+def test_wait_until_ready():
+    with socket.socket() as server:
+        server.bind(('127.0.0.1', 0))
+        server.listen()
+        assert startup.wait_until_ready('0.0.0.0', server.getsockname()[1], timeout=2)
+    with socket.socket() as closed:
+        closed.bind(('127.0.0.1', 0))
+        port = closed.getsockname()[1]
+    assert not startup.wait_until_ready('127.0.0.1', port, timeout=0.2, interval=0.05)
@@ -0,0 +1,126 @@
+import pytest
+
+import storage
+from conftest import make_exams, make_teachers
+from scheduler import ExamScheduler
+
+
+def saved_run(seed=1):
+    scheduler = ExamScheduler(make_teachers(12), make_exams(6, rooms=2), seed=seed)
+    scheduler.schedule()
+    run_id = storage.save_schedule_run(scheduler.final_schedules, scheduler.get_source_exam_ids(),
+                                       engine=scheduler.engine, seed=scheduler.seed, fingerprint='fp')
+    return scheduler, run_id
+
+
+def test_schedule_run_round_trip(data_dir):
+    scheduler, run_id = saved_run()
+    schedules, sources = storage.load_schedule_run(run_id)
+    assert sources == scheduler.get_source_exam_ids()
+    assert [(s.exam.exam_id, [t.teacher_id for t in s.teachers]) for s in schedules] == \
+        [(s.exam.exam_id, [t.teacher_id for t in s.teachers]) for s in scheduler.final_schedules]
+    assert storage.get_schedule_run(run_id)['seed'] == 1
+    assert storage.find_schedule_run('fp')['run_id'] == run_id
+
+
+def test_query_defaults_to_current_run(data_dir):
+    _, first = saved_run(seed=1)
+    _, second = saved_run(seed=2)
+    # 没有发布的排班：不回退到最新批次
+    assert storage.query_schedules() == []
+
+    storage.advance_state(first)
+    date = storage.load_schedule_run(first)[0][0].exam.date
+    expected = [s.exam.exam_id for s in storage.load_schedule_run(first)[0] if s.exam.date == date]
+    assert [s.exam.exam_id for s in storage.query_schedules(date=date)] == expected
+    assert len(storage.query_schedules(run_id=second)) == len(storage.load_schedule_run(second)[0])
+
+    storage.advance_state(None)
+    assert storage.query_schedules() == []
+
+
+def test_query_endpoint_empty_after_data_change(client):
+    assert client.post('/api/schedule', json={'seed': 1}).status_code == 200
+    assert client.get('/api/schedule/query').json['count'] > 0
+    client.post('/api/teachers', json={'id': 'NEW', 'name': '新老师', 'title': '', 'phone': '', 'department': ''})
+    assert client.get('/api/schedule/query').json['count'] == 0
+
+
+def test_single_row_edits_hit_the_database(data_dir):
+    storage.replace_teachers(make_teachers(3))
+    assert storage.update_teacher('T001', {'name': '改名'})
+    assert not storage.update_teacher('NOPE', {'name': 'x'})
+    assert storage.delete_teacher('T002') == 1
+    assert [(t.teacher_id, t.name) for t in storage.load_teachers()] == [('T000', '老师T0'), ('T001', '改名')]
+    assert storage.teacher_exists('T000') and not storage.teacher_exists('T002')
+
+    storage.save_config({'每个老师每天最多监考次数': 3, '排班算法': 'flow'})
+    assert storage.load_config() == {'每个老师每天最多监考次数': 3, '排班算法': 'flow'}
+    # xlsx 只用于导入导出，单条修改不会写文件
+    assert not (data_dir / 'teachers.xlsx').exists()
+
+
+def test_rejects_unknown_fields(data_dir):
+    storage.replace_exams(make_exams(1))
+    with pytest.raises(ValueError):
+        storage.update_exam('E000', {'exam_id': 'X'})
+
+
+def query_plan(sql, params):
+    with storage.connect() as conn:
+        return ' '.join(row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params))
+
+
+def schedule_query_plan(*conditions):
+    return query_plan("SELECT s.*, t.teacher_id FROM schedules s "
+                      "LEFT JOIN schedule_teachers t ON t.schedule_seq = s.seq "
+                      f"WHERE {' AND '.join(conditions)} ORDER BY s.seq, t.position", [1] * len(conditions))
+
+
+def test_queries_use_composite_indexes(data_dir):
+    for seed in range(3):
+        saved_run(seed)
+    plan = schedule_query_plan('s.run_id = ?', 's.date = ?', 's.time_slot = ?')
+    assert 'idx_schedules_run_date_slot (run_id=? AND date=? AND time_slot=?)' in plan
+    plan = schedule_query_plan('s.run_id = ?', 's.subject = ?')
+    assert 'idx_schedules_run_subject (run_id=? AND subject=?)' in plan
+    plan = query_plan("SELECT run_id FROM schedule_runs WHERE fingerprint = ? ORDER BY run_id DESC LIMIT 1", ('fp',))
+    assert 'idx_schedule_runs_fingerprint' in plan and 'TEMP B-TREE' not in plan
+
+
+def test_old_runs_are_pruned_except_the_current_one(data_dir, monkeypatch):
+    monkeypatch.setattr(storage.config, 'SCHEDULE_RUNS_KEEP', 3)
+    _, current = saved_run()
+    storage.advance_state(current)
+    runs = [saved_run(seed)[1] for seed in range(2, 7)]
+
+    assert [run['run_id'] for run in storage.list_schedule_runs()] == runs[-3:][::-1] + [current]
+    with storage.connect() as conn:
+        run_ids = {row[0] for row in conn.execute("SELECT DISTINCT run_id FROM schedules")}
+        orphans = conn.execute("SELECT COUNT(*) FROM schedule_teachers "
+                               "WHERE schedule_seq NOT IN (SELECT seq FROM schedules)").fetchone()[0]
+    assert run_ids == {current, *runs[-3:]} and orphans == 0
+    assert storage.query_schedules(run_id=runs[0]) == []
+    assert storage.query_schedules()
+
+
+def test_old_database_gets_new_columns_and_indexes(data_dir):
+    import sqlite3
+    conn = sqlite3.connect(str(data_dir / 'scheduler.db'))
+    conn.executescript("""
+        CREATE TABLE schedule_runs (run_id INTEGER PRIMARY KEY AUTOINCREMENT, created_at TEXT NOT NULL,
+                                    engine TEXT, seed INTEGER, schedule_count INTEGER NOT NULL);
+        CREATE TABLE schedules (seq INTEGER PRIMARY KEY AUTOINCREMENT, run_id INTEGER NOT NULL, source_exam_id TEXT,
+                                exam_id TEXT, exam_name TEXT, subject TEXT, date TEXT, time_slot TEXT, room TEXT,
+                                required_teachers INTEGER);
+        CREATE INDEX idx_schedules_run ON schedules(run_id);
+        CREATE INDEX idx_schedules_subject ON schedules(subject);
+    """)
+    conn.close()
+
+    _, run_id = saved_run()
+    assert storage.find_schedule_run('fp')['run_id'] == run_id
+    with storage.connect() as conn:
+        indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert {'idx_schedules_run_date_slot', 'idx_schedules_run_subject', 'idx_schedule_runs_fingerprint'} <= indexes
+    assert not indexes & {'idx_schedules_run', 'idx_schedules_subject'}
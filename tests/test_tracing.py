@@ -0,0 +1,66 @@
+import logging
+import threading
+
+from conftest import make_exams, make_teachers
+from scheduler import ExamScheduler
+from tracing import capture
+
+logger = logging.getLogger('tests.tracing')
+
+
+def traced_run(trace_level):
+    scheduler = ExamScheduler(make_teachers(40), make_exams(12), seed=1, trace_level=trace_level)
+    scheduler.schedule()
+    return scheduler
+
+
+def test_capture_keeps_logger_level():
+    logger.setLevel(logging.WARNING)
+    with capture(logger, logging.DEBUG) as buffer:
+        logger.debug('inside')
+    logger.debug('outside')
+    assert [entry['message'] for entry in buffer.to_list()][0] == 'inside'
+    assert logger.level == logging.WARNING
+    assert not logger.filters
+
+
+def test_capture_only_collects_own_thread():
+    started = threading.Event()
+    release = threading.Event()
+
+    def other():
+        with capture(logger, logging.DEBUG) as other_buffer:
+            started.set()
+            release.wait(5)
+            logger.debug('other')
+        assert 'mine' not in [entry['message'] for entry in other_buffer.to_list()]
+
+    thread = threading.Thread(target=other)
+    thread.start()
+    started.wait(5)
+    with capture(logger, logging.INFO) as buffer:
+        logger.info('mine')
+        logger.debug('too detailed')
+        release.set()
+        thread.join()
+    messages = [entry['message'] for entry in buffer.to_list()]
+    assert messages == ['mine']
+
+
+def test_concurrent_untraced_run_does_not_leak_into_trace():
+    expected = len(traced_run('debug').trace)
+    result = {}
+
+    def traced():
+        result['trace'] = traced_run('debug').trace
+
+    def untraced():
+        for _ in range(5):
+            assert traced_run(None).trace == []
+
+    threads = [threading.Thread(target=traced), threading.Thread(target=untraced)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(result['trace']) == expected
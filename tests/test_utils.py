@@ -0,0 +1,44 @@
+import os
+
+import pandas as pd
+
+import config
+import storage
+import utils
+from conftest import make_teachers
+
+
+def test_edited_xlsx_is_reimported(data_dir):
+    utils.save_teachers(make_teachers(3))
+    utils.export_teachers_xlsx(make_teachers(3))
+    assert [t.teacher_id for t in utils.load_teachers()] == ['T000', 'T001', 'T002']
+
+    df = pd.read_excel(config.TEACHERS_FILE)
+    df = df.iloc[:2]
+    df.to_excel(config.TEACHERS_FILE, index=False)
+    stat = os.stat(config.TEACHERS_FILE)
+    os.utime(config.TEACHERS_FILE, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    version = storage.get_state()[0]
+
+    assert [t.teacher_id for t in utils.load_teachers()] == ['T000', 'T001']
+    assert storage.get_state()[0] > version
+
+
+def test_unchanged_xlsx_is_not_reparsed(data_dir, monkeypatch):
+    utils.save_teachers(make_teachers(2))
+    utils.export_teachers_xlsx(make_teachers(2))
+    monkeypatch.setattr(pd, 'read_excel', None)
+    assert len(utils.load_teachers()) == 2
+
+
+def test_frames_fill_defaults_column_wise():
+    teachers = utils.teachers_from_frame(pd.DataFrame({
+        '工号': ['A1', None], '姓名': ['甲', '乙'], '职称': ['讲师', '教授'], '联系方式': [13800000000, 13900000000],
+        '所属部门': ['数学系', '物理系']}))
+    # 工号为空时按行号生成
+    assert [(t.teacher_id, t.phone) for t in teachers] == [('A1', '13800000000'), ('T002', '13900000000')]
+
+    exams = utils.exams_from_frame(pd.DataFrame({
+        '考试编号': ['E1', 'E2'], '考试名称': ['期末', '期末'], '科目': ['数学', '物理'],
+        '日期': ['2024-06-10', '2024-06-11'], '时间段': ['08:30-10:30', '14:00-16:00'], '考场数': [3, None]}))
+    assert [(e.exam_id, e.rooms_count, e.required_teachers) for e in exams] == [('E1', 3, 2), ('E2', 6, 2)]
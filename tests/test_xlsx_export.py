@@ -0,0 +1,54 @@
+import openpyxl
+
+from conftest import make_exams, make_teachers
+from scheduler import ExamScheduler
+from xlsx_export import HORIZONTAL_HEADERS, SCHEDULE_COLUMNS, write_horizontal, write_schedule_list
+
+
+def scheduled():
+    scheduler = ExamScheduler(make_teachers(20), make_exams(4, days=2, rooms=3), seed=1)
+    scheduler.schedule()
+    return scheduler.final_schedules
+
+
+def test_schedule_list_layout(tmp_path):
+    schedules = scheduled()
+    path = str(tmp_path / 'list.xlsx')
+    write_schedule_list(path, schedules)
+    rows = list(openpyxl.load_workbook(path).active.iter_rows(values_only=True))
+
+    assert list(rows[0]) == SCHEDULE_COLUMNS
+    expected = [(s.exam.date, s.exam.time_slot, s.exam.room, s.exam.exam_name, s.exam.subject,
+                 s.exam.required_teachers, t.name, t.teacher_id, '主监考' if i == 0 else '副监考')
+                for s in schedules for i, t in enumerate(s.teachers)]
+    assert rows[1:] == expected
+
+
+def test_horizontal_layout(tmp_path):
+    schedules = scheduled()
+    path = str(tmp_path / 'horizontal.xlsx')
+    write_horizontal(path, schedules)
+    sheet = openpyxl.load_workbook(path)['排班表']
+
+    assert sheet['A1'].value == '监考排班表'
+    assert [str(r) for r in sheet.merged_cells.ranges] == ['A1:I1']
+    assert [cell.value for cell in sheet[3]] == HORIZONTAL_HEADERS
+    rows = [tuple(cell.value for cell in row) for row in sheet.iter_rows(min_row=4)]
+    # 每个 (日期, 时间段, 科目) 一行，按键排序；每门考试 3 个考场，其余列为空
+    keys = sorted({(s.exam.date, s.exam.time_slot, s.exam.subject) for s in schedules})
+    assert [row[:3] for row in rows] == keys
+    first = sorted((s for s in schedules if (s.exam.date, s.exam.time_slot, s.exam.subject) == keys[0]),
+                   key=lambda s: s.exam.room)
+    assert rows[0][3] == '、'.join(t.name for t in sorted(first[0].teachers, key=lambda t: t.teacher_id))
+    assert all(row[3] and row[5] and row[6] is None for row in rows)
+
+
+def test_export_endpoint_returns_workbook(client, tmp_path):
+    client.post('/api/schedule', json={'seed': 1})
+    response = client.get('/api/schedule/excel/horizontal')
+    assert response.status_code == 200
+    path = tmp_path / 'download.xlsx'
+    path.write_bytes(response.data)
+    response.close()
+    rows = list(openpyxl.load_workbook(path)['排班表'].iter_rows(min_row=4, values_only=True))
+    assert len(rows) == len({(s['date'], s['time_slot'], s['subject']) for s in client.get('/api/schedule').json['data']})
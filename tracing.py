@@ -0,0 +1,118 @@
+"""
+排班过程跟踪（基于 logging 模块）
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+# 默认最多保留的跟踪记录条数
+DEFAULT_TRACE_CAPACITY = 10000
+
+
+def parse_level(level: Union[int, str, bool, None]) -> Optional[int]:
+    """将 'debug'/'info'/数字/True 等写法转换为 logging 级别，None/False 表示不跟踪"""
+    if level is None or level is False:
+        return None
+    if level is True:
+        return logging.INFO
+    if isinstance(level, int):
+        return level
+    value = logging.getLevelName(str(level).strip().upper())
+    if not isinstance(value, int):
+        raise ValueError(f"未知的日志级别: {level}")
+    return value
+
+
+class TraceBuffer(logging.Handler):
+    """内存跟踪缓冲区，只在挂载期间收集日志记录"""
+
+    def __init__(self, level: int = logging.DEBUG, capacity: int = DEFAULT_TRACE_CAPACITY):
+        super().__init__(level)
+        self.records = deque(maxlen=capacity)
+
+    def emit(self, record: logging.LogRecord):
+        self.records.append({
+            'time': record.created,
+            'level': record.levelname,
+            'message': record.getMessage()
+        })
+
+    def to_list(self) -> List[Dict]:
+        return list(self.records)
+
+
+class _TraceFilter(logging.Filter):
+    """
+    挂在被跟踪的 logger 上：把记录交给当前运行（contextvar）自己的缓冲区，
+    并挡住为了跟踪而临时放行、原本不会输出的低级别记录，其他处理器看到的输出与不跟踪时相同
+    """
+
+    def __init__(self, base_level: int):
+        super().__init__()
+        self.base_level = base_level
+        self.active = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        buffer = _current_buffer.get()
+        if buffer is not None and record.levelno >= buffer.level:
+            buffer.handle(record)
+        return record.levelno >= self.base_level
+
+
+# 当前运行的跟踪缓冲区；每个线程 / 异步任务各自独立，并发的排班互不混入对方的记录
+_current_buffer: ContextVar[Optional[TraceBuffer]] = ContextVar('trace_buffer', default=None)
+_filters: Dict[str, Tuple[_TraceFilter, int]] = {}
+_filters_lock = threading.Lock()
+
+
+def _attach(logger: logging.Logger, level: int):
+    """第一个跟踪开始时挂上过滤器；logger 级别降到所有进行中跟踪的最低级别"""
+    with _filters_lock:
+        if logger.name not in _filters:
+            trace_filter = _TraceFilter(logger.getEffectiveLevel())
+            logger.addFilter(trace_filter)
+            _filters[logger.name] = (trace_filter, logger.level)
+        trace_filter, _ = _filters[logger.name]
+        trace_filter.active += 1
+        if logger.getEffectiveLevel() > level:
+            logger.setLevel(level)
+
+
+def _detach(logger: logging.Logger):
+    """最后一个跟踪结束时移除过滤器并恢复 logger 原来的级别"""
+    with _filters_lock:
+        trace_filter, old_level = _filters[logger.name]
+        trace_filter.active -= 1
+        if not trace_filter.active:
+            logger.removeFilter(trace_filter)
+            logger.setLevel(old_level)
+            del _filters[logger.name]
+
+
+@contextmanager
+def capture(logger: logging.Logger, level: Optional[int],
+            capacity: int = DEFAULT_TRACE_CAPACITY) -> Iterator[Optional[TraceBuffer]]:
+    """
+    在 with 块内按指定级别收集 logger 的输出；level 为 None 时不做任何事
+
+    只收集当前线程（上下文）内产生的记录，多个排班同时跟踪时各自的缓冲区互不干扰
+    """
+    if level is None:
+        yield None
+        return
+
+    buffer = TraceBuffer(level, capacity)
+    _attach(logger, level)
+    token = _current_buffer.set(buffer)
+    started = time.perf_counter()
+    try:
+        yield buffer
+    finally:
+        logger.debug("跟踪结束，耗时 %.3f 秒", time.perf_counter() - started)
+        _current_buffer.reset(token)
+        _detach(logger)
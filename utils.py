@@ -2,11 +2,28 @@
 工具函数
 """
 
-import pandas as pd
+import hashlib
+import json
 import os
-from typing import List, Dict, Any
+from typing import TYPE_CHECKING, List, Dict, Any, Optional, Iterator, Callable
 from models import Teacher, Exam, Schedule
 import config
+import storage
+from xlsx_export import write_schedule_list
+
+# pandas 导入较慢（数百毫秒），只在读写 xlsx 时才在函数内导入，加快 Web 服务启动
+if TYPE_CHECKING:
+    import pandas as pd
+
+def input_fingerprint(teachers: List[Teacher], exams: List[Exam], config_dict: Dict[str, Any]) -> str:
+    """排班输入（老师、考试、配置）的指纹，内容相同则指纹相同（不含监考次数）"""
+    payload = json.dumps([
+        [(t.teacher_id, t.name, t.title, t.phone, t.department) for t in teachers],
+        [(e.exam_id, e.exam_name, e.subject, e.date, e.time_slot, e.room, e.required_teachers, e.rooms_count)
+         for e in exams],
+        sorted((str(k), v) for k, v in config_dict.items())
+    ], ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
 
 
 def init_data_dir():
@@ -22,20 +39,25 @@ def init_data_dir():
         # 如果目录已存在，确保配置文件也存在
         if not os.path.exists(config.CONFIG_FILE):
             _create_default_config()
-        if not os.path.exists(config.TEACHERS_FILE):
+        # 数据库已有数据时不再生成示例文件，避免示例覆盖已有数据
+        if not os.path.exists(config.TEACHERS_FILE) and not storage.count_teachers():
             _create_sample_teachers()
-        if not os.path.exists(config.EXAMS_FILE):
+        if not os.path.exists(config.EXAMS_FILE) and not storage.exam_ids():
             _create_sample_exams()
 
 
 def _create_default_config():
     """创建默认配置"""
+    import pandas as pd
     data = [{
         '配置项': '每个老师每天最多监考次数',
         '值': config.DEFAULT_MAX_EXAMS_PER_DAY
     }, {
         '配置项': '连续监考最多场次',
         '值': config.DEFAULT_MAX_CONSECUTIVE_EXAMS
+    }, {
+        '配置项': '排班算法',
+        '值': config.DEFAULT_ENGINE
     }, {
         '配置项': '时间段1',
         '值': config.DEFAULT_TIME_SLOTS[0] if len(config.DEFAULT_TIME_SLOTS) > 0 else ''
@@ -54,23 +76,48 @@ def _create_default_config():
     print(f"创建默认配置: {config.CONFIG_FILE}")
 
 
+def _sync_from_xlsx(path: str, read: Callable[[], Any], replace: Callable[[Any], None]) -> bool:
+    """
+    xlsx 在上次导入后有变化（或首次使用数据库）时，把内容重新导入数据库
+
+    以文件的修改时间和大小判断是否变化，返回是否发生了导入
+    """
+    signature = storage.file_signature(path)
+    meta_key = f"xlsx:{os.path.basename(path)}"
+    if signature is None or signature == storage.get_meta(meta_key):
+        return False
+    replace(read())
+    storage.set_meta(meta_key, signature)
+    # 数据已变化：作废当前排班并推进状态版本号，各进程和客户端缓存（ETag）随之更新
+    storage.advance_state(None)
+    return True
+
+
+def mark_synced(path: str):
+    """记录 xlsx 文件内容已与数据库一致（如导出后），下次加载时不再重新导入"""
+    storage.set_meta(f"xlsx:{os.path.basename(path)}", storage.file_signature(path))
+
+
+def _read_config_xlsx() -> Dict[str, Any]:
+    import pandas as pd
+    df = pd.read_excel(config.CONFIG_FILE)
+    return {str(key): value for key, value in zip(df['配置项'].tolist(), df['值'].tolist())} if not df.empty else {}
+
+
+def sync_config():
+    """config.xlsx 有变化时导入数据库"""
+    _sync_from_xlsx(config.CONFIG_FILE, _read_config_xlsx, storage.save_config)
+
+
 def load_config() -> Dict[str, Any]:
     """加载配置"""
     try:
-        if not os.path.exists(config.CONFIG_FILE):
-            _create_default_config()
-        
-        df = pd.read_excel(config.CONFIG_FILE)
-        if df.empty:
+        sync_config()
+        config_dict = storage.load_config()
+        if not config_dict:
             _create_default_config()
-            df = pd.read_excel(config.CONFIG_FILE)
-        
-        config_dict = {}
-        for _, row in df.iterrows():
-            key = str(row['配置项'])
-            value = row['值']
-            config_dict[key] = value
-        
+            sync_config()
+            config_dict = storage.load_config()
         return config_dict
     except Exception as e:
         print(f"加载配置失败: {e}")
@@ -79,19 +126,13 @@ def load_config() -> Dict[str, Any]:
 
 def save_config(config_dict: Dict[str, Any]):
     """保存配置"""
-    data = []
-    for key, value in config_dict.items():
-        data.append({
-            '配置项': key,
-            '值': value
-        })
-    df = pd.DataFrame(data)
-    df.to_excel(config.CONFIG_FILE, index=False)
-    print(f"配置已保存: {config.CONFIG_FILE}")
+    storage.save_config(config_dict)
+    print(f"配置已保存: {config.DB_FILE}")
 
 
 def _create_sample_teachers():
     """创建示例监考老师数据"""
+    import pandas as pd
     sample_teachers = [
         {"工号": "T001", "姓名": "张老师", "职称": "副教授", "联系方式": "13800000001", "所属部门": "计算机学院"},
         {"工号": "T002", "姓名": "李老师", "职称": "讲师", "联系方式": "13800000002", "所属部门": "计算机学院"},
@@ -110,6 +151,7 @@ def _create_sample_teachers():
 
 def _create_sample_exams():
     """创建示例考试数据"""
+    import pandas as pd
     sample_exams = [
         {"考试编号": "E001", "考试名称": "期末考试-高等数学", "科目": "高等数学", "日期": "2024-06-15", "时间段": "08:30-10:30", "考场": "A101", "需要监考人数": 2, "考场数": 6},
         {"考试编号": "E002", "考试名称": "期末考试-高等数学", "科目": "高等数学", "日期": "2024-06-15", "时间段": "10:45-12:45", "考场": "A101", "需要监考人数": 2, "考场数": 6},
@@ -124,7 +166,14 @@ def _create_sample_exams():
 
 
 def save_teachers(teachers: List[Teacher]):
-    """保存监考老师数据"""
+    """保存监考老师数据（替换数据库中的全部老师）"""
+    storage.replace_teachers(teachers)
+    print(f"保存监考老师数据: {config.DB_FILE}")
+
+
+def export_teachers_xlsx(teachers: List[Teacher]):
+    """把监考老师写入 teachers.xlsx（交换格式）"""
+    import pandas as pd
     data = []
     for t in teachers:
         data.append({
@@ -132,15 +181,23 @@ def save_teachers(teachers: List[Teacher]):
             '姓名': t.name,
             '职称': t.title,
             '联系方式': t.phone,
-            '所属部门': t.department
+            '所属部门': t.department,
+            '监考次数': t.exam_count
         })
     df = pd.DataFrame(data)
     df.to_excel(config.TEACHERS_FILE, index=False)
-    print(f"保存监考老师数据: {config.TEACHERS_FILE}")
+    mark_synced(config.TEACHERS_FILE)
 
 
 def save_exams(exams: List[Exam]):
-    """保存考试数据"""
+    """保存考试数据（替换数据库中的全部考试）"""
+    storage.replace_exams(exams)
+    print(f"保存考试数据: {config.DB_FILE}")
+
+
+def export_exams_xlsx(exams: List[Exam]):
+    """把考试写入 exams.xlsx（交换格式）"""
+    import pandas as pd
     data = []
     for e in exams:
         data.append({
@@ -155,74 +212,208 @@ def save_exams(exams: List[Exam]):
         })
     df = pd.DataFrame(data)
     df.to_excel(config.EXAMS_FILE, index=False)
-    print(f"保存考试数据: {config.EXAMS_FILE}")
+    mark_synced(config.EXAMS_FILE)
+
+
+def _str_column(df: "pd.DataFrame", column: str, default: Optional[str] = None) -> List[str]:
+    """按列取字符串值，结果与逐行 str(value) 一致；列不存在时使用默认值"""
+    if column not in df.columns:
+        if default is None:
+            raise KeyError(column)
+        return [default] * len(df)
+    return list(map(str, df[column].tolist()))
+
+
+def _int_column(df: "pd.DataFrame", column: str, default: int) -> List[int]:
+    """按列取整数值，空值和缺失列使用默认值"""
+    import pandas as pd
+    if column not in df.columns:
+        return [default] * len(df)
+    return pd.to_numeric(df[column]).fillna(default).astype(int).tolist()
+
+
+def teachers_from_frame(df: "pd.DataFrame") -> List[Teacher]:
+    """按列批量构造监考老师，工号为空时按行号生成（T001、T002...）"""
+    import pandas as pd
+    default_ids = 'T' + pd.Series(df.index + 1, index=df.index).astype(str).str.zfill(3)
+    if '工号' in df.columns:
+        raw_ids = df['工号']
+        teacher_ids = pd.Series(_str_column(df, '工号'), index=df.index, dtype=object)
+        teacher_ids = teacher_ids.mask(raw_ids.isna() | (teacher_ids == 'nan'), default_ids)
+    else:
+        teacher_ids = default_ids
+
+    return [
+        Teacher(teacher_id=teacher_id, name=name, title=title, phone=phone, department=department, exam_count=0)
+        for teacher_id, name, title, phone, department in zip(
+            teacher_ids.tolist(),
+            _str_column(df, '姓名'),
+            _str_column(df, '职称'),
+            _str_column(df, '联系方式'),
+            _str_column(df, '所属部门')
+        )
+    ]
 
 
-def load_teachers() -> List[Teacher]:
-    """加载监考老师数据"""
-    if not os.path.exists(config.TEACHERS_FILE):
-        print(f"警告: 监考老师文件不存在: {config.TEACHERS_FILE}")
-        return []
+def exams_from_frame(df: "pd.DataFrame") -> List[Exam]:
+    """按列批量构造考试，需要监考人数默认2，考场数默认6"""
+    return [
+        Exam(exam_id=exam_id, exam_name=exam_name, subject=subject, date=date, time_slot=time_slot,
+             room=room, required_teachers=required_teachers, rooms_count=rooms_count)
+        for exam_id, exam_name, subject, date, time_slot, room, required_teachers, rooms_count in zip(
+            _str_column(df, '考试编号'),
+            _str_column(df, '考试名称'),
+            _str_column(df, '科目'),
+            _str_column(df, '日期'),
+            _str_column(df, '时间段'),
+            _str_column(df, '考场', ''),
+            _int_column(df, '需要监考人数', 2),
+            _int_column(df, '考场数', 6)
+        )
+    ]
 
+
+# ============ 流式导入 ============
+
+# 导入文件必须包含的列
+TEACHER_IMPORT_COLUMNS = ['工号', '姓名', '职称', '联系方式', '所属部门']
+EXAM_IMPORT_COLUMNS = ['考试编号', '考试名称', '科目', '日期', '时间段']
+# 每批产出的记录数
+IMPORT_CHUNK_SIZE = 1000
+
+
+def _iter_xlsx_chunks(stream, required_columns: List[str],
+                      build: Callable[[tuple, Dict[str, int], int], Any],
+                      chunk_size: int) -> Iterator[List[Any]]:
+    """
+    以只读模式逐行读取 xlsx，先校验表头，再按批产出记录
+
+    只读模式不会把整个工作簿载入内存；数据错误时立即抛出 ValueError，不再继续解析后面的行
+    """
+    from openpyxl import load_workbook
+
+    wb = load_workbook(stream, read_only=True, data_only=True)
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        header = next(rows, None) or ()
+        columns = {str(name).strip(): i for i, name in enumerate(header) if name is not None}
+        missing_columns = [col for col in required_columns if col not in columns]
+        if missing_columns:
+            raise ValueError(f'Missing columns: {missing_columns}')
+
+        chunk = []
+        for row_no, values in enumerate(rows, start=2):
+            if all(v is None or v == '' for v in values):
+                continue
+            chunk.append(build(values, columns, row_no))
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+    finally:
+        wb.close()
+
+
+def _cell(values: tuple, columns: Dict[str, int], name: str):
+    i = columns.get(name)
+    return values[i] if i is not None and i < len(values) else None
+
+
+def _cell_str(values: tuple, columns: Dict[str, int], name: str) -> str:
+    value = _cell(values, columns, name)
+    return '' if value is None else str(value)
+
+
+def _cell_int(values: tuple, columns: Dict[str, int], name: str, default: int, row_no: int) -> int:
+    value = _cell(values, columns, name)
+    if value is None or value == '':
+        return default
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        raise ValueError(f'Row {row_no}: invalid {name} value {value!r}')
+
+
+def _teacher_from_row(values: tuple, columns: Dict[str, int], row_no: int) -> Teacher:
+    # 工号为空时按行号生成，与 load_teachers 的规则一致（第2行为 T001）
+    teacher_id = _cell_str(values, columns, '工号') or f"T{row_no - 1:03d}"
+    return Teacher(
+        teacher_id=teacher_id,
+        name=_cell_str(values, columns, '姓名'),
+        title=_cell_str(values, columns, '职称'),
+        phone=_cell_str(values, columns, '联系方式'),
+        department=_cell_str(values, columns, '所属部门'),
+        exam_count=0
+    )
+
+
+def _exam_from_row(values: tuple, columns: Dict[str, int], row_no: int) -> Exam:
+    exam_id = _cell_str(values, columns, '考试编号')
+    if not exam_id:
+        raise ValueError(f'Row {row_no}: 考试编号 is empty')
+    return Exam(
+        exam_id=exam_id,
+        exam_name=_cell_str(values, columns, '考试名称'),
+        subject=_cell_str(values, columns, '科目'),
+        date=_cell_str(values, columns, '日期'),
+        time_slot=_cell_str(values, columns, '时间段'),
+        room=_cell_str(values, columns, '考场'),
+        required_teachers=_cell_int(values, columns, '需要监考人数', 2, row_no),
+        rooms_count=_cell_int(values, columns, '考场数', 6, row_no)
+    )
+
+
+def iter_teacher_import(stream, chunk_size: int = IMPORT_CHUNK_SIZE) -> Iterator[List[Teacher]]:
+    """流式读取上传的监考老师 xlsx，按批产出 Teacher"""
+    return _iter_xlsx_chunks(stream, TEACHER_IMPORT_COLUMNS, _teacher_from_row, chunk_size)
+
+
+def iter_exam_import(stream, chunk_size: int = IMPORT_CHUNK_SIZE) -> Iterator[List[Exam]]:
+    """流式读取上传的考试 xlsx，按批产出 Exam"""
+    return _iter_xlsx_chunks(stream, EXAM_IMPORT_COLUMNS, _exam_from_row, chunk_size)
+
+
+# 只在 _sync_from_xlsx 判断文件有变化时调用，每次都重新解析
+def _read_teachers_xlsx() -> List[Teacher]:
+    import pandas as pd
     df = pd.read_excel(config.TEACHERS_FILE)
-    teachers = []
-
-    for idx, row in df.iterrows():
-        teacher_id_value = row.get('工号', None)
-        if pd.isna(teacher_id_value) or str(teacher_id_value) == 'nan':
-            teacher_id = f"T{idx+1:03d}"
-        else:
-            teacher_id = str(teacher_id_value)
-
-        teacher = Teacher(
-            teacher_id=teacher_id,
-            name=str(row['姓名']),
-            title=str(row['职称']),
-            phone=str(row['联系方式']),
-            department=str(row['所属部门']),
-            exam_count=0
-        )
-        teachers.append(teacher)
+    return teachers_from_frame(df) if not df.empty else []
+
+
+def _read_exams_xlsx() -> List[Exam]:
+    import pandas as pd
+    df = pd.read_excel(config.EXAMS_FILE)
+    return exams_from_frame(df) if not df.empty else []
+
+
+def sync_teachers():
+    """teachers.xlsx 有变化时导入数据库；单条修改前调用，保证修改基于最新数据"""
+    if _sync_from_xlsx(config.TEACHERS_FILE, _read_teachers_xlsx, storage.replace_teachers):
+        print(f"导入监考老师文件: {config.TEACHERS_FILE}")
+
 
-    print(f"加载监考老师: {len(teachers)} 人")
+def sync_exams():
+    """exams.xlsx 有变化时导入数据库；单条修改前调用，保证修改基于最新数据"""
+    if _sync_from_xlsx(config.EXAMS_FILE, _read_exams_xlsx, storage.replace_exams):
+        print(f"导入考试文件: {config.EXAMS_FILE}")
+
+
+def load_teachers() -> List[Teacher]:
+    """加载监考老师数据（teachers.xlsx 有变化时先导入数据库）"""
+    sync_teachers()
+    teachers = storage.load_teachers()
+    if not teachers and not os.path.exists(config.TEACHERS_FILE):
+        print(f"警告: 监考老师文件不存在: {config.TEACHERS_FILE}")
     return teachers
 
 
 def load_exams() -> List[Exam]:
-    """加载考试数据"""
-    if not os.path.exists(config.EXAMS_FILE):
+    """加载考试数据（exams.xlsx 有变化时先导入数据库）"""
+    sync_exams()
+    exams = storage.load_exams()
+    if not exams and not os.path.exists(config.EXAMS_FILE):
         print(f"警告: 考试文件不存在: {config.EXAMS_FILE}")
-        return []
-
-    df = pd.read_excel(config.EXAMS_FILE)
-    exams = []
-
-    for _, row in df.iterrows():
-        required_value = row.get('需要监考人数', 2)
-
-        if required_value is None or str(required_value) != str(required_value):
-            required_value = 2
-        required_teachers = int(required_value)
-
-        # 获取考场数，默认为6
-        rooms_count_value = row.get('考场数', 6)
-        if rooms_count_value is None or str(rooms_count_value) != str(rooms_count_value):
-            rooms_count_value = 6
-        rooms_count = int(rooms_count_value)
-
-        exam = Exam(
-            exam_id=str(row['考试编号']),
-            exam_name=str(row['考试名称']),
-            subject=str(row['科目']),
-            date=str(row['日期']),
-            time_slot=str(row['时间段']),
-            room=str(row['考场']),
-            required_teachers=required_teachers,
-            rooms_count=rooms_count
-        )
-        exams.append(exam)
-
-    print(f"加载考试: {len(exams)} 场")
     return exams
 
 
@@ -232,31 +423,13 @@ def export_schedule(schedules: List[Schedule]):
         print("警告: 没有排班数据可导出")
         return
 
-    data = []
-    for schedule in schedules:
-        room = schedule.exam.room if schedule.exam.room else schedule.exam.subject
-        
-        for i, teacher in enumerate(schedule.teachers):
-            row = {
-                '日期': schedule.exam.date,
-                '时间段': schedule.exam.time_slot,
-                '考场': room,
-                '考试名称': schedule.exam.exam_name,
-                '科目': schedule.exam.subject,
-                '需要监考人数': schedule.exam.required_teachers,
-                '监考教师': teacher.name,
-                '监考教师工号': teacher.teacher_id if teacher.teacher_id else '',
-                '职位': i == 0 and '主监考' or '副监考'
-            }
-            data.append(row)
-    
-    df = pd.DataFrame(data)
-    df.to_excel(config.SCHEDULE_FILE, index=False)
+    write_schedule_list(config.SCHEDULE_FILE, schedules)
     print(f"排班结果已导出到: {config.SCHEDULE_FILE}")
 
 
 def export_schedule_by_date(schedules: List[Schedule]):
     """按日期导出排班结果"""
+    import pandas as pd
     dates = sorted(set([s.exam.date for s in schedules]))
 
     for date in dates:
@@ -305,6 +478,9 @@ def print_statistics(stats: dict):
     print(f"总考试数: {stats['total_exams']}")
     print(f"已排班: {stats['scheduled_exams']}")
     print(f"未排班: {stats['unscheduled_exams']}")
+    print(f"监考老师不足: {stats['understaffed_exams']}")
+    for item in stats['shortfall']:
+        print(f"  {item['date']} {item['time_slot']}: 需要 {item['required']} 人，已安排 {item['assigned']} 人")
     print("\n老师监考统计:")
     print("-" * 80)
     print(f"{'工号':<10} {'姓名':<10} {'监考次数'}")
@@ -313,4 +489,9 @@ def print_statistics(stats: dict):
     for t_stat in stats['teacher_stats']:
         print(f"{t_stat['teacher_id']:<10} {t_stat['name']:<10} {t_stat['exam_count']}")
 
+    fairness = stats.get('fairness')
+    if fairness:
+        print("-" * 80)
+        print(f"监考次数 最多 {fairness['max']} / 最少 {fairness['min']}（差 {fairness['gap']}），"
+              f"标准差 {fairness['stddev']}，基尼系数 {fairness['gini']}")
     print("=" * 80)
@@ -0,0 +1,16 @@
+"""
+WSGI 入口，供生产环境的 WSGI 服务器加载
+
+    waitress-serve --threads=16 --port=5000 wsgi:application
+    gunicorn -w 4 --threads 8 -b 0.0.0.0:5000 wsgi:application
+
+多个 worker 进程共享 data/scheduler.db：当前排班批次和状态版本号保存在数据库中，
+任一进程排班、修复或修改数据后，其他进程在下一次请求时按版本号重新加载，结果保持一致。
+"""
+
+from app import app
+from utils import init_data_dir
+
+init_data_dir()
+
+application = app
@@ -0,0 +1,101 @@
+"""
+排班结果的 Excel 导出（XlsxWriter）
+
+使用 constant_memory 模式逐行写出：每写完一行即落盘，内存占用与行数无关；
+单元格格式在工作簿上预先创建、所有单元格共享，不为每个单元格单独设置样式。
+输出布局与原先的 openpyxl / pandas 导出一致。
+"""
+
+from collections import defaultdict
+from typing import Dict, List, Sequence, Tuple
+from models import Schedule
+
+# 横向考场格式的考场列数（考场一 ~ 考场六）
+HORIZONTAL_ROOMS = 6
+
+SCHEDULE_COLUMNS = ['日期', '时间段', '考场', '考试名称', '科目', '需要监考人数', '监考教师', '监考教师工号', '职位']
+HORIZONTAL_HEADERS = ['日期', '时间', '科目', '考场一', '考场二', '考场三', '考场四', '考场五', '考场六']
+
+
+def _workbook(path: str):
+    import xlsxwriter
+    # 内容都是普通文本：关闭按 URL / 公式识别字符串，省去每个单元格的正则匹配，也避免姓名等被当成公式
+    return xlsxwriter.Workbook(path, {'constant_memory': True, 'strings_to_urls': False,
+                                      'strings_to_formulas': False})
+
+
+def write_schedule_list(path: str, schedules: Sequence[Schedule]):
+    """每位监考老师一行的明细表（与 pandas to_excel 的默认表头样式一致）"""
+    workbook = _workbook(path)
+    worksheet = workbook.add_worksheet('Sheet1')
+    header = workbook.add_format({'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'})
+
+    worksheet.write_row(0, 0, SCHEDULE_COLUMNS, header)
+    # 按列类型直接调用 write_string / write_number，跳过 write() 逐个单元格的类型判断
+    write_string = worksheet.write_string
+    write_number = worksheet.write_number
+    row = 1
+    for schedule in schedules:
+        exam = schedule.exam
+        room = exam.room if exam.room else exam.subject
+        for i, teacher in enumerate(schedule.teachers):
+            write_string(row, 0, exam.date)
+            write_string(row, 1, exam.time_slot)
+            write_string(row, 2, room)
+            write_string(row, 3, exam.exam_name)
+            write_string(row, 4, exam.subject)
+            write_number(row, 5, exam.required_teachers)
+            write_string(row, 6, teacher.name)
+            write_string(row, 7, teacher.teacher_id if teacher.teacher_id else '')
+            write_string(row, 8, '主监考' if i == 0 else '副监考')
+            row += 1
+    workbook.close()
+
+
+def _room_number(schedule: Schedule) -> int:
+    """从考场名（如“高等数学考场3”）提取考场编号"""
+    room_num = schedule.exam.room.replace(schedule.exam.subject, '').replace('考场', '')
+    if not room_num:
+        room_num = '1'
+    elif room_num[-1].isdigit():
+        room_num = room_num[-1]
+    return int(room_num) if room_num.isdigit() else min(6, max(1, len(schedule.exam.room)))
+
+
+def group_by_subject(schedules: Sequence[Schedule]) -> List[Tuple[Tuple[str, str, str], Dict[int, str]]]:
+    """按 (日期, 时间段, 科目) 分组，每组为 考场编号 → 监考老师姓名（按工号排列，顿号分隔），按键排序"""
+    grouped: Dict[Tuple[str, str, str], Dict[int, str]] = defaultdict(dict)
+    for schedule in schedules:
+        exam = schedule.exam
+        names = '、'.join(t.name for t in sorted(schedule.teachers, key=lambda x: x.teacher_id))
+        grouped[(exam.date, exam.time_slot, exam.subject)][_room_number(schedule)] = names
+    return sorted(grouped.items())
+
+
+def write_horizontal(path: str, schedules: Sequence[Schedule]):
+    """横向考场格式：每个 (日期, 时间段, 科目) 一行，考场一 ~ 考场六 各占一列"""
+    workbook = _workbook(path)
+    worksheet = workbook.add_worksheet('排班表')
+    title = workbook.add_format({'font_size': 16, 'bold': True, 'font_color': '#FFFFFF', 'bg_color': '#4472C4',
+                                 'align': 'center', 'valign': 'vcenter'})
+    header = workbook.add_format({'font_size': 11, 'bold': True, 'font_color': '#FFFFFF', 'bg_color': '#92C5DE',
+                                  'align': 'center', 'valign': 'vcenter', 'border': 1, 'border_color': '#CCCCCC'})
+    key_cell = workbook.add_format({'align': 'center', 'valign': 'vcenter'})
+    room_cell = workbook.add_format({'align': 'center', 'valign': 'vcenter', 'text_wrap': True,
+                                     'border': 1, 'border_color': '#CCCCCC'})
+
+    worksheet.set_column(0, 0, 12)
+    worksheet.set_column(1, 1, 14)
+    worksheet.set_column(2, 2, 10)
+    worksheet.set_column(3, 2 + HORIZONTAL_ROOMS, 20)
+
+    # constant_memory 模式下必须按行号递增的顺序写入
+    worksheet.merge_range(0, 0, 0, len(HORIZONTAL_HEADERS) - 1, '监考排班表', title)
+    worksheet.write_row(2, 0, HORIZONTAL_HEADERS, header)
+
+    row = 3
+    for (date, time_slot, subject), rooms in group_by_subject(schedules):
+        worksheet.write_row(row, 0, (date, time_slot, subject), key_cell)
+        worksheet.write_row(row, 3, [rooms.get(num, '') for num in range(1, HORIZONTAL_ROOMS + 1)], room_cell)
+        row += 1
+    workbook.close()